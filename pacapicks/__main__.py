@@ -0,0 +1,3 @@
+from pacapicks.cli import main
+
+main()
@@ -0,0 +1,221 @@
+import asyncio
+import json
+from datetime import date
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from pacapicks.ai.assessment_schema import Fundamentals, StockEvaluation, Technicals
+from pacapicks.ai.openai_client import (
+    compile_prompt,
+    cached_response_async,
+    model_pricing,
+    usage_cost,
+)
+from pacapicks.io.ratelimit import TokenBucket
+
+DEFAULT_MODEL = "gpt-4o-mini"
+MAX_OUTPUT_TOKENS = 1500
+
+
+class BudgetExceeded(RuntimeError):
+    pass
+
+
+class AssessmentBudget:
+    """
+    Running tally of spend for a batch. Each call reserves its worst-case cost
+    before dispatch and settles to the actual `usage` cost when it returns, so
+    concurrent calls can never jointly overshoot `max_usd`.
+    """
+
+    def __init__(self, max_usd):
+        self.max_usd = max_usd
+        self.spent_usd = 0.0
+        self.reserved_usd = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def reserve(self, usd):
+        if self.spent_usd + self.reserved_usd + usd > self.max_usd:
+            raise BudgetExceeded(
+                f"${self.spent_usd:.4f} spent, ${self.reserved_usd:.4f} in flight; "
+                f"budget ${self.max_usd:.2f}"
+            )
+        self.reserved_usd += usd
+
+    def settle(self, reserved_usd, usage, model):
+        self.reserved_usd -= reserved_usd
+        cost = usage_cost(model, usage)
+        self.spent_usd += cost
+        if usage is not None:
+            self.input_tokens += usage.input_tokens
+            self.output_tokens += usage.output_tokens
+        return cost
+
+
+def _estimate_tokens(text):
+    # ~4 characters per token is close enough for budgeting.
+    return len(text) // 4 + 1
+
+
+def _worst_case_usd(model, input_tokens, max_output_tokens):
+    price_in, _, price_out = model_pricing(model)
+    return (input_tokens * price_in + max_output_tokens * price_out) / 1e6
+
+
+def build_evaluation_prompt(ticker, fundamentals=None, technicals=None, as_of=None):
+    return compile_prompt("stock_evaluation", StockEvaluation).format(
+        ticker=ticker,
+        as_of=(as_of or date.today()).isoformat(),
+        fundamentals=(fundamentals or Fundamentals()).model_dump_json(),
+        technicals=(technicals or Technicals()).model_dump_json(),
+    )
+
+
+async def assess_batch(
+    tickers,
+    fundamentals: Optional[Dict[str, Fundamentals]] = None,
+    technicals: Optional[Dict[str, Technicals]] = None,
+    model=DEFAULT_MODEL,
+    requests_per_minute=500,
+    tokens_per_minute=200_000,
+    max_usd=5.0,
+    concurrency=32,
+    max_attempts=3,
+    client=None,
+    cache=None,
+    budget: Optional[AssessmentBudget] = None,
+    as_of: Optional[date] = None,
+) -> AsyncIterator[Tuple[str, Union[StockEvaluation, Exception]]]:
+    """
+    Generate StockEvaluations for many tickers concurrently.
+    Args:
+        tickers (list[str]): Symbols to evaluate.
+        fundamentals (dict): Pre-fetched Fundamentals by ticker.
+        technicals (dict): Pre-fetched Technicals by ticker.
+        model (str): OpenAI model name.
+        requests_per_minute (float): Request-rate cap.
+        tokens_per_minute (float): Token-rate cap (prompt estimate + max output).
+        max_usd (float): Total spend cap for the batch.
+        concurrency (int): Max calls in flight.
+        max_attempts (int): Tries per ticker; only validation failures are retried.
+        client: AsyncOpenAI-compatible client (default: shared AsyncOpenAI).
+        cache (ResponseCache | None | False): As for cached_response.
+        budget (AssessmentBudget): Pass one in to read spend afterwards.
+        as_of (date): Evaluation date for the prompt (default: today).
+    Yields:
+        tuple: (ticker, StockEvaluation | Exception) in completion order.
+    """
+    fundamentals = fundamentals or {}
+    technicals = technicals or {}
+    budget = budget or AssessmentBudget(max_usd)
+    rpm = TokenBucket.per_minute(requests_per_minute, burst=concurrency)
+    tpm = TokenBucket.per_minute(tokens_per_minute, burst=tokens_per_minute / 6)
+    gate = asyncio.Semaphore(concurrency)
+
+    async def call(prompt):
+        tokens = _estimate_tokens(prompt) + MAX_OUTPUT_TOKENS
+        reserved = _worst_case_usd(model, tokens - MAX_OUTPUT_TOKENS, MAX_OUTPUT_TOKENS)
+        async with gate:
+            budget.reserve(reserved)
+            await rpm.wait_async()
+            await tpm.wait_async(min(tokens, tpm.capacity))
+            try:
+                response, from_cache = await cached_response_async(
+                    client,
+                    cache,
+                    model=model,
+                    input=[{"role": "user", "content": prompt}],
+                    text={"format": {"type": "json_object"}},
+                    max_output_tokens=MAX_OUTPUT_TOKENS,
+                )
+            except BaseException:
+                budget.settle(reserved, None, model)
+                raise
+        budget.settle(reserved, None if from_cache else response.usage, model)
+        return response
+
+    async def one(ticker):
+        prompt = build_evaluation_prompt(
+            ticker, fundamentals.get(ticker), technicals.get(ticker), as_of
+        )
+        attempt_prompt = prompt
+        for attempt in range(max_attempts):
+            try:
+                response = await call(attempt_prompt)
+            except Exception as e:
+                return ticker, e
+            try:
+                evaluation = StockEvaluation.model_validate_json(response.output_text)
+            except ValidationError as e:
+                if attempt == max_attempts - 1:
+                    return ticker, e
+                attempt_prompt = (
+                    prompt
+                    + "\n\nYour previous answer failed validation; fix these errors:\n"
+                    + json.dumps(e.errors(include_url=False), default=str)
+                )
+                continue
+            # Keep the measured inputs authoritative over anything the model echoed.
+            update = {"ticker": ticker}
+            if ticker in fundamentals:
+                update["fundamentals"] = fundamentals[ticker]
+            if ticker in technicals:
+                update["technicals"] = technicals[ticker]
+            return ticker, evaluation.model_copy(update=update)
+
+    tasks = [asyncio.ensure_future(one(t)) for t in dict.fromkeys(tickers)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+if __name__ == "__main__":
+    # Throughput benchmark against a fake AsyncOpenAI endpoint.
+    import random
+    import time
+    from types import SimpleNamespace
+
+    LATENCY = 2.0
+    N_TICKERS = 200
+
+    class FakeResponses:
+        async def create(self, model, input, **kwargs):
+            await asyncio.sleep(LATENCY * random.uniform(0.5, 1.5))
+            ticker = input[0]["content"].split("Evaluate ", 1)[1].split(" ", 1)[0]
+            body = {"ticker": ticker, "quick_summary": "stub"}
+            if random.random() < 0.05:
+                body["decision"] = {"entry_price": 10, "stop_price": 11}  # invalid
+            usage = SimpleNamespace(
+                input_tokens=2000, output_tokens=400, input_tokens_details=None
+            )
+            return SimpleNamespace(output_text=json.dumps(body), usage=usage)
+
+    fake = SimpleNamespace(responses=FakeResponses())
+
+    async def bench():
+        budget = AssessmentBudget(max_usd=5.0)
+        ok = failed = 0
+        async for _, result in assess_batch(
+            [f"T{i:03d}" for i in range(N_TICKERS)],
+            requests_per_minute=5_000,
+            tokens_per_minute=2_000_000,
+            client=fake,
+            cache=False,
+            budget=budget,
+        ):
+            ok += isinstance(result, StockEvaluation)
+            failed += not isinstance(result, StockEvaluation)
+        return ok, failed, budget
+
+    start = time.perf_counter()
+    ok, failed, budget = asyncio.run(bench())
+    print(
+        f"{ok} ok / {failed} failed in {time.perf_counter() - start:.1f}s; "
+        f"spent ${budget.spent_usd:.4f} "
+        f"({budget.input_tokens} in / {budget.output_tokens} out tokens)"
+    )
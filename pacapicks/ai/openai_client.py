@@ -2,66 +2,201 @@ import os
 import json
 import yaml
 from datetime import date
-from openai import OpenAI
+from functools import lru_cache
+from openai import AsyncOpenAI, OpenAI
+from openai.types.responses import Response
 from pacapicks import config
-from ai.portfolio_schema import Picks
+from pacapicks.ai.portfolio_schema import Picks
+from pacapicks.io import metrics
+from pacapicks.io.cache import default_response_cache
 
 PROMPT_PATH = os.path.join(os.path.dirname(__file__), "prompts.yaml")
 
-client = OpenAI(api_key=config.OPENAI_API_KEY)
+# USD per 1M tokens: (input, cached input, output)
+PRICING = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
 
+_client = None
+_async_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=config.OPENAI_API_KEY)
+    return _client
+
+
+def get_async_client():
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+    return _async_client
 
-def load_prompt(key):
-    with open(PROMPT_PATH, "r") as f:
-        prompts = yaml.safe_load(f)
-    return prompts[key]["description"]
 
+def model_pricing(model):
+    """
+    PRICING row for `model`; dated snapshots (gpt-4o-2024-08-06) price as
+    their base model, unknown models as gpt-4o.
+    """
+    return PRICING.get(model.split("-20")[0], PRICING["gpt-4o"])
+
+
+def usage_cost(model, usage) -> float:
+    """Actual USD cost of a Responses API call from its `usage` block."""
+    if usage is None:
+        return 0.0
+    price_in, price_cached, price_out = model_pricing(model)
+    details = getattr(usage, "input_tokens_details", None)
+    cached = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+    return (
+        (usage.input_tokens - cached) * price_in
+        + cached * price_cached
+        + usage.output_tokens * price_out
+    ) / 1e6
+
+
+@lru_cache(maxsize=None)
+def _load_prompts():
+    with open(PROMPT_PATH, "r") as f:
+        return yaml.safe_load(f)
 
-def test_research_prompt():
-    prompt = load_prompt("stock_opportunities")
 
-    prompt = prompt.format(
+def load_prompt(key):
+    return _load_prompts()[key]["description"]
+
+
+@lru_cache(maxsize=None)
+def schema_json(model) -> str:
+    """Compact JSON schema for a pydantic model, built once per model."""
+    return json.dumps(model.model_json_schema(), separators=(",", ":"))
+
+
+@lru_cache(maxsize=None)
+def compile_prompt(key, schema_model=None) -> str:
+    """
+    Prompt template for `key` with the output schema appended, ready for
+    str.format(). Braces in the schema are escaped so only the prompt's own
+    placeholders are substituted.
+    """
+    template = load_prompt(key)
+    if schema_model is not None:
+        schema = schema_json(schema_model).replace("{", "{{").replace("}", "}}")
+        template += "\n\nEXPECTED OUTPUT SCHEMA (JSON):\n" + schema
+    return template
+
+
+def cached_response(client=None, cache=None, **request):
+    """
+    client.responses.create(**request), served from the response cache when an
+    identical request was made within the cache TTL. Pass cache=False to skip it.
+    Returns:
+        tuple: (Response, from_cache)
+    """
+    cache = default_response_cache() if cache is None else cache
+    key = cache.key(**request) if cache else None
+    if cache:
+        payload = cache.get(key)
+        if payload is not None:
+            return Response.model_validate(payload), True
+
+    with metrics.span("openai", "responses.create") as span:
+        response = (client or get_client()).responses.create(**request)
+        tokens_in, tokens_out = metrics.usage_tokens(response.usage)
+        span.record(status=response.status, tokens_in=tokens_in, tokens_out=tokens_out)
+    if cache:
+        cache.put(key, response.model_dump(mode="json"))
+    return response, False
+
+
+async def cached_response_async(client=None, cache=None, **request):
+    """Async counterpart of cached_response (uses AsyncOpenAI)."""
+    cache = default_response_cache() if cache is None else cache
+    key = cache.key(**request) if cache else None
+    if cache:
+        payload = cache.get(key)
+        if payload is not None:
+            return Response.model_validate(payload), True
+
+    with metrics.span("openai", "responses.create") as span:
+        response = await (client or get_async_client()).responses.create(**request)
+        tokens_in, tokens_out = metrics.usage_tokens(response.usage)
+        span.record(status=response.status, tokens_in=tokens_in, tokens_out=tokens_out)
+    if cache:
+        cache.put(key, response.model_dump(mode="json"))
+    return response, False
+
+
+@metrics.profiled("research")
+def test_research_prompt(client=None, cache=None):
+    prompt = compile_prompt("stock_opportunities", Picks).format(
         current_date=date.today().strftime("%Y-%m-%d"),
     )
 
-    # Append the expected output schema to the prompt
-    schema = Picks.model_json_schema()
-    prompt += "\n\nEXPECTED OUTPUT SCHEMA (JSON):\n" + json.dumps(schema, indent=2)
-
-    response = client.responses.create(
+    response, from_cache = cached_response(
+        client,
+        cache,
         model="gpt-4o",
         input=[{"role": "user", "content": prompt}],
         tools=[{"type": "web_search"}],
-        response_format="json",
         max_output_tokens=1200,
     )
 
     # Parse the response into Picks
-    output_json = (
-        response.output
-    )  # or response.choices[0].message.content if using completions
-    picks: Picks = Picks.model_validate_json(output_json)
+    picks: Picks = Picks.model_validate_json(response.output_text)
 
     print("Validated Picks object:", picks)
-    print("First ticker:", picks[0].ticker)
+    print("First ticker:", picks.root[0].ticker)
 
     # Save output to JSON file
     with open("research_output.json", "w") as f:
-        json.dump([pick.model_dump() for pick in picks], f, indent=2)
+        json.dump([pick.model_dump(mode="json") for pick in picks.root], f, indent=2)
 
     # You can still access usage & cost
     usage = response.usage
     print("Token usage:", usage)
-    if usage:
-        input_cost = usage.prompt_tokens * 0.000005  # $5 / 1M tokens
-        output_cost = usage.completion_tokens * 0.000015  # $15 / 1M tokens
-        print(f"Estimated cost: ${input_cost + output_cost:.4f}")
+    if from_cache:
+        print("Served from response cache; no API call made.")
+    elif usage:
+        print(f"Cost: ${usage_cost(response.model, usage):.4f}")
+
+    return picks
+
 
+@metrics.profiled("research_shortlist")
+def research_shortlist(candidates, client=None, cache=None, model="gpt-4o") -> Picks:
+    """
+    Research only a pre-screened short list instead of the whole market.
+    Args:
+        candidates (list[Candidate]): Output of Screener.screen().
+    Returns:
+        Picks: 3–5 picks drawn from the candidates.
+    """
+    rows = [{"ticker": c.ticker, "score": c.score, **c.metrics} for c in candidates]
+    prompt = compile_prompt("shortlist_opportunities", Picks).format(
+        current_date=date.today().strftime("%Y-%m-%d"),
+        candidates=json.dumps(rows, separators=(",", ":")),
+    )
+    response, from_cache = cached_response(
+        client,
+        cache,
+        model=model,
+        input=[{"role": "user", "content": prompt}],
+        tools=[{"type": "web_search"}],
+        max_output_tokens=1200,
+    )
+    picks = Picks.model_validate_json(response.output_text)
+    allowed = {c.ticker for c in candidates}
+    picks.root = [p for p in picks.root if p.ticker in allowed]
+    if response.usage and not from_cache:
+        print(f"Cost: ${usage_cost(response.model, response.usage):.4f}")
     return picks
 
 
-def test_hello_world():
-    response = client.chat.completions.create(
+def test_hello_world(client=None):
+    response = (client or get_client()).chat.completions.create(
         model="gpt-4o-mini", messages=[{"role": "user", "content": "hello world"}]
     )
     print(response.choices[0].message.content)
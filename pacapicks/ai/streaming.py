@@ -0,0 +1,286 @@
+"""
+Streamed research: picks are parsed, validated and handed on as the model
+writes them, instead of after the whole response.
+
+    for pick in PickStream(**request):        # each Pick as its object closes
+        ...
+    research_enriched()                       # picks + fundamentals + quotes
+
+JsonArrayStream splits a top-level JSON array into its elements as text
+arrives; research_enriched starts each ticker's fundamentals and quote
+lookups the moment its pick validates, so enrichment overlaps generation.
+"""
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, List, NamedTuple, Optional
+
+from openai.types.responses import Response
+from pydantic import ValidationError
+
+from pacapicks.ai.openai_client import compile_prompt, get_client, usage_cost
+from pacapicks.ai.portfolio_schema import Pick, Picks
+from pacapicks.io import metrics
+from pacapicks.io.cache import default_response_cache
+
+ENRICH_WORKERS = 8
+
+_OUTSIDE = re.compile(r'[\[\]{}"]')
+_INSIDE = re.compile(r'["\\]')
+_NON_SPACE = re.compile(r"\S")
+
+
+class JsonArrayStream:
+    """
+    Incremental splitter for a streamed top-level JSON array of objects
+    (or arrays). feed() returns the raw text of every element completed by
+    the new chunk. The array starts at the first "[" whose next non-space
+    character opens an element, so prose like "Here are [3] picks:" or a
+    ```json fence before it is skipped; anything after the closing "]" is
+    ignored, as are scalar elements.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0  # next unscanned offset into _text
+        self._depth = 0
+        self._in_string = False
+        self._start = None  # offset of the open element
+        self.started = False
+        self.done = False
+
+    def feed(self, chunk: str) -> List[str]:
+        if self.done:
+            return []
+        self._text += chunk
+        text, pos, out = self._text, self._pos, []
+        while True:
+            m = (_INSIDE if self._in_string else _OUTSIDE).search(text, pos)
+            if m is None:
+                break
+            i, c = m.start(), m.group()
+            pos = i + 1
+            if self._in_string:
+                if c == "\\":
+                    pos = i + 2  # skip the escaped char, even if not here yet
+                else:
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = self.started
+            elif c in "[{":
+                if not self.started:
+                    if c == "[":
+                        after = _NON_SPACE.search(text, pos)
+                        if after is None:
+                            pos = i  # can't tell yet; rescan with the next chunk
+                            break
+                        self.started = after.group() in "[{"
+                        self._depth = 1 if self.started else 0
+                    continue
+                if self._depth == 1:
+                    self._start = i
+                self._depth += 1
+            elif self.started:
+                self._depth -= 1
+                if self._depth == 1 and self._start is not None:
+                    out.append(text[self._start : i + 1])
+                    self._start = None
+                elif self._depth == 0:
+                    self.done = True
+                    break
+
+        # Keep only the open element (if any) so the buffer stays small.
+        keep = self._start if self._start is not None else min(pos, len(text))
+        self._text = text[keep:]
+        self._pos = pos - keep
+        if self._start is not None:
+            self._start = 0
+        return out
+
+
+class PickStream:
+    """
+    Iterate the Picks of one research request as they stream in.
+
+    Identical requests are served from the response cache (replayed through
+    the same parser); a fresh stream is cached once it completes. Elements
+    that fail validation are skipped and kept in `errors`.
+    """
+
+    def __init__(self, client=None, cache=None, **request):
+        self.client = client
+        self.cache = default_response_cache() if cache is None else cache
+        self.request = request
+        self.errors: List[ValidationError] = []
+        self.response: Optional[Response] = None
+        self.from_cache = False
+        self.complete = False
+
+    def _text(self):
+        key = self.cache.key(**self.request) if self.cache else None
+        if self.cache:
+            payload = self.cache.get(key)
+            if payload is not None:
+                self.response, self.from_cache = Response.model_validate(payload), True
+                yield self.response.output_text
+                return
+
+        client = self.client or get_client()
+        with metrics.span("openai", "responses.stream") as span:
+            events = client.responses.create(stream=True, **self.request)
+            for event in events:
+                if event.type == "response.output_text.delta":
+                    yield event.delta
+                elif event.type == "response.completed":
+                    self.response = event.response
+            if self.response is not None:
+                tokens_in, tokens_out = metrics.usage_tokens(self.response.usage)
+                span.record(
+                    status=self.response.status,
+                    tokens_in=tokens_in,
+                    tokens_out=tokens_out,
+                )
+        if self.cache and self.response is not None:
+            self.cache.put(key, self.response.model_dump(mode="json"))
+
+    def __iter__(self):
+        parser = JsonArrayStream()
+        for chunk in self._text():
+            for raw in parser.feed(chunk):
+                try:
+                    yield Pick.model_validate_json(raw)
+                except ValidationError as e:
+                    self.errors.append(e)
+        self.complete = parser.done
+
+    @property
+    def cost(self) -> float:
+        if self.response is None or self.from_cache:
+            return 0.0
+        return usage_cost(self.response.model, self.response.usage)
+
+
+def stream_research(client=None, cache=None, model="gpt-4o") -> PickStream:
+    """The stock_opportunities prompt as a PickStream."""
+    prompt = compile_prompt("stock_opportunities", Picks).format(
+        current_date=date.today().strftime("%Y-%m-%d"),
+    )
+    return PickStream(
+        client,
+        cache,
+        model=model,
+        input=[{"role": "user", "content": prompt}],
+        tools=[{"type": "web_search"}],
+        max_output_tokens=1200,
+    )
+
+
+class EnrichedPick(NamedTuple):
+    pick: Pick
+    fundamentals: Any  # Fundamentals, or None if the lookup failed
+    quote: Optional[dict]  # {"last", "prev_close"}, or None
+
+    def to_json(self) -> dict:
+        return {
+            "pick": self.pick.model_dump(mode="json"),
+            "fundamentals": (
+                self.fundamentals.model_dump(mode="json") if self.fundamentals else None
+            ),
+            "quote": self.quote,
+        }
+
+
+def _safe(fn, ticker, **kwargs):
+    try:
+        return fn(ticker, **kwargs)
+    except Exception:
+        return None
+
+
+@metrics.profiled("research_stream")
+def research_enriched(
+    stream=None,
+    fundamentals=None,
+    quote=None,
+    fundamentals_cache=None,
+    max_workers=ENRICH_WORKERS,
+) -> List[EnrichedPick]:
+    """
+    Run streamed research and enrich every pick while the rest is generated.
+    Args:
+        stream (PickStream): Defaults to stream_research().
+        fundamentals (callable): loader(ticker, cache=...); defaults to
+            load_fundamentals_from_yfinance.
+        quote (callable): loader(ticker); defaults to market_data.snapshot.
+        fundamentals_cache: Passed to the fundamentals loader.
+        max_workers (int): Lookups in flight at once.
+    Returns:
+        list[EnrichedPick]: In the order the model wrote the picks.
+    """
+    if fundamentals is None:
+        from pacapicks.jobs.fundamentals import load_fundamentals_from_yfinance
+
+        fundamentals = load_fundamentals_from_yfinance
+    if quote is None:
+        from pacapicks.market_data import snapshot
+
+        quote = snapshot
+    stream = stream_research() if stream is None else stream
+
+    pending = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for pick in stream:
+            pending.append(
+                (
+                    pick,
+                    pool.submit(
+                        _safe, fundamentals, pick.ticker, cache=fundamentals_cache
+                    ),
+                    pool.submit(_safe, quote, pick.ticker),
+                )
+            )
+        return [EnrichedPick(p, f.result(), q.result()) for p, f, q in pending]
+
+
+if __name__ == "__main__":
+    # Benchmark: blocking research then enrichment vs streamed, overlapped.
+    import time
+
+    from pacapicks.bench.fakes import FakeOpenAI, _fake_picks
+
+    N_PICKS, LLM_LATENCY, LOOKUP_LATENCY = 5, 1.0, 0.4
+
+    def slow(ticker, cache=None):
+        time.sleep(LOOKUP_LATENCY)
+        return {"last": 100.0, "prev_close": 99.0}
+
+    text = "```json\n" + json.dumps(_fake_picks(N_PICKS), indent=2) + "\n```"
+    parser = JsonArrayStream()
+    pieces = [parser.feed(text[i : i + 7]) for i in range(0, len(text), 7)]
+    raws = [raw for piece in pieces for raw in piece]
+    assert [json.loads(r) for r in raws] == _fake_picks(N_PICKS) and parser.done
+
+    fake = FakeOpenAI(latency=LLM_LATENCY, n_picks=N_PICKS)
+    fake._rng.uniform = lambda a, b: 1.0  # no jitter, for a fair comparison
+
+    start = time.perf_counter()
+    response = fake.responses.create(model="gpt-4o", input=[])
+    picks = Picks.model_validate_json(response.output_text).root
+    with ThreadPoolExecutor(ENRICH_WORKERS) as pool:
+        list(pool.map(lambda p: (slow(p.ticker), slow(p.ticker)), picks))
+    blocking = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stream = PickStream(fake, False, model="gpt-4o", input=[])
+    enriched = []
+    for item in research_enriched(stream, fundamentals=slow, quote=slow):
+        enriched.append(item)
+    streamed = time.perf_counter() - start
+
+    assert len(enriched) == N_PICKS and stream.complete and not stream.errors
+    print(
+        f"LLM {LLM_LATENCY:.1f}s + lookups {LOOKUP_LATENCY:.1f}s: "
+        f"blocking {blocking:.2f}s, streamed {streamed:.2f}s"
+    )
@@ -0,0 +1,358 @@
+"""
+Bulk validation for schema models (StockEvaluation, Pick, ...).
+
+validate_many runs a whole batch through one cached TypeAdapter and falls
+back to per-item validation only for the items that failed, so one bad LLM
+answer doesn't sink the batch; validate_json_many does the same for JSON. dump_stamped and
+load_stamped round-trip data we wrote ourselves: when the stamp matches the
+current schema the models are rebuilt without re-validating, optionally
+only as they are read. load_stamped_rows does the same for one stamped
+document per row (e.g. HistoryStore blobs).
+"""
+
+import gc
+import hashlib
+import json
+import types
+import typing
+from datetime import date, datetime
+from enum import Enum
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import (
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from pydantic import BaseModel, RootModel, TypeAdapter, ValidationError
+from pydantic_core import from_json
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class BulkResult(NamedTuple, Generic[M]):
+    items: List[Optional[M]]  # aligned with the input; None where invalid
+    errors: Dict[int, ValidationError]  # input position -> its error
+
+    @property
+    def valid(self) -> List[M]:
+        return [item for item in self.items if item is not None]
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model) -> TypeAdapter:
+    """TypeAdapter for List[model], built once per model."""
+    return TypeAdapter(List[model])
+
+
+@lru_cache(maxsize=None)
+def schema_stamp(model) -> str:
+    """Short hash of the model's JSON schema; changes whenever the schema does."""
+    schema = json.dumps(model.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode()).hexdigest()[:16]
+
+
+@contextmanager
+def _gc_paused():
+    # Building tens of thousands of models trips repeated full collections
+    # that rescan every model already built; nothing here creates cycles.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _failed_positions(error: ValidationError):
+    positions = {e["loc"][0] if e["loc"] else None for e in error.errors()}
+    return positions if all(isinstance(p, int) for p in positions) else None
+
+
+def validate_many(model, items: Iterable) -> BulkResult:
+    """
+    Validate python objects (dicts) as `model`, collecting per-item errors.
+    Args:
+        model (type[BaseModel]): Model to validate against.
+        items (iterable[dict]): One payload per model.
+    Returns:
+        BulkResult: models aligned with `items`, plus errors by position.
+    """
+    items = list(items)
+    bulk = list_adapter(model).validate_python
+    with _gc_paused():
+        try:
+            return BulkResult(bulk(items), {})
+        except ValidationError as e:
+            failed = _failed_positions(e) or range(len(items))
+        out, errors = [None] * len(items), {}
+        for i in failed:
+            try:
+                out[i] = model.model_validate(items[i])
+            except ValidationError as e:
+                errors[i] = e
+        rest = [i for i in range(len(items)) if i not in errors and out[i] is None]
+        for i, item in zip(rest, bulk([items[i] for i in rest])):
+            out[i] = item
+    return BulkResult(out, errors)
+
+
+def validate_json_many(model, texts: Iterable) -> BulkResult:
+    """
+    validate_many for JSON documents (str or bytes), e.g. LLM output_text or
+    stored blobs. Each document goes straight through the model's compiled
+    validator: pydantic-core slows down sharply on one huge JSON array, so
+    the batch isn't joined into a single document.
+    """
+    validate = model.model_validate_json
+    out, errors = [], {}
+    with _gc_paused():
+        for i, text in enumerate(texts):
+            try:
+                out.append(validate(text))
+            except ValidationError as e:
+                out.append(None)
+                errors[i] = e
+    return BulkResult(out, errors)
+
+
+# ---------- Trusted load ----------
+
+
+@lru_cache(maxsize=None)
+def _stamp_header(model) -> bytes:
+    return json.dumps({"model": model.__name__, "stamp": schema_stamp(model)}).encode()
+
+
+def dump_stamped(model, items: Iterable[BaseModel]) -> bytes:
+    """
+    Serialize models for load_stamped: a header line carrying the model name
+    and schema stamp, then one JSON document per line.
+    """
+    lines = [_stamp_header(model)]
+    lines.extend(item.model_dump_json().encode() for item in items)
+    return b"\n".join(lines)
+
+
+class LazyModels(Sequence):
+    """Trusted models built (without validation) the first time each is read."""
+
+    def __init__(self, model, lines):
+        self._build = _constructor(model)
+        self._lines = lines
+        self._items = [None] * len(lines)
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        item = self._items[i]
+        if item is None:
+            item = self._items[i] = self._build(from_json(self._lines[i]))
+        return item
+
+
+def load_stamped(model, data, lazy=True) -> BulkResult:
+    """
+    Load dump_stamped output.
+    Args:
+        model (type[BaseModel]): Model the data should hold.
+        data (bytes): dump_stamped output.
+        lazy (bool): With a stamp matching the current schema the data is
+            ours, so each model is constructed without validation the first
+            time it is read. lazy=False builds everything now instead, through
+            the compiled validator: for a full pass that beats constructing
+            models in Python.
+    Returns:
+        BulkResult: Another model or an older schema is always validated,
+        with errors collected per item.
+    """
+    header, *lines = bytes(data).split(b"\n")
+    meta = from_json(header)
+    trusted = meta.get("model") == model.__name__
+    trusted = trusted and meta.get("stamp") == schema_stamp(model)
+    if not (trusted and lazy):
+        return validate_json_many(model, lines)
+    return BulkResult(LazyModels(model, lines), {})
+
+
+def load_stamped_rows(model, blobs: Iterable, lazy=True) -> BulkResult:
+    """
+    Load documents written one per row as dump_stamped(model, [item]).
+    Args:
+        model (type[BaseModel]): Model the rows should hold.
+        blobs (iterable[bytes]): One stamped document per row; plain JSON
+            documents (written before rows were stamped) are accepted too.
+        lazy (bool): As for load_stamped; applies only when every row carries
+            the current stamp, otherwise all rows are validated.
+    Returns:
+        BulkResult: models aligned with `blobs`.
+    """
+    header, trusted, lines = _stamp_header(model), True, []
+    for blob in blobs:
+        head, sep, body = bytes(blob).partition(b"\n")
+        trusted = trusted and bool(sep) and head == header
+        lines.append(body if sep else head)
+    if not (trusted and lazy and lines):
+        return validate_json_many(model, lines)
+    return BulkResult(LazyModels(model, lines), {})
+
+
+def _identity(value):
+    return value
+
+
+def _optional(convert):
+    return lambda v: None if v is None else convert(v)
+
+
+@lru_cache(maxsize=None)
+def _converter(annotation):
+    """Function turning a JSON value back into `annotation`'s python type."""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Annotated:
+        return _converter(typing.get_args(annotation)[0])
+    if origin in (typing.Union, types.UnionType):
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        inner = _converter(args[0]) if len(args) == 1 else _identity
+        return _identity if inner is _identity else _optional(inner)
+    if origin in (list, List):
+        inner = _converter(typing.get_args(annotation)[0])
+        if inner is _identity:
+            return list
+        return lambda values: [inner(v) for v in values]
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return _constructor(annotation)
+        if issubclass(annotation, Enum):
+            return annotation
+        if issubclass(annotation, datetime):
+            return datetime.fromisoformat
+        if issubclass(annotation, date):
+            return date.fromisoformat
+        if annotation in (str, int, float, bool):
+            return _identity
+        return annotation  # e.g. HttpUrl: rebuild from its string form
+    return _identity
+
+
+@lru_cache(maxsize=None)
+def _constructor(model):
+    """
+    Like model_construct, but nested models, enums and dates are rebuilt too
+    and complete payloads skip model_construct's per-field default handling.
+    """
+    if issubclass(model, RootModel):
+        convert = _converter(model.model_fields["root"].annotation)
+        return lambda data: model.model_construct(convert(data))
+
+    converters = [
+        (name, None if convert is _identity else convert)
+        for name, convert in (
+            (name, _converter(field.annotation))
+            for name, field in model.model_fields.items()
+        )
+    ]
+    fields_set = set(model.model_fields)
+    new, setattr_ = object.__new__, object.__setattr__
+
+    def build(data):
+        try:
+            values = {
+                name: data[name] if convert is None else convert(data[name])
+                for name, convert in converters
+            }
+        except KeyError:  # dumped with exclude_defaults or similar
+            values = {
+                name: data[name] if convert is None else convert(data[name])
+                for name, convert in converters
+                if name in data
+            }
+            return model.model_construct(**values)
+        obj = new(model)
+        setattr_(obj, "__dict__", values)
+        setattr_(obj, "__pydantic_fields_set__", fields_set)
+        setattr_(obj, "__pydantic_extra__", None)
+        setattr_(obj, "__pydantic_private__", None)
+        return obj
+
+    return build
+
+
+if __name__ == "__main__":
+    # Benchmark: reload 50,000 stored evaluations.
+    import time
+
+    from pacapicks.ai.assessment_schema import StockEvaluation
+
+    N = 50_000
+    trends = ["uptrend", "downtrend", "sideways"]
+
+    def evaluation(i):
+        return StockEvaluation.model_validate(
+            {
+                "ticker": f"T{i:05d}",
+                "as_of": "2025-06-02",
+                "fundamentals": {"revenue_yoy_pct_q": i % 80, "pe_ttm": 12.5},
+                "catalysts": {"next_earnings_date": "2025-07-30"},
+                "technicals": {
+                    "price_trend": trends[i % 3],
+                    "support_levels": [9.5, 9.0],
+                    "beta_1y": 1.2,
+                },
+                "decision": {
+                    "recommendation": "buy",
+                    "entry_price": 10.0,
+                    "stop_price": 9.0,
+                    "target_price": 12.0,
+                    "conviction_1to5": 1 + i % 5,
+                },
+                "quick_summary": "Breakout on volume after earnings beat.",
+            }
+        )
+
+    texts = [evaluation(i).model_dump_json() for i in range(N)]
+    stamped = dump_stamped(StockEvaluation, (evaluation(i) for i in range(N)))
+    sample = evaluation(123)
+
+    def timed(label, fn):
+        gc.collect()  # don't bill one run for the previous run's garbage
+        start = time.perf_counter()
+        result = fn()
+        print(f"  {label:<28} {time.perf_counter() - start:6.2f} s")
+        return result
+
+    print(f"{N} evaluations:")
+    loop = timed(
+        "model_validate_json loop",
+        lambda: [StockEvaluation.model_validate_json(t) for t in texts],
+    )
+    assert loop[123] == sample
+    del loop
+    bulk = timed(
+        "validate_json_many", lambda: validate_json_many(StockEvaluation, texts)
+    )
+    assert bulk.items[123] == sample and not bulk.errors
+    del bulk
+
+    def lazy_read(count):
+        result = load_stamped(StockEvaluation, stamped)
+        return [result.items[i].decision.conviction_1to5 for i in range(count)]
+
+    timed("load_stamped, read 100", lambda: lazy_read(100))
+    timed("load_stamped, read all", lambda: lazy_read(N))
+    lazy = load_stamped(StockEvaluation, stamped)
+    assert lazy.items[123].model_dump() == sample.model_dump()
+
+    bad = texts[:1000] + ['{"ticker": "X", "decision": {"conviction_1to5": 9}}', "{"]
+    result = validate_json_many(StockEvaluation, bad)
+    print(f"bad batch: {len(result.valid)} valid, errors at {sorted(result.errors)}")
@@ -1,15 +1,10 @@
-import requests
 from pacapicks import config
+from pacapicks.io.accounts import client_for
 
 
-def get_account():
-    r = requests.get(
-        f"{config.ALPACA_BASE_URL}/v2/account",
-        headers=config.ALPACA_HEADERS,
-        timeout=10,
-    )
-    r.raise_for_status()
-    return r.json()
+def get_account(account=None):
+    """Alpaca account details for `account` (a registry name; None = the default)."""
+    return client_for(account).get_account()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,590 @@
+"""
+Trade approvals: proposed orders wait here until someone clicks a link and
+confirms it (opening a link changes nothing, so prefetchers are harmless).
+
+    links = propose_orders(rebalance(...).orders)   # email these
+    create_app().run(threaded=True)                 # serve the clicks
+
+Each link carries an HMAC-signed token computed when the order is proposed,
+so a click is checked without touching the database; the order itself comes
+from an in-memory index written through to SQLite. Approved orders are
+coalesced for a few milliseconds and submitted as one pipelined batch, each
+with a client_order_id fixed at proposal time, so a retry (or a second click)
+can never place an order twice. Approved orders a crashed process never
+settled are resubmitted when the app starts, under the same guarantee.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Dict, List, NamedTuple, Optional
+
+import requests
+
+from pacapicks import config
+from pacapicks.io.accounts import client_for
+from pacapicks.io.cache import _SQLiteCache
+
+APPROVAL_TTL = 24 * 3600
+BATCH_WINDOW = 0.01  # seconds an approval waits for others to share its batch
+MAX_BATCH = 50
+MAX_IN_FLIGHT = 16
+SUBMIT_ATTEMPTS = 3
+CLICK_WAIT = 10.0  # seconds a click waits for its submission before a 202
+
+PENDING = "pending"
+APPROVED = "approved"  # clicked, being submitted
+SUBMITTED = "submitted"
+FAILED = "failed"
+REJECTED = "rejected"
+EXPIRED = "expired"
+ACTIONS = ("approve", "reject")
+
+_APPROVALS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS approvals (
+    id TEXT PRIMARY KEY,
+    account TEXT,
+    order_json TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    tokens TEXT NOT NULL,
+    result TEXT,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS approvals_status ON approvals (status, expires_at);
+"""
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+# ---------- Tokens ----------
+
+_process_secret = None
+
+
+def _secret(secret=None) -> bytes:
+    global _process_secret
+    secret = secret or config.APPROVAL_SECRET
+    if secret:
+        return secret.encode() if isinstance(secret, str) else secret
+    # Without a configured key, links only survive as long as this process.
+    if _process_secret is None:
+        _process_secret = secrets.token_bytes(32)
+    return _process_secret
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def sign(order_id, action, expires_at, secret=None) -> str:
+    body = f"{order_id}:{action}:{int(expires_at)}".encode()
+    mac = hmac.new(_secret(secret), body, hashlib.sha256).digest()[:16]
+    return f"{_b64(body)}.{_b64(mac)}"
+
+
+def verify(token, secret=None, now=None):
+    """
+    Check a token's signature and expiry.
+    Returns:
+        tuple: (order_id, action)
+    Raises:
+        InvalidToken: forged, malformed or expired.
+    """
+    try:
+        body_b64, mac_b64 = token.split(".")
+        body, mac = _unb64(body_b64), _unb64(mac_b64)
+        order_id, action, expires_at = body.decode().split(":")
+        expires_at = int(expires_at)
+    except ValueError:
+        raise InvalidToken("malformed approval token") from None
+    expected = hmac.new(_secret(secret), body, hashlib.sha256).digest()[:16]
+    if not hmac.compare_digest(mac, expected):
+        raise InvalidToken("bad approval token signature")
+    if (now or time.time()) > expires_at:
+        raise InvalidToken("approval link has expired")
+    return order_id, action
+
+
+# ---------- Store ----------
+
+
+class PendingOrder(NamedTuple):
+    id: str
+    account: Optional[str]  # registry name; None = the default account
+    order: dict  # place_order keyword arguments
+    status: str
+    created_at: float
+    expires_at: float
+    tokens: Dict[str, str]  # action -> signed token
+    result: Optional[dict] = None  # order JSON, or {"error": ...}
+
+    @property
+    def client_order_id(self) -> str:
+        return f"pacapicks-{self.id}"
+
+    def public(self) -> dict:
+        """JSON view without the tokens."""
+        return {
+            "id": self.id,
+            "account": self.account,
+            "order": self.order,
+            "status": self.status,
+            "client_order_id": self.client_order_id,
+            "result": self.result,
+        }
+
+
+class ApprovalStore(_SQLiteCache):
+    """
+    Proposed orders and their approval state.
+
+    Open orders (pending or mid-submission) are indexed in memory by id, so a
+    click costs a dict lookup; every change is written through to SQLite so
+    a restart reloads them. Status changes are compare-and-set under one lock,
+    which is what makes a double click submit only once.
+    """
+
+    table = "approvals"
+    schema = _APPROVALS_SCHEMA
+
+    def __init__(self, path=None, secret=None, ttl=APPROVAL_TTL):
+        super().__init__(
+            path or os.path.join(config.DATA_DIR, "approvals.sqlite"), max_entries=0
+        )
+        self.secret = secret
+        self.ttl = ttl
+        self._index: Optional[Dict[str, PendingOrder]] = None
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_index"] = None
+        return state
+
+    def _open(self) -> Dict[str, PendingOrder]:
+        # Caller holds self._lock.
+        if self._index is None:
+            rows = self._db().execute(
+                "SELECT id, account, order_json, status, created_at, expires_at, "
+                "tokens, result FROM approvals WHERE status IN (?, ?)",
+                (PENDING, APPROVED),
+            )
+            self._index = {row[0]: self._from_row(row) for row in rows}
+        return self._index
+
+    @staticmethod
+    def _from_row(row):
+        id_, account, order, status, created, expires, tokens, result = row
+        return PendingOrder(
+            id_,
+            account,
+            json.loads(order),
+            status,
+            created,
+            expires,
+            json.loads(tokens),
+            json.loads(result) if result else None,
+        )
+
+    def _write(self, db, p: PendingOrder):
+        db.execute(
+            "INSERT OR REPLACE INTO approvals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                p.id,
+                p.account,
+                json.dumps(p.order),
+                p.status,
+                p.created_at,
+                p.expires_at,
+                json.dumps(p.tokens),
+                json.dumps(p.result) if p.result is not None else None,
+                time.time(),
+            ),
+        )
+
+    def propose(self, orders: List[dict], account=None) -> List[PendingOrder]:
+        """Register orders awaiting approval; tokens are signed here, once."""
+        now = time.time()
+        expires_at = now + self.ttl
+        proposed = []
+        for order in orders:
+            order_id = secrets.token_hex(8)
+            tokens = {
+                action: sign(order_id, action, expires_at, self.secret)
+                for action in ACTIONS
+            }
+            proposed.append(
+                PendingOrder(
+                    order_id, account, dict(order), PENDING, now, expires_at, tokens
+                )
+            )
+        with self._lock:
+            index, db = self._open(), self._db()
+            for p in proposed:
+                index[p.id] = p
+                self._write(db, p)
+            db.commit()
+        return proposed
+
+    def verify(self, token):
+        return verify(token, self.secret)
+
+    def get(self, order_id) -> Optional[PendingOrder]:
+        with self._lock:
+            found = self._open().get(order_id)
+            if found is not None:
+                return found
+            row = (
+                self._db()
+                .execute(
+                    "SELECT id, account, order_json, status, created_at, expires_at, "
+                    "tokens, result FROM approvals WHERE id = ?",
+                    (order_id,),
+                )
+                .fetchone()
+            )
+        return self._from_row(row) if row else None
+
+    def transition(self, order_id, expected, status, result=None):
+        """
+        Move an open order from `expected` to `status`. A pending order past
+        its expiry is marked EXPIRED instead.
+        Returns:
+            PendingOrder: the updated order, or None if `status` wasn't
+            applied (already handled, expired, or unknown).
+        """
+        with self._lock:
+            index = self._open()
+            current = index.get(order_id)
+            if current is None or current.status != expected:
+                return None
+            if expected == PENDING and time.time() > current.expires_at:
+                updated = current._replace(status=EXPIRED, result=None)
+            else:
+                updated = current._replace(status=status, result=result)
+            if updated.status in (PENDING, APPROVED):
+                index[order_id] = updated
+            else:
+                del index[order_id]
+            db = self._db()
+            self._write(db, updated)
+            db.commit()
+        return updated if updated.status == status else None
+
+    def pending(self) -> List[PendingOrder]:
+        with self._lock:
+            return [p for p in self._open().values() if p.status == PENDING]
+
+    def approved(self) -> List[PendingOrder]:
+        """Orders clicked but not yet settled, e.g. by a process that died."""
+        with self._lock:
+            return [p for p in self._open().values() if p.status == APPROVED]
+
+    def links(self, p: PendingOrder, base_url=None) -> Dict[str, str]:
+        base = (base_url or config.APP_BASE_URL or "").rstrip("/")
+        return {f"{a}_url": f"{base}/{a}/{p.tokens[a]}" for a in ACTIONS}
+
+
+# ---------- Submission ----------
+
+
+def submit_order(client, order, attempts=SUBMIT_ATTEMPTS):
+    """
+    place_order that is safe to retry. `order` must carry a client_order_id:
+    after any failure that might have reached Alpaca (5xx, dropped
+    connection, duplicate id) the order is looked up by that id before it is
+    sent again.
+    """
+    error = None
+    for _ in range(attempts):
+        try:
+            return client.place_order(**order)
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else 0
+            if status < 500 and status != 422:
+                raise
+            error = e
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        existing = client.get_order_by_client_id(order["client_order_id"])
+        if existing is not None:
+            return existing
+        if isinstance(error, requests.HTTPError) and error.response.status_code == 422:
+            raise error  # rejected on its merits, not a duplicate
+    raise error
+
+
+class OrderBatcher:
+    """
+    Coalesces approvals that arrive within `window` seconds (up to
+    `max_batch`) and submits them together on a persistent pool, so a burst
+    of clicks becomes one pipelined batch per account.
+    """
+
+    def __init__(
+        self,
+        store: ApprovalStore,
+        window=BATCH_WINDOW,
+        max_batch=MAX_BATCH,
+        max_in_flight=MAX_IN_FLIGHT,
+        clients=client_for,
+    ):
+        self.store = store
+        self.window = window
+        self.max_batch = max_batch
+        self.clients = clients
+        self.batches = 0
+        self._queue = []
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._thread = None
+
+    def resume(self) -> List[Future]:
+        """
+        Re-queue every APPROVED order left by a previous process. Safe even
+        if it reached Alpaca before the crash: submit_order finds it by its
+        client_order_id instead of placing it again.
+        """
+        return [self.submit(p) for p in self.store.approved()]
+
+    def submit(self, p: PendingOrder) -> Future:
+        """Queue an approved order; the future resolves to its final state."""
+        future = Future()
+        with self._cond:
+            self._queue.append((p, future))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.window
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._queue[: self.max_batch]
+                self._queue = self._queue[self.max_batch :]
+            self.batches += 1
+            self._flush(batch)
+
+    def _flush(self, batch):
+        # Don't wait on the batch: results land via callbacks, so one slow or
+        # retried order never holds up the next batch.
+        for p, future in batch:
+            submission = self._pool.submit(
+                submit_order,
+                self.clients(p.account),
+                {**p.order, "client_order_id": p.client_order_id},
+            )
+            submission.add_done_callback(
+                lambda s, p=p, future=future: self._settle(p, future, s)
+            )
+
+    def _settle(self, p, future, submission):
+        try:
+            status, result = SUBMITTED, submission.result()
+        except Exception as e:
+            status, result = FAILED, {"error": f"{type(e).__name__}: {e}"}
+        settled = self.store.transition(p.id, APPROVED, status, result)
+        # None if something else settled it first; report what it ended as.
+        future.set_result(settled or self.store.get(p.id))
+
+
+# ---------- Web app ----------
+
+_CONFIRM_PAGE = """<!doctype html>
+<title>{{ action | capitalize }} order</title>
+<p>{{ p.order.side }} {{ p.order.qty }} {{ p.order.symbol }}
+{% if p.account %}({{ p.account }}){% endif %} &mdash; {{ p.status }}</p>
+{% if p.status == "pending" %}
+<form method="post"><button type="submit">{{ action | capitalize }}</button></form>
+{% endif %}
+"""
+
+_default_store = None
+
+
+def default_store() -> ApprovalStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = ApprovalStore()
+    return _default_store
+
+
+def propose_orders(orders, account=None, store=None, base_url=None) -> List[dict]:
+    """
+    Register orders for approval.
+    Returns:
+        list[dict]: per order, its id, the order and approve_url/reject_url.
+    """
+    store = store or default_store()
+    return [
+        {"id": p.id, "order": p.order, **store.links(p, base_url)}
+        for p in store.propose(orders, account)
+    ]
+
+
+def create_app(store=None, batcher=None, click_wait=CLICK_WAIT):
+    """
+    Flask app for the approval links.
+
+    GET /approve/<token> and GET /reject/<token> (what an email link opens)
+    only show the order with a confirm button: mail scanners and link
+    prefetchers fetch those URLs on their own. The button POSTs to the same
+    URL, which is what changes the order; an approval answers once the order
+    is submitted, or with a 202 after `click_wait` seconds. GET
+    /orders/pending needs "Authorization: Bearer <approval secret>" and is
+    disabled when no secret is configured. Approved orders left over from a
+    previous run are resubmitted on startup.
+    """
+    from flask import Flask, jsonify, render_template_string, request
+
+    store = store or default_store()
+    batcher = batcher or OrderBatcher(store)
+    batcher.resume()  # clicks a previous process accepted but never settled
+    app = Flask(__name__)
+
+    def checked(token, action):
+        order_id, token_action = store.verify(token)
+        if token_action != action:
+            raise InvalidToken(f"token is for {token_action}, not {action}")
+        return order_id
+
+    def current(order_id):
+        found = store.get(order_id)
+        if found is None:
+            return jsonify(error="unknown order"), 404
+        return jsonify(found.public()), 200
+
+    @app.errorhandler(InvalidToken)
+    def invalid(e):
+        return jsonify(error=str(e)), 403
+
+    def confirm(token, action):
+        found = store.get(checked(token, action))
+        if found is None:
+            return jsonify(error="unknown order"), 404
+        return render_template_string(_CONFIRM_PAGE, action=action, p=found)
+
+    @app.get("/approve/<token>")
+    def approve_page(token):
+        return confirm(token, "approve")
+
+    @app.get("/reject/<token>")
+    def reject_page(token):
+        return confirm(token, "reject")
+
+    @app.post("/approve/<token>")
+    def approve(token):
+        order_id = checked(token, "approve")
+        approved = store.transition(order_id, PENDING, APPROVED)
+        if approved is None:  # second click, rejected or expired
+            return current(order_id)
+        try:
+            done = batcher.submit(approved).result(click_wait)
+        except FuturesTimeout:
+            return jsonify(approved.public()), 202
+        return jsonify(done.public()), 200 if done.status == SUBMITTED else 502
+
+    @app.post("/reject/<token>")
+    def reject(token):
+        order_id = checked(token, "reject")
+        store.transition(order_id, PENDING, REJECTED)
+        return current(order_id)
+
+    @app.get("/orders/pending")
+    def pending():
+        secret = store.secret or config.APPROVAL_SECRET
+        given = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not secret or not hmac.compare_digest(given.encode(), _secret(secret)):
+            return jsonify(error="forbidden"), 403
+        return jsonify([p.public() for p in store.pending()])
+
+    return app
+
+
+if __name__ == "__main__":
+    # Benchmark: p50/p99 click-to-submit for bursts of approval clicks against
+    # the local Alpaca stand-in, with and without coalescing.
+    import logging
+    import statistics
+    import tempfile
+
+    from werkzeug.serving import make_server
+
+    from pacapicks.bench.fakes import StubServer, alpaca_routes
+    from pacapicks.io.alpaca import AlpacaClient
+
+    N_ORDERS, CLICKERS, LATENCY, ERROR_RATE = 400, 32, 0.02, 0.05
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    def run(window):
+        with tempfile.TemporaryDirectory() as tmp, StubServer(
+            alpaca_routes(0), LATENCY, ERROR_RATE
+        ) as stub:
+            client = AlpacaClient(
+                base_url=stub.url, headers={}, requests_per_minute=1e6
+            )
+            store = ApprovalStore(os.path.join(tmp, "approvals.sqlite"), "bench")
+            batcher = OrderBatcher(store, window=window, clients=lambda _: client)
+            server = make_server(
+                "127.0.0.1", 0, create_app(store, batcher), threaded=True
+            )
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            base = f"http://127.0.0.1:{server.server_port}"
+            orders = [
+                {"symbol": f"T{i:04d}", "qty": 1, "side": "buy"}
+                for i in range(N_ORDERS)
+            ]
+            links = propose_orders(orders, store=store, base_url=base)
+            # Every tenth link is clicked twice, concurrently.
+            clicks = [l["approve_url"] for l in links]
+            clicks += clicks[::10]
+            local = threading.local()
+
+            def click(url):
+                session = getattr(local, "session", None)
+                if session is None:
+                    session = local.session = requests.Session()
+                start = time.perf_counter()
+                r = session.post(url, timeout=30)
+                return time.perf_counter() - start, r.status_code, r.json()
+
+            with ThreadPoolExecutor(CLICKERS) as pool:
+                results = list(pool.map(click, clicks))
+            server.shutdown()
+
+        latencies = sorted(r[0] for r in results)
+        submitted = {r[2]["id"] for r in results if r[2].get("status") == SUBMITTED}
+        p99 = latencies[int(0.99 * (len(latencies) - 1))]
+        print(
+            f"window {window * 1e3:4.0f} ms: p50 {statistics.median(latencies) * 1e3:6.1f}"
+            f" ms, p99 {p99 * 1e3:6.1f} ms, {batcher.batches} batches, "
+            f"{len(submitted)}/{N_ORDERS} submitted, {stub.errors} injected errors"
+        )
+        posts = stub.requests  # includes retries and client_order_id lookups
+        return posts
+
+    for window in (0.0, BATCH_WINDOW):
+        run(window)
@@ -0,0 +1,600 @@
+"""
+Local stand-ins for Alpaca, FMP, yfinance and OpenAI.
+
+HTTP services run as real servers on 127.0.0.1 so connection pooling, retries
+and rate limiting are exercised end to end; yfinance and OpenAI are replaced
+by in-process fakes with the same call surface. Every fake takes a latency
+(seconds, +/-50% jitter) and an error rate, and counts the requests it served.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+
+def _jitter(latency, rng):
+    return latency * rng.uniform(0.5, 1.5) if latency else 0.0
+
+
+class StubServer:
+    """
+    Threaded HTTP/1.1 server dispatching to route handlers.
+
+    `routes` is a list of (method, path_prefix, handler); a handler gets
+    (path, query, body) and returns (status, json_body). With probability
+    `error_rate` a request gets a 500 (or a 429 with Retry-After) instead.
+    """
+
+    def __init__(self, routes, latency=0.0, error_rate=0.0, seed=0):
+        self.routes = routes
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def _dispatch(self, method, raw_path, body):
+        parsed = urlparse(raw_path)
+        with self._lock:
+            self.requests += 1
+            delay = _jitter(self.latency, self._rng)
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        time.sleep(delay)
+        if fail:
+            if self._rng.random() < 0.5:
+                return 429, {"message": "rate limit exceeded"}, {"Retry-After": "0.05"}
+            return 500, {"message": "internal error"}, {}
+        for route_method, prefix, handler in self.routes:
+            if route_method == method and parsed.path.startswith(prefix):
+                status, payload = handler(parsed.path, parse_qs(parsed.query), body)
+                return status, payload, {}
+        return 404, {"message": "not found"}, {}
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _respond(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                status, payload, headers = stub._dispatch(method, self.path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def symbols(n):
+    return [f"T{i:04d}" for i in range(n)]
+
+
+# ---------- Alpaca ----------
+
+
+def alpaca_routes(n_positions=10, seed=0):
+    rng = random.Random(seed)
+    positions = [
+        {
+            "symbol": s,
+            "qty": str(rng.randint(1, 500)),
+            "avg_entry_price": f"{rng.uniform(2, 80):.2f}",
+            "unrealized_pl": f"{rng.uniform(-500, 500):.2f}",
+            "unrealized_intraday_plpc": f"{rng.uniform(-0.05, 0.05):.4f}",
+        }
+        for s in symbols(n_positions)
+    ]
+    account = {
+        "id": "stub-account",
+        "status": "ACTIVE",
+        "cash": "25000.00",
+        "portfolio_value": "100000.00",
+        "buying_power": "50000.00",
+    }
+    orders = {}  # by client_order_id
+    by_id = {}
+    counter = iter(range(1, 1 << 62))
+    lock = threading.Lock()
+
+    def post_order(path, query, body):
+        with lock:
+            client_id = body.get("client_order_id")
+            if client_id and client_id in orders:
+                return 422, {"message": "client_order_id must be unique"}
+            order = {
+                "id": f"order-{next(counter)}",
+                "status": "accepted",
+                "submitted_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                **body,
+            }
+            if client_id:
+                orders[client_id] = order
+            by_id[order["id"]] = order
+        return 200, order
+
+    def get_order(path, query, body):
+        order = by_id.get(path.rsplit("/", 1)[-1])
+        if order is None:
+            return 404, {"message": "order not found"}
+        order["status"] = "filled"  # market orders fill by the first poll
+        return 200, order
+
+    def order_by_client_id(path, query, body):
+        order = orders.get(query.get("client_order_id", [""])[0])
+        return (200, order) if order else (404, {"message": "order not found"})
+
+    return [
+        ("GET", "/v2/positions", lambda *a: (200, positions)),
+        ("GET", "/v2/account", lambda *a: (200, account)),
+        ("GET", "/v2/orders:by_client_order_id", order_by_client_id),
+        ("GET", "/v2/orders/", get_order),
+        ("POST", "/v2/orders", post_order),
+    ]
+
+
+# ---------- FMP ----------
+
+
+def fmp_routes():
+    def income(path, query, body):
+        quarters = [date(2025, 6, 30) - timedelta(days=91 * i) for i in range(8)]
+        return 200, [
+            {
+                "date": q.isoformat(),
+                "revenue": 1e8 * (1.1 - 0.01 * i),
+                "operatingIncome": 1.2e7,
+            }
+            for i, q in enumerate(quarters)
+        ]
+
+    return [
+        ("GET", "/income-statement/", income),
+        (
+            "GET",
+            "/balance-sheet-statement/",
+            lambda *a: (200, [{"cashAndCashEquivalents": 5e8, "totalDebt": 2e8}]),
+        ),
+        ("GET", "/quote/", lambda *a: (200, [{"marketCap": 1.2e10, "pe": 18.5}])),
+    ]
+
+
+# ---------- Alpaca market-data stream ----------
+
+
+class FakePriceStream:
+    """
+    Websocket stand-in for Alpaca's market-data stream: sends "connected",
+    accepts any auth, records subscribe actions, and broadcasts whatever is
+    `push`ed to every client. `drop()` closes open connections so reconnects
+    can be exercised.
+    """
+
+    def __init__(self):
+        self.subscribed = set()
+        self.subscriptions = []  # one symbol list per subscribe action
+        self.connections = 0
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._loop = None
+        self._stop = None
+        self._thread = None
+        self._port = None
+
+    @property
+    def url(self):
+        return f"ws://127.0.0.1:{self._port}"
+
+    async def _session(self, ws):
+        await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+        await ws.recv()
+        await ws.send(json.dumps([{"T": "success", "msg": "authenticated"}]))
+        with self._lock:
+            self.connections += 1
+        self._clients.add(ws)
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg.get("action") == "subscribe":
+                    with self._lock:
+                        self.subscriptions.append(msg["trades"])
+                        self.subscribed.update(msg["trades"])
+        except Exception:
+            pass
+        finally:
+            self._clients.discard(ws)
+
+    async def _serve(self, ready):
+        from websockets.asyncio.server import serve
+
+        self._stop = asyncio.Event()
+        async with serve(self._session, "127.0.0.1", 0) as server:
+            self._port = server.sockets[0].getsockname()[1]
+            ready.set()
+            await self._stop.wait()
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(5)
+
+    def push(self, messages):
+        """Send one frame (a list of stream messages) to every client."""
+        data = json.dumps(messages)
+
+        async def send():
+            for ws in list(self._clients):
+                await ws.send(data)
+
+        self._call(send())
+
+    def drop(self):
+        async def close():
+            for ws in list(self._clients):
+                await ws.close()
+
+        self._call(close())
+
+    def start(self):
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_until_complete,
+            args=(self._serve(ready),),
+            daemon=True,
+        )
+        self._thread.start()
+        ready.wait(5)
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+            self._thread.join(5)
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ---------- yfinance ----------
+
+PERIOD_DAYS = {"5d": 5, "1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504}
+HISTORY_DAYS = 504
+
+
+class FakeYFinance:
+    """Drop-in for the parts of the `yfinance` module pacapicks uses."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self.moves = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _call(self):
+        with self._lock:
+            self.requests += 1
+            delay = _jitter(self.latency, self._rng)
+            fail = self._rng.random() < self.error_rate
+            self.errors += fail
+        time.sleep(delay)
+        if fail:
+            raise ConnectionError("fake yfinance: request failed")
+
+    def _price(self, symbol):
+        base = 5.0 + (zlib.crc32(symbol.encode()) % 9500) / 100.0
+        return base * self.moves.get(symbol, 1.0)
+
+    def move(self, symbol, pct):
+        """Shift `symbol`'s whole price path by `pct` percent from now on."""
+        self.moves[symbol] = self.moves.get(symbol, 1.0) * (1 + pct / 100.0)
+
+    def _closes(self, symbol, n):
+        # A fixed per-symbol random walk ending at the current price.
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        walk = np.cumprod(1 + rng.normal(0.0005, 0.015, max(n, HISTORY_DAYS)))
+        return (self._price(symbol) * walk / walk[-1])[-n:]
+
+    def download(
+        self, tickers, period="5d", interval="1d", start=None, end=None, **kwargs
+    ):
+        self._call()
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        n = HISTORY_DAYS if start else PERIOD_DAYS.get(period, 5)
+        idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n)
+        closes = np.column_stack([self._closes(t, n) for t in tickers])
+        if start:
+            # start/end (end exclusive) select from the same fixed price path.
+            keep = (idx >= pd.Timestamp(start)) & (
+                idx < pd.Timestamp(end) if end else True
+            )
+            idx, closes = idx[keep], closes[keep]
+        frames = {
+            field: pd.DataFrame(closes * factor, index=idx, columns=tickers)
+            for field, factor in (
+                ("Open", 0.99),
+                ("High", 1.01),
+                ("Low", 0.98),
+                ("Close", 1.0),
+            )
+        }
+        frames["Volume"] = pd.DataFrame(1e6, index=idx, columns=tickers)
+        return pd.concat(frames, axis=1, names=["Price", "Ticker"])
+
+    def Ticker(self, symbol):
+        fake = self
+        price = self._price(symbol)
+
+        class _Ticker:
+            @property
+            def fast_info(self):
+                fake._call()
+                return SimpleNamespace(last_price=price, previous_close=price * 0.99)
+
+            @property
+            def info(self):
+                fake._call()
+                return {
+                    "totalRevenue": 4.2e8,
+                    "operatingMargins": 0.12,
+                    "trailingPE": 18.5,
+                    "priceToSalesTrailing12Months": 2.1,
+                    "cash": 5e8,
+                    "totalDebt": 2e8,
+                    "marketCap": 1.2e10,
+                }
+
+            @property
+            def quarterly_financials(self):
+                fake._call()
+                cols = pd.DatetimeIndex(
+                    [
+                        pd.Timestamp(2025, 6, 30) - pd.DateOffset(months=3 * i)
+                        for i in range(6)
+                    ]
+                )
+                return pd.DataFrame(
+                    [[1e8 * (1.1 - 0.02 * i) for i in range(6)]],
+                    index=["Total Revenue"],
+                    columns=cols,
+                )
+
+        return _Ticker()
+
+
+@contextmanager
+def patched_yfinance(fake):
+    """Point every pacapicks module that imported yfinance at `fake`."""
+    from pacapicks import market_data
+    from pacapicks.io import bars
+    from pacapicks.jobs import fundamentals
+
+    modules = [market_data, fundamentals, bars]
+    originals = [m.yf for m in modules]
+    for m in modules:
+        m.yf = fake
+    try:
+        yield fake
+    finally:
+        for m, original in zip(modules, originals):
+            m.yf = original
+
+
+# ---------- OpenAI ----------
+
+
+def _fake_picks(n):
+    today = date.today().isoformat()
+    return [
+        {
+            "ticker": s,
+            "recommendation": "buy",
+            "conviction_score": 1 + i % 5,
+            "catalyst": {
+                "type": "earnings",
+                "summary": "Beat and raise",
+                "status": "new",
+                "source_url": "https://example.com/news",
+                "date": today,
+            },
+            "reasoning": "Fresh catalyst with follow-through.",
+            "as_of_date": today,
+        }
+        for i, s in enumerate(symbols(n))
+    ]
+
+
+def fake_evaluation(request):
+    """FakeOpenAI `output` that answers a stock_evaluation prompt."""
+    prompt = request["input"][0]["content"]
+    ticker = prompt.split("Evaluate ", 1)[1].split(" ", 1)[0]
+    as_of = date.fromisoformat(prompt.split(" as of ", 1)[1][:10])
+    h = zlib.crc32(ticker.encode())
+    return json.dumps(
+        {
+            "ticker": ticker,
+            "as_of": as_of.isoformat(),
+            "catalysts": {
+                "next_earnings_date": (as_of + timedelta(days=1 + h % 90)).isoformat()
+            },
+            "decision": {
+                "recommendation": ("buy", "hold", "watch")[h % 3],
+                "conviction_1to5": 1 + h % 5,
+            },
+            "quick_summary": "Stub evaluation.",
+        }
+    )
+
+
+TTFT_SHARE = 0.1  # of a streamed response's latency spent before the first token
+
+
+class FakeOpenAI:
+    """Sync + async stand-in exposing `responses.create` with realistic usage."""
+
+    def __init__(
+        self,
+        latency=0.0,
+        error_rate=0.0,
+        n_picks=5,
+        output=None,
+        seed=0,
+        chunk_chars=16,
+    ):
+        self.latency = latency
+        self.chunk_chars = chunk_chars
+        self.error_rate = error_rate
+        self.n_picks = n_picks
+        self.output = output
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.responses = SimpleNamespace(create=self._create)
+
+    def _response(self, request):
+        from openai.types.responses import Response
+
+        text = (
+            self.output(request)
+            if self.output
+            else json.dumps(_fake_picks(self.n_picks))
+        )
+        prompt = json.dumps(request.get("input"))
+        return Response.model_validate(
+            {
+                "id": f"resp-{self.requests}",
+                "object": "response",
+                "created_at": time.time(),
+                "model": request.get("model", "gpt-4o"),
+                "output": [
+                    {
+                        "type": "message",
+                        "id": "msg",
+                        "role": "assistant",
+                        "status": "completed",
+                        "content": [
+                            {"type": "output_text", "text": text, "annotations": []}
+                        ],
+                    }
+                ],
+                "parallel_tool_calls": True,
+                "tool_choice": "auto",
+                "tools": [],
+                "usage": {
+                    "input_tokens": len(prompt) // 4,
+                    "input_tokens_details": {
+                        "cached_tokens": 0,
+                        "cache_write_tokens": 0,
+                    },
+                    "output_tokens": len(text) // 4,
+                    "output_tokens_details": {"reasoning_tokens": 0},
+                    "total_tokens": (len(prompt) + len(text)) // 4,
+                },
+            }
+        )
+
+    def _create(self, **request):
+        with self._lock:
+            self.requests += 1
+            delay = _jitter(self.latency, self._rng)
+            fail = self._rng.random() < self.error_rate
+            self.errors += fail
+        if request.pop("stream", False):
+            if fail:
+                time.sleep(delay * TTFT_SHARE)
+                raise ConnectionError("fake openai: request failed")
+            return self._stream(request, delay)
+        time.sleep(delay)
+        if fail:
+            raise ConnectionError("fake openai: request failed")
+        return self._response(request)
+
+    def _stream(self, request, delay):
+        """
+        Responses API stream events: the first delta after TTFT_SHARE of
+        `delay`, the rest paced evenly so the last lands at `delay`.
+        """
+        response = self._response(request)
+        text = response.output_text
+        step = self.chunk_chars
+        chunks = [text[i : i + step] for i in range(0, len(text), step)]
+        time.sleep(delay * TTFT_SHARE)
+        pace = delay * (1 - TTFT_SHARE) / max(len(chunks), 1)
+        for chunk in chunks:
+            yield SimpleNamespace(type="response.output_text.delta", delta=chunk)
+            time.sleep(pace)
+        yield SimpleNamespace(type="response.completed", response=response)
+
+    def as_async(self):
+        """An AsyncOpenAI-shaped view sharing this fake's counters."""
+        import asyncio
+
+        fake = self
+
+        async def create(**request):
+            with fake._lock:
+                fake.requests += 1
+                delay = _jitter(fake.latency, fake._rng)
+                fail = fake._rng.random() < fake.error_rate
+                fake.errors += fail
+            await asyncio.sleep(delay)
+            if fail:
+                raise ConnectionError("fake openai: request failed")
+            return fake._response(request)
+
+        return SimpleNamespace(responses=SimpleNamespace(create=create))
@@ -0,0 +1,361 @@
+"""
+End-to-end performance benchmarks against local stand-ins.
+
+    python -m pacapicks.bench.run --sizes 10 100 1000 --latency 0.02 --out bench.json
+
+Each scenario runs the real job code against the fakes in pacapicks.bench.fakes
+at every size, then once more under tracemalloc (with latency off) for peak
+memory. Results are printed or written as JSON so runs can be diffed release
+to release.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from pacapicks.bench.fakes import (
+    FakeOpenAI,
+    FakeYFinance,
+    StubServer,
+    alpaca_routes,
+    fmp_routes,
+    patched_yfinance,
+    symbols,
+)
+from pacapicks.io import alpaca
+from pacapicks.io.alpaca import AlpacaClient
+
+DEFAULT_SIZES = (10, 100, 1000)
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+@contextlib.contextmanager
+def _alpaca_stub(n, cfg):
+    with StubServer(alpaca_routes(n), cfg["latency"], cfg["error_rate"]) as stub:
+        alpaca.use_client(
+            AlpacaClient(
+                base_url=stub.url,
+                headers={},
+                requests_per_minute=cfg["alpaca_rpm"],
+                backoff_base=0.01,
+            )
+        )
+        try:
+            yield stub
+        finally:
+            alpaca.use_client(None)
+
+
+# ---------- Scenarios ----------
+# Each takes (size, cfg) and returns samples (seconds), items processed,
+# total elapsed seconds, and request/error counts seen by the fakes.
+
+
+def scenario_daily_review(n, cfg):
+    from pacapicks.jobs.daily_review import run_daily_review
+
+    fake_yf = FakeYFinance(cfg["latency"], cfg["error_rate"])
+    with _alpaca_stub(n, cfg) as stub, patched_yfinance(fake_yf):
+        samples = [_timed(run_daily_review)[0] for _ in range(cfg["repeats"])]
+    return {
+        "samples": samples,
+        "items": n * len(samples),
+        "elapsed": sum(samples),
+        "requests": stub.requests + fake_yf.requests,
+        "errors": stub.errors + fake_yf.errors,
+    }
+
+
+def scenario_daily_review_accounts(n, cfg):
+    from pacapicks.io.accounts import Account, AccountRegistry
+    from pacapicks.jobs.daily_review import run_daily_review_all
+
+    # n accounts holding overlapping books of 20 names on one stub server.
+    fake_yf = FakeYFinance(cfg["latency"], cfg["error_rate"])
+    with StubServer(alpaca_routes(20), cfg["latency"], cfg["error_rate"]) as stub:
+        registry = AccountRegistry(
+            Account(f"acct-{i}", None, None, stub.url) for i in range(n)
+        )
+        for name in registry:
+            registry.use_client(
+                name,
+                AlpacaClient(
+                    base_url=stub.url,
+                    headers={},
+                    requests_per_minute=cfg["alpaca_rpm"],
+                    backoff_base=0.01,
+                ),
+            )
+        with patched_yfinance(fake_yf):
+            samples = [
+                _timed(run_daily_review_all, registry=registry)[0]
+                for _ in range(cfg["repeats"])
+            ]
+    return {
+        "samples": samples,
+        "items": n * len(samples),
+        "elapsed": sum(samples),
+        "requests": stub.requests + fake_yf.requests,
+        "errors": stub.errors + fake_yf.errors,
+    }
+
+
+def scenario_fundamentals_yfinance(n, cfg):
+    from pacapicks.jobs.fundamentals import load_fundamentals_from_yfinance
+
+    fake_yf = FakeYFinance(cfg["latency"], cfg["error_rate"])
+    with patched_yfinance(fake_yf):
+        samples = [
+            _timed(load_fundamentals_from_yfinance, t, cache=False)[0]
+            for t in symbols(n)
+        ]
+    return {
+        "samples": samples,
+        "items": n,
+        "elapsed": sum(samples),
+        "requests": fake_yf.requests,
+        "errors": fake_yf.errors,
+    }
+
+
+def scenario_fundamentals_process_pool(n, cfg):
+    from pacapicks.jobs.fundamentals import load_fundamentals_many
+
+    # Workers are forked after the patch, so they inherit the fake.
+    fake_yf = FakeYFinance(cfg["latency"], cfg["error_rate"])
+    with patched_yfinance(fake_yf):
+        elapsed, rows = _timed(
+            load_fundamentals_many, symbols(n), workers=cfg["workers"], cache=False
+        )
+    return {
+        "samples": [elapsed],
+        "items": n,
+        "elapsed": elapsed,
+        # Request/error counts live in the worker processes; report failures.
+        "requests": None,
+        "errors": sum(row.error is not None for row in rows.values()),
+    }
+
+
+def scenario_fundamentals_fmp_bulk(n, cfg):
+    from pacapicks.io.endpoints import fetch_fundamentals_fmp_bulk
+
+    async def drain(url):
+        done = {}
+        start = time.perf_counter()
+        async for ticker, _ in fetch_fundamentals_fmp_bulk(
+            symbols(n), requests_per_minute=1e9, cache=False, base_url=url
+        ):
+            done[ticker] = time.perf_counter() - start
+        return done
+
+    with StubServer(fmp_routes(), cfg["latency"], cfg["error_rate"]) as stub:
+        elapsed, done = _timed(asyncio.run, drain(stub.url))
+    return {
+        "samples": list(done.values()),  # time-to-result per ticker
+        "items": n,
+        "elapsed": elapsed,
+        "requests": stub.requests,
+        "errors": stub.errors,
+    }
+
+
+def scenario_place_orders(n, cfg):
+    from pacapicks import broker
+
+    batch = [{"symbol": s, "qty": 1, "side": "buy"} for s in symbols(n)]
+    samples = []
+    with _alpaca_stub(0, cfg) as stub:
+        for _ in range(cfg["repeats"]):
+            samples.append(_timed(broker.place_orders, batch)[0])
+    return {
+        "samples": samples,
+        "items": n * len(samples),
+        "elapsed": sum(samples),
+        "requests": stub.requests,
+        "errors": stub.errors,
+    }
+
+
+def scenario_research_prompt(n, cfg):
+    from pacapicks.ai.openai_client import test_research_prompt
+
+    fake = FakeOpenAI(cfg["latency"], cfg["error_rate"], n_picks=n)
+    samples = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # the job writes research_output.json to the cwd
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(cfg["repeats"]):
+                    start = time.perf_counter()
+                    try:
+                        test_research_prompt(fake, False)
+                    except ConnectionError:
+                        pass  # injected failure; still a latency sample
+                    samples.append(time.perf_counter() - start)
+        finally:
+            os.chdir(cwd)
+    return {
+        "samples": samples,
+        "items": n * len(samples),
+        "elapsed": sum(samples),
+        "requests": fake.requests,
+        "errors": fake.errors,
+    }
+
+
+def scenario_research_stream(n, cfg):
+    from pacapicks.ai.streaming import PickStream, research_enriched
+
+    fake = FakeOpenAI(cfg["latency"], cfg["error_rate"], n_picks=n)
+    fake_yf = FakeYFinance(cfg["latency"], cfg["error_rate"])
+    samples = []
+    with patched_yfinance(fake_yf):
+        for _ in range(cfg["repeats"]):
+            stream = PickStream(fake, False, model="gpt-4o", input=[])
+            start = time.perf_counter()
+            try:
+                research_enriched(stream, fundamentals_cache=False)
+            except ConnectionError:
+                pass  # injected failure; still a latency sample
+            samples.append(time.perf_counter() - start)
+    return {
+        "samples": samples,
+        "items": n * len(samples),
+        "elapsed": sum(samples),
+        "requests": fake.requests + fake_yf.requests,
+        "errors": fake.errors + fake_yf.errors,
+    }
+
+
+SCENARIOS = {
+    "daily_review": scenario_daily_review,
+    "daily_review_accounts": scenario_daily_review_accounts,
+    "fundamentals_yfinance": scenario_fundamentals_yfinance,
+    "fundamentals_process_pool": scenario_fundamentals_process_pool,
+    "fundamentals_fmp_bulk": scenario_fundamentals_fmp_bulk,
+    "place_orders": scenario_place_orders,
+    "research_prompt": scenario_research_prompt,
+    "research_stream": scenario_research_stream,
+}
+
+
+# ---------- Harness ----------
+
+
+def _percentile(samples, pct):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+def _peak_memory_mb(fn, n, cfg):
+    quiet = {**cfg, "latency": 0.0, "error_rate": 0.0, "repeats": 1}
+    tracemalloc.start()
+    try:
+        fn(n, quiet)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1e6
+
+
+def run(
+    sizes=DEFAULT_SIZES,
+    scenarios=None,
+    latency=0.02,
+    error_rate=0.0,
+    repeats=3,
+    alpaca_rpm=1e6,
+    workers=None,
+):
+    """
+    Run the selected scenarios at each size.
+    Returns:
+        dict: {"meta": {...}, "results": [one record per scenario x size]}.
+    """
+    cfg = {
+        "latency": latency,
+        "error_rate": error_rate,
+        "repeats": repeats,
+        "alpaca_rpm": alpaca_rpm,
+        "workers": workers or os.cpu_count(),
+    }
+    results = []
+    for name in scenarios or SCENARIOS:
+        fn = SCENARIOS[name]
+        for n in sizes:
+            out = fn(n, cfg)
+            samples = out["samples"]
+            results.append(
+                {
+                    "scenario": name,
+                    "size": n,
+                    "samples": len(samples),
+                    "p50_ms": 1e3 * _percentile(samples, 50),
+                    "p95_ms": 1e3 * _percentile(samples, 95),
+                    "throughput_per_s": (
+                        out["items"] / out["elapsed"] if out["elapsed"] else None
+                    ),
+                    "requests": out["requests"],
+                    "injected_errors": out["errors"],
+                    "peak_mem_mb": _peak_memory_mb(fn, n, cfg),
+                }
+            )
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **cfg,
+        },
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--alpaca-rpm", type=float, default=1e6)
+    parser.add_argument("--workers", type=int, help="process-pool size")
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run(
+        sizes=args.sizes,
+        scenarios=args.scenarios,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        repeats=args.repeats,
+        alpaca_rpm=args.alpaca_rpm,
+        workers=args.workers,
+    )
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,10 @@
-import requests
-from pacapicks import config
+from pacapicks.io.accounts import client_for
+from pacapicks.io.alpaca import default_client
 
 
-def get_positions():
-    r = requests.get(
-        f"{config.ALPACA_BASE_URL}/v2/positions",
-        headers=config.ALPACA_HEADERS,
-        timeout=20,
-    )
-    r.raise_for_status()
-    return r.json()
+def get_positions(account=None):
+    """Open positions for `account` (a registry name; None = the default)."""
+    return client_for(account).get_positions()
 
 
 def place_order(symbol, qty, side, type="market", tif="day"):
@@ -24,21 +19,19 @@ def place_order(symbol, qty, side, type="market", tif="day"):
     Returns:
         dict: The JSON response from the API containing order details.
     """
-    payload = {
-        "symbol": symbol,
-        "qty": qty,
-        "side": side,
-        "type": type,
-        "time_in_force": tif,
-    }
-    r = requests.post(
-        f"{config.ALPACA_BASE_URL}/v2/orders",
-        json=payload,
-        headers=config.ALPACA_HEADERS,
-        timeout=20,
-    )
-    r.raise_for_status()
-    return r.json()
+    return default_client().place_order(symbol, qty, side, type=type, tif=tif)
+
+
+def place_orders(batch):
+    """
+    Place many orders at once, pipelined under Alpaca's rate limit. Sells are
+    submitted and waited on before any buys (see AlpacaClient.place_orders).
+    Args:
+        batch (list[dict]): place_order keyword arguments, one dict per order.
+    Returns:
+        list: Order JSON, or the exception raised, for each order in `batch`.
+    """
+    return default_client().place_orders(batch)
 
 
 if __name__ == "__main__":
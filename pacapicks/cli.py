@@ -0,0 +1,216 @@
+"""
+Command-line entry point.
+
+    pacapicks account
+    pacapicks positions
+    pacapicks review [--no-record] [--all-accounts | --accounts paper live]
+    pacapicks fundamentals AAPL MSFT [--source fmp|hedged] [--no-cache]
+    pacapicks research [--no-cache] [--shortlist 20 | --stream]
+    pacapicks schedule [--watch AAPL MSFT] [--once] [--cron "35 9 * * mon-fri"]
+    pacapicks backtest bars.npz [--picks research_output.json] [--sweep]
+    pacapicks approvals [--host 127.0.0.1] [--port 8080]
+
+Each subcommand imports what it needs inside its handler, so `account` never
+loads yfinance, pandas or the OpenAI SDK.
+"""
+
+import argparse
+import json
+import sys
+
+
+def _print(data):
+    json.dump(data, sys.stdout, indent=2, default=str)
+    sys.stdout.write("\n")
+
+
+def cmd_account(args):
+    from pacapicks.app import get_account
+
+    _print(get_account())
+
+
+def cmd_positions(args):
+    from pacapicks.broker import get_positions
+
+    _print(get_positions())
+
+
+def cmd_review(args):
+    from pacapicks.market_data import configured_feed
+
+    with configured_feed():
+        if args.all_accounts or args.accounts:
+            from pacapicks.jobs.daily_review import run_daily_review_all
+
+            _print(run_daily_review_all(args.accounts, fundamentals=args.fundamentals))
+            return
+
+        from pacapicks.jobs.daily_review import run_daily_review
+
+        review = run_daily_review()
+    if not args.no_record:
+        from pacapicks.io.history import record_daily_review
+
+        record_daily_review(review)
+    _print(review)
+
+
+def cmd_fundamentals(args):
+    cache = False if args.no_cache else None
+    if args.source == "fmp":
+        from pacapicks.io.endpoints import fetch_fundamentals_fmp_free as load
+    elif args.source == "hedged":
+        from pacapicks.jobs.fundamentals import resolve_fundamentals as load
+    else:
+        from pacapicks.jobs.fundamentals import load_fundamentals_from_yfinance as load
+
+    out = {}
+    for ticker in args.tickers:
+        fundamentals = load(ticker, cache=cache)
+        out[ticker] = fundamentals.model_dump(mode="json") if fundamentals else None
+    _print(out)
+
+
+def cmd_research(args):
+    cache = False if args.no_cache else None
+    if args.stream:
+        from pacapicks.ai.streaming import research_enriched, stream_research
+
+        enriched = research_enriched(stream_research(cache=cache))
+        _print([item.to_json() for item in enriched])
+        return
+    if not args.shortlist:
+        from pacapicks.ai.openai_client import test_research_prompt
+
+        test_research_prompt(cache=cache)
+        return
+
+    from pacapicks.ai.openai_client import research_shortlist
+    from pacapicks.logic.screener import Screener
+
+    candidates = Screener.from_refresh_log().screen(k=args.shortlist)
+    if not candidates:
+        sys.exit("No screened candidates yet; run `pacapicks schedule --once` first")
+    picks = research_shortlist(candidates, cache=cache)
+    _print(picks.model_dump(mode="json"))
+
+
+def cmd_schedule(args):
+    from pacapicks.jobs import scheduler
+    from pacapicks.market_data import configured_feed
+
+    with configured_feed(args.watch or ()):
+        if args.once:
+            report = scheduler.run_incremental(args.watch, args.stages)
+            _print(scheduler.summarize(report))
+        else:
+            scheduler.serve(args.watch, cron=args.cron, timezone=args.timezone)
+
+
+def cmd_backtest(args):
+    from pacapicks.logic import backtest
+
+    bars = backtest.load_bars(args.bars)
+    recs = backtest.load_recommendations(picks_path=args.picks)
+    if args.sweep:
+        grid = backtest.sweep(recs, bars, args.stop_pcts, args.hold_days)
+        _print([{"stop_pct": s, "hold_days": h, **r} for (s, h), r in grid.items()])
+    else:
+        _print(backtest.summarize(backtest.simulate(recs, bars), recs))
+
+
+def cmd_approvals(args):
+    from pacapicks.approvals import create_app
+
+    create_app().run(host=args.host, port=args.port, threaded=True)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="pacapicks", description="Alpaca trading and analysis tools"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("account", help="show the Alpaca account").set_defaults(
+        fn=cmd_account
+    )
+    sub.add_parser("positions", help="list open positions").set_defaults(
+        fn=cmd_positions
+    )
+
+    review = sub.add_parser("review", help="run the daily portfolio review")
+    review.add_argument(
+        "--no-record", action="store_true", help="don't append to the history store"
+    )
+    review.add_argument(
+        "--all-accounts", action="store_true", help="every account in the registry"
+    )
+    review.add_argument("--accounts", nargs="+", metavar="NAME")
+    review.add_argument(
+        "--fundamentals",
+        action="store_true",
+        help="with several accounts, also resolve fundamentals for held names",
+    )
+    review.set_defaults(fn=cmd_review)
+
+    fundamentals = sub.add_parser("fundamentals", help="load fundamentals")
+    fundamentals.add_argument("tickers", nargs="+", metavar="TICKER")
+    fundamentals.add_argument(
+        "--source", choices=("yfinance", "fmp", "hedged"), default="yfinance"
+    )
+    fundamentals.add_argument("--no-cache", action="store_true")
+    fundamentals.set_defaults(fn=cmd_fundamentals)
+
+    research = sub.add_parser("research", help="run the stock research prompt")
+    research.add_argument("--no-cache", action="store_true")
+    research.add_argument(
+        "--shortlist",
+        type=int,
+        metavar="K",
+        help="screen locally and research only the top K candidates",
+    )
+    research.add_argument(
+        "--stream",
+        action="store_true",
+        help="parse picks as they stream and fetch fundamentals/quotes meanwhile",
+    )
+    research.set_defaults(fn=cmd_research)
+
+    schedule = sub.add_parser(
+        "schedule", help="refresh only what changed, once or on a cron schedule"
+    )
+    schedule.add_argument("--watch", nargs="*", default=[], metavar="TICKER")
+    schedule.add_argument("--once", action="store_true", help="run one pass and exit")
+    schedule.add_argument("--stages", nargs="+", help="limit to these stages")
+    schedule.add_argument("--cron", default="35 9 * * mon-fri")
+    schedule.add_argument("--timezone", default="America/New_York")
+    schedule.set_defaults(fn=cmd_schedule)
+
+    bt = sub.add_parser(
+        "backtest", help="replay stored evaluations and picks against saved bars"
+    )
+    bt.add_argument("bars", help=".npz written by backtest.save_bars")
+    bt.add_argument("--picks", help="Picks JSON, e.g. research_output.json")
+    bt.add_argument("--sweep", action="store_true", help="grid over stop %% and hold")
+    bt.add_argument("--stop-pcts", nargs="+", type=float, default=[4, 8, 12, 16])
+    bt.add_argument("--hold-days", nargs="+", type=int, default=[5, 10, 20, 30])
+    bt.set_defaults(fn=cmd_backtest)
+
+    approvals = sub.add_parser(
+        "approvals", help="serve the approve/reject links for proposed orders"
+    )
+    approvals.add_argument("--host", default="127.0.0.1")
+    approvals.add_argument("--port", type=int, default=8080)
+    approvals.set_defaults(fn=cmd_approvals)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,82 @@
-from dotenv import load_dotenv
+"""
+Settings, resolved from the environment (and .env) on first attribute access.
+
+    from pacapicks import config
+    config.ALPACA_BASE_URL
+
+Importing this module is free; the first config.X reads .env and builds every
+setting once, so commands that never touch config never pay for dotenv.
+"""
+
 import os
 
-load_dotenv(override=True)
+_settings = None
+
+
+def _load():
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+
+    # Configuration for Alpaca and OpenAI
+    alpaca_api_key = os.getenv("ALPACA_API_KEY")
+    alpaca_api_secret = os.getenv("ALPACA_API_SECRET")
+
+    return {
+        "ALPACA_API_KEY": alpaca_api_key,
+        "ALPACA_API_SECRET": alpaca_api_secret,
+        "ALPACA_HEADERS": {
+            "APCA-API-KEY-ID": alpaca_api_key,
+            "APCA-API-SECRET-KEY": alpaca_api_secret,
+        },
+        "ALPACA_BASE_URL": os.getenv("ALPACA_BASE_URL"),
+        "ALPACA_DATA_STREAM_URL": os.getenv("ALPACA_DATA_STREAM_URL"),
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY"),
+        "APP_BASE_URL": os.getenv("APP_BASE_URL"),
+        "FMP_API_KEY": os.getenv("FMP_API_KEY"),
+        # JSON file listing several Alpaca accounts (see pacapicks.io.accounts).
+        "ACCOUNTS_FILE": os.getenv("PACAPICKS_ACCOUNTS"),
+        # HMAC key for trade approval links (see pacapicks.approvals).
+        "APPROVAL_SECRET": os.getenv("PACAPICKS_APPROVAL_SECRET"),
+        "CACHE_DIR": os.getenv(
+            "PACAPICKS_CACHE_DIR",
+            os.path.join(os.path.expanduser("~"), ".cache", "pacapicks"),
+        ),
+        # Seconds a cached LLM response stays valid (same-day reruns are free).
+        "LLM_CACHE_TTL": int(os.getenv("PACAPICKS_LLM_CACHE_TTL", 24 * 3600)),
+        "DATA_DIR": os.getenv(
+            "PACAPICKS_DATA_DIR",
+            os.path.join(os.path.expanduser("~"), ".local", "share", "pacapicks"),
+        ),
+        # I/O instrumentation (see pacapicks.io.metrics). PACAPICKS_METRICS_OUT
+        # also enables it and dumps metrics there at exit (.prom for Prometheus).
+        "METRICS": os.getenv("PACAPICKS_METRICS", "").lower() in ("1", "true", "yes"),
+        "METRICS_OUT": os.getenv("PACAPICKS_METRICS_OUT"),
+        "PROFILE_DIR": os.getenv("PACAPICKS_PROFILE_DIR"),
+    }
+
+
+def settings() -> dict:
+    """All settings, loading them on first use."""
+    global _settings
+    if _settings is None:
+        _settings = _load()
+    return _settings
+
+
+def reload():
+    """Re-read the environment and .env (e.g. after changing os.environ)."""
+    global _settings
+    _settings = None
+    return settings()
 
-# Configuration for Alpaca and OpenAI
-ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
-ALPACA_API_SECRET = os.getenv("ALPACA_API_SECRET")
-ALPACA_HEADERS = {
-    "APCA-API-KEY-ID": ALPACA_API_KEY,
-    "APCA-API-SECRET-KEY": ALPACA_API_SECRET,
-}
-ALPACA_BASE_URL = os.getenv("ALPACA_BASE_URL")
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+def __getattr__(name):
+    try:
+        return settings()[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
 
-APP_BASE_URL = os.getenv("APP_BASE_URL")
 
-FMP_API_KEY = os.getenv("FMP_API_KEY")
+def __dir__():
+    return sorted(set(globals()) | set(settings()))
@@ -0,0 +1,147 @@
+"""
+Registry of Alpaca accounts.
+
+    {"accounts": [
+        {"name": "paper-main", "key_id": "$PAPER_KEY", "secret": "$PAPER_SECRET",
+         "base_url": "https://paper-api.alpaca.markets"},
+        ...
+    ]}
+
+PACAPICKS_ACCOUNTS points at a JSON file like the one above; values starting
+with "$" are read from that environment variable so secrets can stay out of
+the file. Without it, the registry holds the single ALPACA_* account from
+config under the name "default".
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterator, NamedTuple, Optional
+
+from pacapicks import config
+from pacapicks.io.alpaca import AlpacaClient, default_client
+
+DEFAULT_ACCOUNT = "default"
+
+
+class Account(NamedTuple):
+    name: str
+    key_id: Optional[str]
+    secret: Optional[str]
+    base_url: Optional[str]
+
+    @property
+    def headers(self) -> Dict[str, Optional[str]]:
+        return {"APCA-API-KEY-ID": self.key_id, "APCA-API-SECRET-KEY": self.secret}
+
+
+def _resolve(value):
+    if isinstance(value, str) and value.startswith("$"):
+        return os.getenv(value[1:])
+    return value
+
+
+class AccountRegistry:
+    """
+    Named accounts, each with its own lazily created AlpacaClient: Alpaca
+    rate-limits per account, so every account gets its own token bucket and
+    connection pool.
+    """
+
+    def __init__(self, accounts=()):
+        self._accounts: Dict[str, Account] = {}
+        self._clients: Dict[str, AlpacaClient] = {}
+        self._lock = threading.Lock()
+        for account in accounts:
+            self.add(account)
+
+    def add(self, account: Account):
+        self._accounts[account.name] = account
+        self._clients.pop(account.name, None)
+
+    def __getitem__(self, name) -> Account:
+        return self._accounts[name]
+
+    def __contains__(self, name):
+        return name in self._accounts
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._accounts)
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def names(self):
+        return list(self._accounts)
+
+    def client(self, name) -> AlpacaClient:
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                account = self._accounts[name]
+                client = AlpacaClient(
+                    base_url=account.base_url, headers=account.headers
+                )
+                self._clients[name] = client
+            return client
+
+    def use_client(self, name, client):
+        """Serve `name` through `client` (e.g. a stub); None restores the default."""
+        with self._lock:
+            if client is None:
+                self._clients.pop(name, None)
+            else:
+                self._clients[name] = client
+
+    @classmethod
+    def from_file(cls, path) -> "AccountRegistry":
+        with open(path) as f:
+            data = json.load(f)
+        entries = data["accounts"] if isinstance(data, dict) else data
+        return cls(
+            Account(
+                name=entry["name"],
+                key_id=_resolve(entry.get("key_id")),
+                secret=_resolve(entry.get("secret")),
+                base_url=_resolve(entry.get("base_url")) or config.ALPACA_BASE_URL,
+            )
+            for entry in entries
+        )
+
+    @classmethod
+    def from_config(cls) -> "AccountRegistry":
+        if config.ACCOUNTS_FILE:
+            return cls.from_file(config.ACCOUNTS_FILE)
+        return cls(
+            [
+                Account(
+                    DEFAULT_ACCOUNT,
+                    config.ALPACA_API_KEY,
+                    config.ALPACA_API_SECRET,
+                    config.ALPACA_BASE_URL,
+                )
+            ]
+        )
+
+
+_default_registry = None
+
+
+def use_registry(registry):
+    """Make `registry` the default (None reloads it from config on next use)."""
+    global _default_registry
+    _default_registry = registry
+
+
+def default_registry() -> AccountRegistry:
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = AccountRegistry.from_config()
+    return _default_registry
+
+
+def client_for(account=None) -> AlpacaClient:
+    """Client for a registry account name; None is the default ALPACA_* client."""
+    if account is None:
+        return default_client()
+    return default_registry().client(account)
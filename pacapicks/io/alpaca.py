@@ -0,0 +1,243 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pacapicks import config
+from pacapicks.io import metrics
+from pacapicks.io.ratelimit import TokenBucket
+
+# Alpaca's documented default is 200 requests/minute per account.
+ALPACA_REQUESTS_PER_MINUTE = 200
+IDEMPOTENT_METHODS = {"GET", "HEAD", "DELETE"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Order statuses after which an order will not fill any further.
+FINAL_ORDER_STATUSES = {"filled", "canceled", "expired", "rejected", "done_for_day"}
+FILL_TIMEOUT = 60.0
+FILL_POLL_INTERVAL = 0.5
+
+
+class AlpacaClient:
+    """
+    Pooled, rate-limit-aware client for the Alpaca trading REST API.
+
+    A single keep-alive session is shared by every call. Requests draw from a
+    token bucket sized to the account's quota, and the X-RateLimit-* response
+    headers pause the bucket when the server says we're out. A 429 is always
+    safe to retry (the request was rejected unprocessed); other failures are
+    retried, with jittered exponential backoff, only for idempotent methods.
+    """
+
+    def __init__(
+        self,
+        base_url=None,
+        headers=None,
+        requests_per_minute=ALPACA_REQUESTS_PER_MINUTE,
+        burst=None,
+        max_retries=4,
+        backoff_base=0.25,
+        backoff_cap=8.0,
+        pool_size=16,
+    ):
+        self.base_url = base_url or config.ALPACA_BASE_URL
+        # Alpaca counts requests per minute, so a burst is fine as long as the
+        # window isn't exhausted; keep some headroom for other processes.
+        self.bucket = TokenBucket.per_minute(
+            requests_per_minute, burst or max(1, requests_per_minute // 4)
+        )
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.pool_size = pool_size
+        self.rate_limit = {"limit": None, "remaining": None, "reset": None}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update(
+            headers if headers is not None else config.ALPACA_HEADERS
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _read_rate_limit(self, r):
+        h = r.headers
+        try:
+            limit = int(h["X-RateLimit-Limit"])
+            remaining = int(h["X-RateLimit-Remaining"])
+            reset = float(h["X-RateLimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            self.rate_limit = {"limit": limit, "remaining": remaining, "reset": reset}
+        metrics.set_quota("alpaca", remaining, limit, reset)
+        if remaining <= 0:
+            self.bucket.drain(max(0.0, reset - time.time()))
+
+    def _backoff(self, attempt, r=None):
+        retry_after = r is not None and r.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        ceiling = min(self.backoff_cap, self.backoff_base * 2**attempt)
+        return random.uniform(0, ceiling)
+
+    def request(self, method, path, timeout=20, **kwargs):
+        method = method.upper()
+        retry_errors = method in IDEMPOTENT_METHODS
+        url = f"{self.base_url}{path}"
+        endpoint = f"{method} {path}"
+        ticker = (kwargs.get("json") or {}).get("symbol")
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.wait()
+            try:
+                with metrics.span("alpaca", endpoint, ticker) as span:
+                    r = self.session.request(method, url, timeout=timeout, **kwargs)
+                    span.record(status=r.status_code, bytes=len(r.content))
+            except (requests.ConnectionError, requests.Timeout):
+                if not retry_errors or attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            self._read_rate_limit(r)
+            retryable = r.status_code == 429 or (
+                retry_errors and r.status_code in RETRY_STATUSES
+            )
+            if not retryable or attempt == self.max_retries:
+                r.raise_for_status()
+                return r.json()
+
+            delay = self._backoff(attempt, r)
+            if r.status_code == 429:
+                self.bucket.drain(delay)
+            time.sleep(delay)
+
+    def get_account(self):
+        return self.request("GET", "/v2/account", timeout=10)
+
+    def get_positions(self):
+        return self.request("GET", "/v2/positions", timeout=20)
+
+    def place_order(self, symbol, qty, side, type="market", tif="day", **extra):
+        payload = {
+            "symbol": symbol,
+            "qty": qty,
+            "side": side,
+            "type": type,
+            "time_in_force": tif,
+            **extra,
+        }
+        return self.request("POST", "/v2/orders", json=payload, timeout=20)
+
+    def get_order_by_client_id(self, client_order_id):
+        """The order submitted with `client_order_id`, or None if there is none."""
+        try:
+            return self.request(
+                "GET",
+                "/v2/orders:by_client_order_id",
+                params={"client_order_id": client_order_id},
+                timeout=10,
+            )
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+
+    def get_order(self, order_id):
+        return self.request("GET", f"/v2/orders/{order_id}", timeout=10)
+
+    def wait_for_orders(
+        self, orders, timeout=FILL_TIMEOUT, poll_interval=FILL_POLL_INTERVAL
+    ):
+        """
+        Poll until every order reaches a final status (filled, canceled, ...)
+        or `timeout` seconds pass.
+        Args:
+            orders (list[dict]): Order JSON as returned by place_order.
+        Returns:
+            list: The latest order JSON for each input order.
+        """
+        latest = list(orders)
+        deadline = time.monotonic() + timeout
+        while True:
+            open_rows = [
+                i
+                for i, o in enumerate(latest)
+                if o.get("status") not in FINAL_ORDER_STATUSES
+            ]
+            if not open_rows or time.monotonic() >= deadline:
+                return latest
+            for i in open_rows:
+                try:
+                    latest[i] = self.get_order(latest[i]["id"])
+                except requests.RequestException:
+                    pass  # try again next round
+            if any(
+                latest[i].get("status") not in FINAL_ORDER_STATUSES for i in open_rows
+            ):
+                time.sleep(poll_interval)
+
+    def place_orders(self, batch, max_in_flight=None, fill_timeout=FILL_TIMEOUT):
+        """
+        Submit many orders concurrently while staying under the rate limit.
+        When the batch mixes sides, the sells go first and the buys are only
+        submitted once every accepted sell is final (or `fill_timeout` passes),
+        so buys sized on sale proceeds (see logic.order_builder.rebalance)
+        have the cash by the time they reach the broker.
+        Args:
+            batch (list[dict]): Keyword arguments for place_order, one per order.
+            max_in_flight (int): Concurrent submissions (default: pool size).
+            fill_timeout (float): Longest wait for the sells to fill, seconds.
+        Returns:
+            list: The order JSON, or the raised exception, for each input order.
+        """
+
+        def submit(order):
+            try:
+                return self.place_order(**order)
+            except Exception as e:
+                return e
+
+        def submit_all(orders):
+            if not orders:
+                return []
+            workers = max(1, min(max_in_flight or self.pool_size, len(orders)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(submit, orders))
+
+        sell_rows = [i for i, o in enumerate(batch) if o.get("side") == "sell"]
+        buy_rows = [i for i, o in enumerate(batch) if o.get("side") != "sell"]
+        if not sell_rows or not buy_rows:
+            return submit_all(batch)
+
+        results = [None] * len(batch)
+        for i, result in zip(sell_rows, submit_all([batch[i] for i in sell_rows])):
+            results[i] = result
+        accepted = [i for i in sell_rows if not isinstance(results[i], Exception)]
+        self.wait_for_orders([results[i] for i in accepted], timeout=fill_timeout)
+        for i, result in zip(buy_rows, submit_all([batch[i] for i in buy_rows])):
+            results[i] = result
+        return results
+
+
+_default_client = None
+
+
+def use_client(client):
+    """Route broker/app calls through `client` (None restores the default)."""
+    global _default_client
+    _default_client = client
+
+
+def default_client() -> AlpacaClient:
+    global _default_client
+    if _default_client is None:
+        _default_client = AlpacaClient()
+    return _default_client
@@ -0,0 +1,380 @@
+"""
+Local OHLCV bar cache: one memory-mapped (symbols x bars) panel per field.
+
+    cache = BarCache()                              # <DATA_DIR>/bars/1d
+    bars = cache.load(symbols, start="2024-01-01")  # market_data.history() layout
+
+Layout: <root>/<field>.npy (float64, NaN where a symbol has no bar),
+dates.npy (the bar index shared by every symbol), coverage.npy (the day range
+each symbol has been downloaded over) and meta.json (symbol order). Panels
+are opened with mmap and over-allocated, so a new bar is written in place.
+
+load() downloads only the days outside each symbol's coverage, grouping
+symbols with the same gap into multi-symbol yf.download batches, then returns
+read-only views into the panels; nothing is copied when the symbols are a
+contiguous run of the cache (e.g. the same universe, in the same order, as
+last time). The newest day is never marked covered, so a bar downloaded
+intraday is replaced by the final one on the next run.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List
+
+import numpy as np
+
+from pacapicks import config
+from pacapicks.io import metrics
+
+FIELDS = ("open", "high", "low", "close", "volume")
+INTERVALS = {"1d": "datetime64[D]", "1m": "datetime64[m]"}
+# Default look-back when load() gets no start; yfinance keeps ~30 days of 1m bars.
+DEFAULT_DAYS = {"1d": 365, "1m": 7}
+BATCH_SIZE = 200
+MAX_WORKERS = 8
+GROWTH = 1.5  # panel over-allocation factor on resize
+MARKET_TZ = "America/New_York"
+NAT = np.datetime64("NaT", "D")
+
+yf = None  # yfinance, imported on first download so cache reads never pay for it
+
+
+def _yfinance():
+    global yf
+    if yf is None:
+        import yfinance as yf
+    return yf
+
+
+def _day(value) -> np.datetime64:
+    return np.datetime64(value, "D")
+
+
+def _as_slice(idx):
+    """A run of consecutive indices as a slice (cheaper to index with)."""
+    if len(idx) and idx[-1] - idx[0] == len(idx) - 1 and np.all(np.diff(idx) == 1):
+        return slice(int(idx[0]), int(idx[-1]) + 1)
+    return idx
+
+
+class BarCache:
+    """Daily ("1d") or minute ("1m") bars for any number of symbols."""
+
+    def __init__(self, root=None, interval="1d"):
+        if interval not in INTERVALS:
+            raise ValueError(f"interval must be one of {sorted(INTERVALS)}")
+        self.interval = interval
+        self.unit = INTERVALS[interval]
+        self.root = root or os.path.join(config.DATA_DIR, "bars", interval)
+        self._lock = threading.Lock()
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.dates = np.array([], dtype=self.unit)
+        self._coverage = np.full((0, 2), NAT)
+        self._panels: Dict[str, np.memmap] = {}
+        self._open()
+
+    # ---------- Storage ----------
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def _open(self):
+        if not os.path.exists(self._path("meta.json")):
+            return
+        with open(self._path("meta.json")) as f:
+            meta = json.load(f)
+        self.symbols = meta["symbols"]
+        self._index = {s: i for i, s in enumerate(self.symbols)}
+        self.dates = np.load(self._path("dates.npy")).astype(self.unit)
+        self._coverage = np.load(self._path("coverage.npy"))
+        self._panels = {
+            f: np.load(self._path(f"{f}.npy"), mmap_mode="r+") for f in FIELDS
+        }
+
+    def _save(self):
+        for panel in self._panels.values():
+            panel.flush()
+        np.save(self._path("dates.npy"), self.dates)
+        np.save(self._path("coverage.npy"), self._coverage)
+        tmp = self._path(".meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"interval": self.interval, "symbols": self.symbols}, f)
+        os.replace(tmp, self._path("meta.json"))
+
+    def _capacity(self):
+        if not self._panels:
+            return 0, 0
+        return self._panels[FIELDS[0]].shape
+
+    def _rebuild(self, n_symbols, n_dates, columns=None):
+        """
+        Re-allocate the panels with room for `n_symbols` x `n_dates`, moving
+        existing bar i to column columns[i] (default: where it is).
+        """
+        old_rows, old_cols = len(self.symbols), len(self.dates)
+        cap_rows, cap_cols = self._capacity()
+        # Leave headroom so new bars and symbols are usually written in place.
+        shape = (
+            n_symbols if n_symbols <= cap_rows else int(n_symbols * GROWTH) + 1,
+            n_dates if n_dates <= cap_cols else int(n_dates * GROWTH) + 1,
+        )
+        os.makedirs(self.root, exist_ok=True)
+        for f in FIELDS:
+            tmp = self._path(f".{f}.npy.tmp")
+            panel = np.lib.format.open_memmap(tmp, "w+", np.float64, shape)
+            panel[:] = np.nan
+            if f in self._panels and old_rows and old_cols:
+                old = self._panels[f][:old_rows, :old_cols]
+                if columns is None:
+                    panel[:old_rows, :old_cols] = old
+                else:
+                    panel[:old_rows, columns] = old
+            panel.flush()
+            del panel
+            self._panels.pop(f, None)
+            os.replace(tmp, self._path(f"{f}.npy"))
+            self._panels[f] = np.load(self._path(f"{f}.npy"), mmap_mode="r+")
+
+    def _add_symbols(self, symbols):
+        new = [s for s in dict.fromkeys(symbols) if s not in self._index]
+        if not new:
+            return
+        if len(self.symbols) + len(new) > self._capacity()[0]:
+            self._rebuild(len(self.symbols) + len(new), len(self.dates))
+        for s in new:
+            self._index[s] = len(self.symbols)
+            self.symbols.append(s)
+        self._coverage = np.concatenate([self._coverage, np.full((len(new), 2), NAT)])
+
+    def _add_dates(self, dates) -> np.ndarray:
+        """Merge `dates` into the bar index; returns their column numbers."""
+        dates = np.asarray(dates, dtype=self.unit)
+        new = np.setdiff1d(dates, self.dates)
+        if len(new):
+            merged = np.union1d(self.dates, new)
+            appended = not len(self.dates) or new[0] > self.dates[-1]
+            if not appended:
+                # Bars before the newest known one (a backfill): shift columns.
+                self._rebuild(
+                    len(self.symbols), len(merged), np.searchsorted(merged, self.dates)
+                )
+            elif len(merged) > self._capacity()[1]:
+                self._rebuild(len(self.symbols), len(merged))
+            self.dates = merged
+        return np.searchsorted(self.dates, dates)
+
+    # ---------- Downloads ----------
+
+    def _gaps(self, rows, start, end):
+        """{(first_day, last_day): [symbol, ...]} still to download."""
+        rows = np.asarray(rows, dtype=np.int64)
+        lo, hi = self._coverage[rows].T
+        new = np.isnat(lo)
+        before = ~new & (start < lo)
+        after = ~new & (end > hi)
+        first = np.concatenate(
+            [np.full(new.sum(), start), np.full(before.sum(), start), hi[after] + 1]
+        )
+        last = np.concatenate(
+            [np.full(new.sum(), end), lo[before] - 1, np.full(after.sum(), end)]
+        )
+        which = np.concatenate([rows[new], rows[before], rows[after]])
+        if not len(which):
+            return {}
+        keys, group = np.unique(
+            np.stack([first, last], axis=1).astype(np.int64),
+            axis=0,
+            return_inverse=True,
+        )
+        return {
+            (_day(a), _day(b)): [self.symbols[r] for r in which[group.ravel() == k]]
+            for k, (a, b) in enumerate(keys.astype("datetime64[D]"))
+        }
+
+    def _download(self, task):
+        first, last, chunk = task
+        try:
+            with metrics.span("yfinance", "download") as span:
+                data = _yfinance().download(
+                    chunk,
+                    start=str(first),
+                    end=str(last + 1),
+                    interval=self.interval,
+                    auto_adjust=False,
+                    progress=False,
+                    threads=False,
+                )
+                span.record(
+                    frame_bytes=0 if data is None else int(data.memory_usage().sum())
+                )
+            return data
+        except Exception:
+            return None
+
+    def _write(self, chunk, data) -> list:
+        """Store a download; returns the symbols that got at least one bar."""
+        import pandas as pd
+
+        if data is None or data.empty:
+            return []
+        if not isinstance(data.columns, pd.MultiIndex):
+            data.columns = pd.MultiIndex.from_product([data.columns, chunk])
+        index = data.index
+        if getattr(index, "tz", None) is not None:
+            index = index.tz_convert(MARKET_TZ).tz_localize(None)
+        cols = self._add_dates(index.values.astype(self.unit))
+        rows = np.array([self._index[s] for s in chunk])
+        # Gather every (field, symbol) column at once: (fields, symbols, bars).
+        where = {key: i for i, key in enumerate(data.columns)}
+        take = np.array(
+            [where.get((f.capitalize(), s), -1) for f in FIELDS for s in chunk]
+        )
+        values = np.append(data.to_numpy(float), np.full((len(data), 1), np.nan), 1)
+        block = values[:, take].T.reshape(len(FIELDS), len(chunk), len(data))
+        rows, cols = _as_slice(rows), _as_slice(cols)
+        for f, values in zip(FIELDS, block):
+            if isinstance(rows, slice) or isinstance(cols, slice):
+                self._panels[f][rows, cols] = values
+            else:
+                self._panels[f][rows[:, None], cols[None, :]] = values
+        # yfinance answers a failed symbol with all-NaN columns, not an error.
+        got = ~np.isnan(block).all(axis=(0, 2))
+        return [s for s, ok in zip(chunk, got.tolist()) if ok]
+
+    def _cover(self, chunk, first, last):
+        rows = np.array([self._index[s] for s in chunk])
+        lo, hi = self._coverage[rows].T
+        self._coverage[rows, 0] = np.where(np.isnat(lo), first, np.minimum(lo, first))
+        self._coverage[rows, 1] = np.where(np.isnat(hi), last, np.maximum(hi, last))
+
+    def refresh(self, symbols, start=None, end=None) -> int:
+        """
+        Download whatever `symbols` are missing between `start` and `end`
+        (dates, inclusive; default DEFAULT_DAYS up to today).
+        Returns:
+            int: yf.download requests made.
+        """
+        end = _day(date.today() if end is None else end)
+        start = _day(end - DEFAULT_DAYS[self.interval] if start is None else start)
+        settled = min(end, _day(date.today() - timedelta(days=1)))
+        with self._lock:
+            self._add_symbols(symbols)
+            rows = [self._index[s] for s in dict.fromkeys(symbols)]
+            tasks = []
+            for (first, last), group in self._gaps(rows, start, end).items():
+                if not np.busday_count(first, last + 1):
+                    # Weekend-only gap: nothing to fetch.
+                    if last <= settled:
+                        self._cover(group, first, last)
+                    continue
+                for i in range(0, len(group), BATCH_SIZE):
+                    tasks.append((first, last, group[i : i + BATCH_SIZE]))
+            if not tasks:
+                return 0
+
+            workers = max(1, min(MAX_WORKERS, len(tasks)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for (first, last, chunk), data in zip(
+                    tasks, pool.map(self._download, tasks)
+                ):
+                    if data is None:
+                        continue  # failed: still a gap, retried next time
+                    # Symbols with no bars at all stay gaps and are retried too.
+                    loaded = self._write(chunk, data)
+                    if loaded and min(last, settled) >= first:
+                        self._cover(loaded, first, min(last, settled))
+            self._save()
+            return len(tasks)
+
+    # ---------- Reading ----------
+
+    def load(self, symbols=None, start=None, end=None, refresh=True):
+        """
+        Bars for `symbols` (default: every cached symbol) between `start` and
+        `end`, downloading gaps first unless refresh=False.
+        Returns:
+            dict: {"symbols", "dates", "open", "high", "low", "close", "volume"},
+            each field a read-only (symbols x bars) view.
+        """
+        symbols = list(self.symbols if symbols is None else dict.fromkeys(symbols))
+        end = _day(date.today() if end is None else end)
+        start = _day(end - DEFAULT_DAYS[self.interval] if start is None else start)
+        if refresh:
+            self.refresh(symbols, start, end)
+        else:
+            with self._lock:
+                self._add_symbols(symbols)
+
+        # A contiguous run of rows is a view; anything else is a copy.
+        rows = _as_slice(np.array([self._index[s] for s in symbols], dtype=np.int64))
+        dates = self.dates
+        c0 = np.searchsorted(dates, start.astype(self.unit))
+        c1 = np.searchsorted(dates, (end + 1).astype(self.unit))
+        out = {"symbols": symbols, "dates": dates[c0:c1]}
+        for f in FIELDS:
+            if f in self._panels:
+                view = self._panels[f][rows, c0:c1]
+            else:
+                view = np.full((len(symbols), 0), np.nan)
+            view.flags.writeable = False
+            out[f] = view
+        return out
+
+
+_default_caches: Dict[str, BarCache] = {}
+
+
+def default_bar_cache(interval="1d") -> BarCache:
+    if interval not in _default_caches:
+        _default_caches[interval] = BarCache(interval=interval)
+    return _default_caches[interval]
+
+
+if __name__ == "__main__":
+    # Benchmark: first fill, next-day refresh and reload of 3,000 symbols.
+    import tempfile
+    import time
+
+    from pacapicks.bench.fakes import FakeYFinance, patched_yfinance, symbols
+    from pacapicks.io import bars as module  # the copy patched_yfinance patches
+
+    N = 3_000
+    universe = symbols(N)
+    today = _day(date.today())
+    last = np.busday_offset(today, 0, roll="backward")
+    yesterday = np.busday_offset(last, -1)
+    fake = FakeYFinance(latency=0.05)
+
+    with tempfile.TemporaryDirectory() as root, patched_yfinance(fake):
+        cache = module.BarCache(root)
+        start = time.perf_counter()
+        cache.load(universe, start=last - 365, end=yesterday)
+        first_s = time.perf_counter() - start
+        first_requests = fake.requests
+
+        fake.requests = 0
+        start = time.perf_counter()
+        bars = cache.load(universe, start=last - 365, end=today)
+        refresh_s = time.perf_counter() - start
+        refresh_requests = fake.requests
+        assert bars["dates"][-1] == last and not np.isnan(bars["close"][:, -1]).any()
+        assert np.shares_memory(bars["close"], cache._panels["close"])
+
+        start = time.perf_counter()
+        reopened = module.BarCache(root).load(universe, start=last - 365, refresh=False)
+        reload_ms = (time.perf_counter() - start) * 1e3
+        assert np.array_equal(reopened["close"], bars["close"], equal_nan=True)
+
+        reference = fake.download(universe[:3], period="1y")["Close"]
+        n = min(len(reference), bars["close"].shape[1])
+        assert np.allclose(bars["close"][:3, -n:], reference.to_numpy().T[:, -n:])
+
+    print(
+        f"first fill: {first_s:.2f}s ({first_requests} requests), "
+        f"next-day refresh: {refresh_s * 1e3:.0f} ms ({refresh_requests} requests), "
+        f"reopen + load: {reload_ms:.1f} ms for {N} x {bars['close'].shape[1]} bars"
+    )
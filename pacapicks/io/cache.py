@@ -0,0 +1,412 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from pacapicks import config
+from pacapicks.ai.assessment_schema import Fundamentals
+
+QUOTE_TTL = 15 * 60  # price-derived fields move intraday
+STATEMENT_TTL = 7 * 24 * 3600  # filings land ~4x a year; a week is plenty fresh
+DEFAULT_TTL = 24 * 3600
+
+# Per-field TTLs (seconds). Fields not listed fall back to DEFAULT_TTL.
+FIELD_TTLS = {
+    "market_cap_musd": QUOTE_TTL,
+    "pe_ttm": QUOTE_TTL,
+    "ps_ttm": QUOTE_TTL,
+    "revenue_yoy_pct_q": STATEMENT_TTL,
+    "operating_margin_pct": STATEMENT_TTL,
+    "cash_reserves_musd": STATEMENT_TTL,
+    "total_debt_musd": STATEMENT_TTL,
+}
+
+_FUNDAMENTALS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fundamentals (
+    provider TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    fiscal_period TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    field_ts TEXT NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (provider, ticker, fiscal_period)
+);
+CREATE INDEX IF NOT EXISTS fundamentals_lru ON fundamentals (accessed_at);
+"""
+
+
+_RESPONSES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at);
+"""
+
+
+_REFRESH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS refresh (
+    stage TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    refreshed_at REAL NOT NULL,
+    ref_price REAL,
+    payload TEXT NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (stage, ticker)
+);
+CREATE INDEX IF NOT EXISTS refresh_lru ON refresh (accessed_at);
+"""
+
+
+class CacheEntry(NamedTuple):
+    fundamentals: Fundamentals
+    fiscal_period: str
+    stale: frozenset  # field names whose TTL has lapsed
+
+
+class _SQLiteCache:
+    """Shared plumbing: lazy per-process connection, LRU bound and counters."""
+
+    table = None
+    schema = None
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def __getstate__(self):
+        # Connections don't cross process boundaries; reopen lazily instead.
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_conn"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _db(self):
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.schema)
+            self._conn = conn
+        return self._conn
+
+    def _evict(self, db):
+        (count,) = db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            db.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN ("
+                f"SELECT rowid FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+
+    def stats(self):
+        with self._lock:
+            (entries,) = (
+                self._db().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+            )
+            hits, misses, evictions = self.hits, self.misses, self.evictions
+        lookups = hits + misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "evictions": evictions,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._db().execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+
+class FundamentalsCache(_SQLiteCache):
+    """
+    On-disk (SQLite) cache of validated Fundamentals payloads.
+
+    Rows are keyed by (provider, ticker, fiscal_period). Every field carries its
+    own fetch timestamp, so a lookup can report exactly which fields are stale
+    and callers only refetch what they need. The table is bounded to
+    `max_entries` rows with least-recently-used eviction.
+    """
+
+    table = "fundamentals"
+    schema = _FUNDAMENTALS_SCHEMA
+    # Every Fundamentals value carries a timestamp, listed in FIELD_TTLS or not.
+    fields = tuple(f for f in Fundamentals.model_fields if f != "warnings")
+
+    def __init__(self, path=None, max_entries=20_000, field_ttls=None):
+        super().__init__(
+            path or os.path.join(config.CACHE_DIR, "fundamentals.sqlite"),
+            max_entries,
+        )
+        self.field_ttls = {**FIELD_TTLS, **(field_ttls or {})}
+        self.partial_hits = 0
+
+    def _ttl(self, field):
+        return self.field_ttls.get(field, DEFAULT_TTL)
+
+    def get(self, provider, ticker, fiscal_period=None) -> Optional[CacheEntry]:
+        """Return the cached entry (latest period unless one is given), or None."""
+        with self._lock:
+            db = self._db()
+            if fiscal_period is None:
+                row = db.execute(
+                    "SELECT fiscal_period, payload, field_ts FROM fundamentals "
+                    "WHERE provider = ? AND ticker = ? "
+                    "ORDER BY fiscal_period DESC LIMIT 1",
+                    (provider, ticker),
+                ).fetchone()
+            else:
+                row = db.execute(
+                    "SELECT fiscal_period, payload, field_ts FROM fundamentals "
+                    "WHERE provider = ? AND ticker = ? AND fiscal_period = ?",
+                    (provider, ticker, fiscal_period),
+                ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            period, payload, field_ts = row
+            now = time.time()
+            db.execute(
+                "UPDATE fundamentals SET accessed_at = ? "
+                "WHERE provider = ? AND ticker = ? AND fiscal_period = ?",
+                (now, provider, ticker, period),
+            )
+            db.commit()
+
+            field_ts = json.loads(field_ts)
+            stale = frozenset(
+                field
+                for field in self.fields
+                if now - field_ts.get(field, 0) > self._ttl(field)
+            )
+            if stale:
+                self.partial_hits += 1
+            else:
+                self.hits += 1
+        return CacheEntry(Fundamentals.model_validate_json(payload), period, stale)
+
+    def put(self, provider, ticker, fundamentals, fiscal_period=None, fields=None):
+        """
+        Store `fundamentals`, stamping `fields` (default: all) as fetched now.
+        Fields not in `fields` keep the value and timestamp already cached.
+        """
+        period = fiscal_period or ""
+        now = time.time()
+        fields = set(self.fields if fields is None else fields)
+
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT payload, field_ts FROM fundamentals "
+                "WHERE provider = ? AND ticker = ? AND fiscal_period = ?",
+                (provider, ticker, period),
+            ).fetchone()
+
+            payload = fundamentals.model_dump(mode="json", exclude={"net_debt_musd"})
+            field_ts = {}
+            if row is not None:
+                old_payload, old_ts = json.loads(row[0]), json.loads(row[1])
+                for field, ts in old_ts.items():
+                    if field not in fields:
+                        payload[field] = old_payload.get(field)
+                        field_ts[field] = ts
+            field_ts.update({field: now for field in fields})
+
+            db.execute(
+                "INSERT OR REPLACE INTO fundamentals VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    provider,
+                    ticker,
+                    period,
+                    json.dumps(payload),
+                    json.dumps(field_ts),
+                    now,
+                ),
+            )
+            self._evict(db)
+            db.commit()
+
+    def discard(self, provider, ticker):
+        """Drop every cached period for `ticker`, forcing the next load to fetch."""
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "DELETE FROM fundamentals WHERE provider = ? AND ticker = ?",
+                (provider, ticker),
+            )
+            db.commit()
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            partial_hits = self.partial_hits
+        lookups = stats["hits"] + partial_hits + stats["misses"]
+        return {
+            **stats,
+            "partial_hits": partial_hits,
+            "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+        }
+
+
+class ResponseCache(_SQLiteCache):
+    """
+    Content-addressed on-disk cache of LLM responses.
+
+    Keys are a SHA-256 over the canonical JSON of the request (model, input,
+    tools, schema and any other parameters), so any change to the prompt is a
+    miss. Entries older than `ttl` seconds are ignored and overwritten.
+    """
+
+    table = "responses"
+    schema = _RESPONSES_SCHEMA
+
+    def __init__(self, path=None, ttl=None, max_entries=5_000):
+        super().__init__(
+            path or os.path.join(config.CACHE_DIR, "responses.sqlite"), max_entries
+        )
+        self.ttl = config.LLM_CACHE_TTL if ttl is None else ttl
+
+    @staticmethod
+    def key(**request):
+        canonical = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key) -> Optional[dict]:
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or time.time() - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            db.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            db.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, payload: dict):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, json.dumps(payload), now, now),
+            )
+            self._evict(db)
+            db.commit()
+
+
+class RefreshRecord(NamedTuple):
+    fingerprint: str  # hash of the inputs the stage last ran on
+    refreshed_at: float
+    ref_price: Optional[float]  # price when it ran, for move thresholds
+    payload: dict  # the stage's output, JSON-ready
+
+
+class RefreshLog(_SQLiteCache):
+    """
+    Last run of each (stage, ticker) for the incremental scheduler: when it
+    ran, the fingerprint of its inputs, the reference price and its output.
+    Losing the file only costs one full refresh.
+    """
+
+    table = "refresh"
+    schema = _REFRESH_SCHEMA
+
+    def __init__(self, path=None, max_entries=200_000):
+        super().__init__(
+            path or os.path.join(config.CACHE_DIR, "refresh.sqlite"), max_entries
+        )
+
+    def stage(self, stage) -> Dict[str, RefreshRecord]:
+        """Every ticker's record for `stage`."""
+        with self._lock:
+            rows = (
+                self._db()
+                .execute(
+                    "SELECT ticker, fingerprint, refreshed_at, ref_price, payload "
+                    "FROM refresh WHERE stage = ?",
+                    (stage,),
+                )
+                .fetchall()
+            )
+        return {
+            ticker: RefreshRecord(fp, refreshed_at, ref_price, json.loads(payload))
+            for ticker, fp, refreshed_at, ref_price, payload in rows
+        }
+
+    def put_many(self, stage, records: Dict[str, RefreshRecord]):
+        if not records:
+            return
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.executemany(
+                "INSERT OR REPLACE INTO refresh VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        stage,
+                        ticker,
+                        r.fingerprint,
+                        r.refreshed_at,
+                        r.ref_price,
+                        json.dumps(r.payload),
+                        now,
+                    )
+                    for ticker, r in records.items()
+                ],
+            )
+            self._evict(db)
+            db.commit()
+
+
+_default_cache = None
+_default_response_cache = None
+_default_refresh_log = None
+
+
+def default_cache() -> FundamentalsCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = FundamentalsCache()
+    return _default_cache
+
+
+def default_response_cache() -> ResponseCache:
+    global _default_response_cache
+    if _default_response_cache is None:
+        _default_response_cache = ResponseCache()
+    return _default_response_cache
+
+
+def default_refresh_log() -> RefreshLog:
+    global _default_refresh_log
+    if _default_refresh_log is None:
+        _default_refresh_log = RefreshLog()
+    return _default_refresh_log
@@ -0,0 +1,425 @@
+import json
+import os
+import shutil
+import time
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from pacapicks import config
+from pacapicks.ai.assessment_schema import Fundamentals, StockEvaluation
+
+# Bump when a dataset's column layout changes; stored with every dataset.
+SCHEMA_VERSION = 1
+TICKER_DTYPE = "<U12"
+
+FUNDAMENTAL_COLUMNS = [
+    name for name in Fundamentals.model_fields if name != "warnings"
+] + list(Fundamentals.model_computed_fields)
+
+
+class HistoryStore:
+    """
+    Append-only columnar store of daily facts, one directory per dataset.
+
+    Layout: <root>/<dataset>/month=YYYY-MM/part-<ns>/<column>.npy. Each append
+    writes a new part; `compact` folds a month's parts into one. Fixed-width
+    columns are plain .npy files opened with mmap, so a query only touches the
+    pages it filters. Variable-length "blob" columns (e.g. raw JSON) are stored
+    Arrow-style as a uint8 data buffer plus int64 offsets.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.path.join(config.DATA_DIR, "history")
+
+    # ---------- Writing ----------
+
+    def append(self, dataset, columns: Dict[str, Iterable], blobs=None):
+        """
+        Append rows to `dataset`. `columns` must include "date" and "ticker".
+        Args:
+            dataset (str): Dataset name, e.g. "daily_review".
+            columns (dict): Column name -> equal-length sequence of scalars.
+            blobs (dict): Column name -> equal-length sequence of bytes/str.
+        """
+        arrays = {name: np.asarray(values) for name, values in columns.items()}
+        arrays["date"] = arrays["date"].astype("datetime64[D]")
+        arrays["ticker"] = arrays["ticker"].astype(TICKER_DTYPE)
+        n = len(arrays["date"])
+        if any(len(a) != n for a in arrays.values()):
+            raise ValueError("All columns must have the same length")
+
+        blobs = {
+            name: [v.encode() if isinstance(v, str) else bytes(v) for v in values]
+            for name, values in (blobs or {}).items()
+        }
+        if any(len(v) != n for v in blobs.values()):
+            raise ValueError("All blob columns must have the same length")
+
+        self._check_meta(dataset, arrays, blobs)
+        order = np.argsort(arrays["date"], kind="stable")
+        months = arrays["date"].astype("datetime64[M]")[order]
+        for month in np.unique(months):
+            rows = order[months == month]
+            self._write_part(
+                dataset,
+                str(month),
+                {name: a[rows] for name, a in arrays.items()},
+                {name: [values[i] for i in rows] for name, values in blobs.items()},
+            )
+
+    def _check_meta(self, dataset, arrays, blobs):
+        meta_path = os.path.join(self.root, dataset, "_meta.json")
+        meta = {
+            "schema_version": SCHEMA_VERSION,
+            "columns": {name: a.dtype.str for name, a in arrays.items()},
+            "blobs": sorted(blobs),
+        }
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                existing = json.load(f)
+            if set(existing["columns"]) != set(meta["columns"]) or set(
+                existing["blobs"]
+            ) != set(meta["blobs"]):
+                raise ValueError(f"Column mismatch for dataset '{dataset}'")
+            return
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        with open(meta_path, "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def _write_part(self, dataset, month, arrays, blobs, name=None):
+        month_dir = os.path.join(self.root, dataset, f"month={month}")
+        os.makedirs(month_dir, exist_ok=True)
+        name = name or f"part-{time.time_ns()}"
+        tmp = os.path.join(month_dir, f".{name}.tmp")
+        os.makedirs(tmp)
+        for col, a in arrays.items():
+            np.save(os.path.join(tmp, f"{col}.npy"), a, allow_pickle=False)
+        for col, values in blobs.items():
+            lengths = np.fromiter((len(v) for v in values), np.int64, len(values))
+            offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+            data = np.frombuffer(b"".join(values), dtype=np.uint8)
+            np.save(os.path.join(tmp, f"{col}.offsets.npy"), offsets)
+            np.save(os.path.join(tmp, f"{col}.data.npy"), data)
+        # Readers only ever see complete parts.
+        os.rename(tmp, os.path.join(month_dir, name))
+
+    def compact(self, dataset):
+        """Merge each month's parts into a single part (rows kept in date order)."""
+        meta = self.meta(dataset)
+        for month_dir in self._month_dirs(dataset):
+            parts = self._parts(month_dir)
+            if len(parts) < 2:
+                continue
+            loaded = [self._load_part(p, meta, None, blobs=True) for p in parts]
+            arrays = {
+                col: np.concatenate([part[col] for part in loaded])
+                for col in meta["columns"]
+            }
+            blobs = {
+                col: [v for part in loaded for v in part[col]] for col in meta["blobs"]
+            }
+            order = np.argsort(arrays["date"], kind="stable")
+            month = os.path.basename(month_dir).split("=", 1)[1]
+            self._write_part(
+                dataset,
+                month,
+                {col: a[order] for col, a in arrays.items()},
+                {col: [values[i] for i in order] for col, values in blobs.items()},
+                name=f"part-{time.time_ns()}-compact",
+            )
+            for p in parts:
+                shutil.rmtree(p)
+
+    # ---------- Reading ----------
+
+    def meta(self, dataset):
+        with open(os.path.join(self.root, dataset, "_meta.json")) as f:
+            return json.load(f)
+
+    def _month_dirs(self, dataset, start=None, end=None):
+        base = os.path.join(self.root, dataset)
+        if not os.path.isdir(base):
+            return []
+        lo = str(np.datetime64(start, "M")) if start is not None else None
+        hi = str(np.datetime64(end, "M")) if end is not None else None
+        out = []
+        for name in sorted(os.listdir(base)):
+            if not name.startswith("month="):
+                continue
+            month = name.split("=", 1)[1]
+            if (lo and month < lo) or (hi and month > hi):
+                continue
+            out.append(os.path.join(base, name))
+        return out
+
+    @staticmethod
+    def _parts(month_dir):
+        return [
+            os.path.join(month_dir, p)
+            for p in sorted(os.listdir(month_dir))
+            if p.startswith("part-")
+        ]
+
+    @staticmethod
+    def _load_part(path, meta, columns, blobs=False):
+        cols = meta["columns"] if columns is None else columns
+        out = {
+            col: np.load(os.path.join(path, f"{col}.npy"), mmap_mode="r")
+            for col in cols
+            if col in meta["columns"]
+        }
+        if blobs:
+            wanted = meta["blobs"] if blobs is True else blobs
+            for col in wanted:
+                offsets = np.load(os.path.join(path, f"{col}.offsets.npy"))
+                data = np.load(os.path.join(path, f"{col}.data.npy"), mmap_mode="r")
+                out[col] = [
+                    data[offsets[i] : offsets[i + 1]].tobytes()
+                    for i in range(len(offsets) - 1)
+                ]
+        return out
+
+    def partitions(self, dataset, start=None, end=None, columns=None):
+        """
+        Yield one dict of read-only memory-mapped column views per stored part.
+        Nothing is copied; filter the views yourself or use `query`.
+        """
+        meta = self.meta(dataset)
+        for month_dir in self._month_dirs(dataset, start, end):
+            for part in self._parts(month_dir):
+                yield self._load_part(part, meta, columns)
+
+    def query(
+        self,
+        dataset,
+        start=None,
+        end=None,
+        tickers=None,
+        columns=None,
+        blobs=None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Rows of `dataset` with start <= date <= end and ticker in `tickers`.
+        Args:
+            dataset (str): Dataset name.
+            start, end (date | str): Inclusive date bounds (None = open).
+            tickers (list[str]): Restrict to these tickers (None = all).
+            columns (list[str]): Fixed-width columns to return (None = all);
+                "date" and "ticker" are always included.
+            blobs (list[str]): Blob columns to return as lists of bytes.
+        Returns:
+            dict: Column name -> array. Parts that need no filtering are
+                returned as memory-mapped views when a single part matches.
+        """
+        if not os.path.exists(os.path.join(self.root, dataset, "_meta.json")):
+            return {}
+        meta = self.meta(dataset)
+        columns = list(meta["columns"] if columns is None else columns)
+        needed = list(dict.fromkeys(columns + ["date", "ticker"]))
+        lo = np.datetime64(start, "D") if start is not None else None
+        hi = np.datetime64(end, "D") if end is not None else None
+        wanted = np.asarray(tickers, dtype=TICKER_DTYPE) if tickers else None
+
+        chunks = []
+        for month_dir in self._month_dirs(dataset, start, end):
+            for part in self._parts(month_dir):
+                views = self._load_part(part, meta, needed, blobs=blobs or False)
+                dates = views["date"]
+                mask = None
+                if lo is not None and dates[0] < lo:
+                    mask = dates >= lo
+                if hi is not None and dates[-1] > hi:
+                    mask = (dates <= hi) if mask is None else mask & (dates <= hi)
+                if wanted is not None:
+                    in_set = np.isin(views["ticker"], wanted)
+                    mask = in_set if mask is None else mask & in_set
+                chunks.append((views, mask))
+
+        out = {}
+        for col in needed:
+            pieces = [v[col] if m is None else v[col][m] for v, m in chunks]
+            if len(pieces) == 1:
+                out[col] = pieces[0]
+            elif pieces:
+                out[col] = np.concatenate(pieces)
+            else:
+                out[col] = np.empty(0, dtype=np.dtype(meta["columns"][col]))
+        for col in blobs or []:
+            out[col] = [
+                value
+                for v, m in chunks
+                for value, keep in zip(v[col], m if m is not None else _always())
+                if keep
+            ]
+        return out
+
+
+def _always():
+    while True:
+        yield True
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+_default_store = None
+
+
+def default_store() -> HistoryStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = HistoryStore()
+    return _default_store
+
+
+# ---------- Dataset writers ----------
+
+
+def record_daily_review(review, as_of: Optional[date] = None, store=None):
+    """Persist run_daily_review() output as the "daily_review" dataset."""
+    if not review:
+        return
+    store = store or default_store()
+    facts = [item["facts"] for item in review]
+    day = np.datetime64(as_of or date.today(), "D")
+    store.append(
+        "daily_review",
+        {
+            "date": np.full(len(facts), day),
+            "ticker": [f["symbol"] for f in facts],
+            "qty": [_float(f["qty"]) for f in facts],
+            "avg_entry": [_float(f["avg_entry"]) for f in facts],
+            "market_price": [_float(f["market_price"]) for f in facts],
+            "unrealized_pl": [_float(f["unrealized_pl"]) for f in facts],
+            "pct_change_today": [_float(f["pct_change_today"]) for f in facts],
+        },
+    )
+
+
+def record_fundamentals(
+    fundamentals: Dict[str, Fundamentals], as_of: Optional[date] = None, store=None
+):
+    """Persist a {ticker: Fundamentals} snapshot as the "fundamentals" dataset."""
+    if not fundamentals:
+        return
+    store = store or default_store()
+    tickers = list(fundamentals)
+    day = np.datetime64(as_of or date.today(), "D")
+    columns = {"date": np.full(len(tickers), day), "ticker": tickers}
+    for col in FUNDAMENTAL_COLUMNS:
+        columns[col] = [_float(getattr(fundamentals[t], col)) for t in tickers]
+    store.append("fundamentals", columns)
+
+
+def record_evaluations(evaluations: Iterable[StockEvaluation], store=None):
+    """
+    Persist StockEvaluations as the "evaluations" dataset: the fields screens
+    and backtests filter on as columns, plus the full model as a JSON blob
+    stamped with its schema (see validation.dump_stamped).
+    """
+    from pacapicks.ai.validation import dump_stamped
+
+    evaluations = list(evaluations)
+    if not evaluations:
+        return
+    store = store or default_store()
+    columns = {
+        "date": [e.as_of for e in evaluations],
+        "ticker": [e.ticker for e in evaluations],
+        "recommendation": np.asarray(
+            [e.decision.recommendation.value for e in evaluations], dtype="<U8"
+        ),
+        "conviction_1to5": np.asarray(
+            [e.decision.conviction_1to5 for e in evaluations], dtype=np.int8
+        ),
+        "entry_price": [_float(e.decision.entry_price) for e in evaluations],
+        "target_price": [_float(e.decision.target_price) for e in evaluations],
+        "stop_price": [_float(e.decision.stop_price) for e in evaluations],
+        "stop_loss_pct": [_float(e.personal_fit.stop_loss_pct) for e in evaluations],
+        "profit_target_pct": [
+            _float(e.personal_fit.profit_target_pct) for e in evaluations
+        ],
+        "time_horizon_days": np.asarray(
+            [e.personal_fit.time_horizon_days for e in evaluations], dtype=np.int32
+        ),
+        "price_trend": np.asarray(
+            [e.technicals.price_trend.value for e in evaluations], dtype="<U10"
+        ),
+        "beta_1y": [_float(e.technicals.beta_1y) for e in evaluations],
+    }
+    store.append(
+        "evaluations",
+        columns,
+        blobs={"json": [dump_stamped(StockEvaluation, [e]) for e in evaluations]},
+    )
+
+
+def load_evaluations(start=None, end=None, tickers=None, store=None):
+    """
+    StockEvaluations recorded between start and end (inclusive). Rows stamped
+    with the current schema are rebuilt lazily without re-validating;
+    anything older is validated in bulk.
+    Returns:
+        BulkResult: models in stored order; blobs that no longer validate
+        (e.g. written under an older schema) are reported in `errors`.
+    """
+    from pacapicks.ai.validation import load_stamped_rows
+
+    store = store or default_store()
+    rows = store.query("evaluations", start, end, tickers, columns=[], blobs=["json"])
+    return load_stamped_rows(StockEvaluation, rows.get("json", []))
+
+
+if __name__ == "__main__":
+    # Benchmark: one year of daily reviews for 500 tickers.
+    import tempfile
+    from datetime import timedelta
+
+    N_TICKERS, N_DAYS = 500, 252
+    tickers = [f"T{i:03d}" for i in range(N_TICKERS)]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(tmp)
+        day = date(2025, 1, 1)
+        start = time.perf_counter()
+        for _ in range(N_DAYS):
+            review = [
+                {
+                    "facts": {
+                        "symbol": t,
+                        "qty": 10,
+                        "avg_entry": "12.5",
+                        "market_price": 13.0,
+                        "unrealized_pl": "5.0",
+                        "pct_change_today": "0.01",
+                    }
+                }
+                for t in tickers
+            ]
+            record_daily_review(review, as_of=day, store=store)
+            day += timedelta(days=1)
+        write_s = time.perf_counter() - start
+        store.compact("daily_review")
+
+        start = time.perf_counter()
+        year = store.query("daily_review", start="2025-01-01", end="2025-12-31")
+        year_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        some = store.query(
+            "daily_review",
+            start="2025-03-01",
+            end="2025-06-30",
+            tickers=tickers[:25],
+            columns=["market_price"],
+        )
+        filt_s = time.perf_counter() - start
+
+    print(f"wrote {N_DAYS} daily partitions in {write_s:.2f}s")
+    print(f"full year ({len(year['ticker'])} rows): {year_s * 1e3:.1f} ms")
+    print(f"4 months x 25 tickers ({len(some['ticker'])} rows): {filt_s * 1e3:.1f} ms")
@@ -0,0 +1,489 @@
+"""
+Per-provider I/O instrumentation.
+
+Every outbound call (Alpaca, yfinance, FMP, OpenAI) is wrapped in a span:
+
+    with metrics.span("fmp", "quote", ticker) as s:
+        r = session.get(...)
+        s.record(status=r.status_code, bytes=len(r.content))
+
+`bytes` is what came over the wire; clients that only hand back a decoded
+frame (yfinance) record its in-memory size as `frame_bytes` instead.
+
+Spans feed in-process latency histograms and counters keyed by
+(provider, endpoint), exportable as Prometheus text or JSON. Recording is off
+unless PACAPICKS_METRICS is set (or enable() is called); while off, span()
+returns a shared no-op object, so an instrumented call costs one global check.
+The flags are read on the first span()/profiled() call, not at import, so
+importing an instrumented module never resolves config.
+
+`profiled(name)` wraps a job entry point in a sampling profiler when
+PACAPICKS_PROFILE_DIR is set, writing collapsed stacks (flamegraph.pl /
+speedscope input) to that directory.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from pacapicks import config
+
+# Seconds; upper bounds of the latency histogram buckets (+Inf is implicit).
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_SPANS = 10_000
+PROFILE_INTERVAL = 0.005
+
+_enabled = False
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class _Series:
+    __slots__ = (
+        "buckets",
+        "count",
+        "total",
+        "errors",
+        "bytes",
+        "frame_bytes",
+        "tokens_in",
+        "tokens_out",
+        "statuses",
+    )
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.bytes = 0
+        self.frame_bytes = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.statuses = Counter()
+
+    def observe(self, span):
+        i = 0
+        while i < len(LATENCY_BUCKETS) and span.latency > LATENCY_BUCKETS[i]:
+            i += 1
+        self.buckets[i] += 1
+        self.count += 1
+        self.total += span.latency
+        self.errors += span.error is not None
+        self.bytes += span.bytes or 0
+        self.frame_bytes += span.frame_bytes or 0
+        self.tokens_in += span.tokens_in or 0
+        self.tokens_out += span.tokens_out or 0
+        self.statuses[str(span.status)] += 1
+
+    def quantile(self, q):
+        """Bucket upper bound containing the q-th quantile (None if empty)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, n in zip(LATENCY_BUCKETS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Registry:
+    """Thread-safe store of span aggregates, quota gauges and recent spans."""
+
+    def __init__(self, recent=RECENT_SPANS):
+        self._lock = threading.Lock()
+        self.series = {}
+        self.quotas = {}
+        self.recent = deque(maxlen=recent)
+
+    def observe(self, span):
+        key = (span.provider, span.endpoint)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = _Series()
+            series.observe(span)
+            self.recent.append(span)
+
+    def set_quota(self, provider, remaining, limit=None, reset=None):
+        with self._lock:
+            self.quotas[provider] = {
+                "remaining": remaining,
+                "limit": limit,
+                "reset": reset,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.series.clear()
+            self.quotas.clear()
+            self.recent.clear()
+
+    def to_dict(self, spans=False):
+        with self._lock:
+            out = {
+                "providers": [
+                    {
+                        "provider": provider,
+                        "endpoint": endpoint,
+                        "count": s.count,
+                        "errors": s.errors,
+                        "latency_sum_s": s.total,
+                        "latency_mean_s": s.total / s.count if s.count else None,
+                        "latency_p50_s": s.quantile(0.5),
+                        "latency_p95_s": s.quantile(0.95),
+                        "bytes": s.bytes,
+                        "frame_bytes": s.frame_bytes,
+                        "tokens_in": s.tokens_in,
+                        "tokens_out": s.tokens_out,
+                        "statuses": dict(s.statuses),
+                    }
+                    for (provider, endpoint), s in sorted(self.series.items())
+                ],
+                "quotas": dict(self.quotas),
+            }
+            if spans:
+                out["spans"] = [s.to_dict() for s in self.recent]
+        return out
+
+    def prometheus(self):
+        def labels(provider, endpoint, **extra):
+            pairs = {"provider": provider, "endpoint": endpoint, **extra}
+            return ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items())
+
+        lines = [
+            "# HELP pacapicks_io_latency_seconds Outbound call latency.",
+            "# TYPE pacapicks_io_latency_seconds histogram",
+        ]
+        with self._lock:
+            items = sorted(self.series.items())
+            for (provider, endpoint), s in items:
+                cumulative = 0
+                for bound, n in zip(LATENCY_BUCKETS + ("+Inf",), s.buckets):
+                    cumulative += n
+                    le = labels(provider, endpoint, le=bound)
+                    lines.append(
+                        f"pacapicks_io_latency_seconds_bucket{{{le}}} {cumulative}"
+                    )
+                base = labels(provider, endpoint)
+                lines.append(f"pacapicks_io_latency_seconds_sum{{{base}}} {s.total}")
+                lines.append(f"pacapicks_io_latency_seconds_count{{{base}}} {s.count}")
+
+            for name, attr, help_text in (
+                ("errors", "errors", "Calls that raised."),
+                ("bytes", "bytes", "Response bytes received."),
+                ("frame_bytes", "frame_bytes", "Decoded DataFrame memory."),
+                ("tokens_in", "tokens_in", "LLM input tokens."),
+                ("tokens_out", "tokens_out", "LLM output tokens."),
+            ):
+                lines.append(f"# HELP pacapicks_io_{name}_total {help_text}")
+                lines.append(f"# TYPE pacapicks_io_{name}_total counter")
+                for (provider, endpoint), s in items:
+                    lines.append(
+                        f"pacapicks_io_{name}_total{{{labels(provider, endpoint)}}} "
+                        f"{getattr(s, attr)}"
+                    )
+
+            lines.append("# HELP pacapicks_io_responses_total Calls by status.")
+            lines.append("# TYPE pacapicks_io_responses_total counter")
+            for (provider, endpoint), s in items:
+                for status, n in sorted(s.statuses.items()):
+                    lab = labels(provider, endpoint, status=status)
+                    lines.append(f"pacapicks_io_responses_total{{{lab}}} {n}")
+
+            lines.append("# HELP pacapicks_quota_remaining Provider-reported quota.")
+            lines.append("# TYPE pacapicks_quota_remaining gauge")
+            for provider, quota in sorted(self.quotas.items()):
+                if quota["remaining"] is not None:
+                    lines.append(
+                        f'pacapicks_quota_remaining{{provider="{provider}"}} '
+                        f"{quota['remaining']}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = Registry()
+
+
+class Span:
+    """One outbound call. Fill in what's known via record(); timing is automatic."""
+
+    __slots__ = (
+        "provider",
+        "endpoint",
+        "ticker",
+        "started_at",
+        "latency",
+        "status",
+        "bytes",
+        "frame_bytes",
+        "tokens_in",
+        "tokens_out",
+        "error",
+        "_t0",
+    )
+
+    def __init__(self, provider, endpoint, ticker=None):
+        self.provider = provider
+        self.endpoint = endpoint
+        self.ticker = ticker
+        self.started_at = None
+        self.latency = 0.0
+        self.status = None
+        self.bytes = None
+        self.frame_bytes = None
+        self.tokens_in = None
+        self.tokens_out = None
+        self.error = None
+
+    def record(
+        self,
+        status=None,
+        bytes=None,
+        tokens_in=None,
+        tokens_out=None,
+        frame_bytes=None,
+    ):
+        if status is not None:
+            self.status = status
+        if bytes is not None:
+            self.bytes = bytes
+        if frame_bytes is not None:
+            self.frame_bytes = frame_bytes
+        if tokens_in is not None:
+            self.tokens_in = tokens_in
+        if tokens_out is not None:
+            self.tokens_out = tokens_out
+
+    def __enter__(self):
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.latency = time.perf_counter() - self._t0
+        if exc_type is not None:
+            self.error = exc_type.__name__
+            if self.status is None:
+                self.status = "error"
+        elif self.status is None:
+            self.status = "ok"
+        REGISTRY.observe(self)
+        return False
+
+    def to_dict(self):
+        return {
+            "provider": self.provider,
+            "endpoint": self.endpoint,
+            "ticker": self.ticker,
+            "started_at": self.started_at,
+            "latency_s": self.latency,
+            "status": self.status,
+            "bytes": self.bytes,
+            "frame_bytes": self.frame_bytes,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def record(
+        self,
+        status=None,
+        bytes=None,
+        tokens_in=None,
+        tokens_out=None,
+        frame_bytes=None,
+    ):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(provider, endpoint, ticker=None):
+    """Context manager timing one call to `provider`; a no-op while disabled."""
+    if not _enabled and (_configured or not _configure()):
+        return _NOOP
+    return Span(provider, endpoint, ticker)
+
+
+def set_quota(provider, remaining, limit=None, reset=None):
+    """Record a provider-reported rate-limit/quota reading (e.g. X-RateLimit-*)."""
+    if _enabled:
+        REGISTRY.set_quota(provider, remaining, limit, reset)
+
+
+def usage_tokens(usage):
+    """(input_tokens, output_tokens) from an OpenAI usage block, if any."""
+    if usage is None:
+        return None, None
+    return getattr(usage, "input_tokens", None), getattr(usage, "output_tokens", None)
+
+
+def _configure() -> bool:
+    """Apply PACAPICKS_METRICS / PACAPICKS_METRICS_OUT once; returns enabled()."""
+    global _configured, _enabled
+    with _configure_lock:
+        if not _configured:
+            _configured = True
+            if config.METRICS or config.METRICS_OUT:
+                _enabled = True
+            if config.METRICS_OUT:
+                atexit.register(dump, config.METRICS_OUT)
+    return _enabled
+
+
+def enabled() -> bool:
+    return _enabled or (not _configured and _configure())
+
+
+def enable():
+    global _enabled
+    _configure()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _configure()
+    _enabled = False
+
+
+def prometheus_text() -> str:
+    return REGISTRY.prometheus()
+
+
+def to_json(spans=False) -> str:
+    return json.dumps(REGISTRY.to_dict(spans=spans), indent=2)
+
+
+def dump(path, spans=False):
+    """Write metrics to `path`: Prometheus text for *.prom, JSON otherwise."""
+    text = prometheus_text() if path.endswith(".prom") else to_json(spans=spans)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+# ---------- Sampling profiler ----------
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's Python stack at a fixed interval from a background
+    thread and counts collapsed stacks ("a;b;c 42"), so pool workers running
+    the I/O show up alongside the job's main thread.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._sample, name="pacapicks-profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+_profiling = False
+_profiling_lock = threading.Lock()
+
+
+def profiled(name):
+    """
+    Decorator for job entry points: when PACAPICKS_PROFILE_DIR is set, run the
+    function under SamplingProfiler and write <dir>/<name>-<timestamp>.folded.
+    Profiled jobs called while another one is being profiled (e.g. per-account
+    reviews inside run_daily_review_all) just run: the outer sampler already
+    sees every thread.
+    """
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            global _profiling
+            _configure()
+            out_dir = config.PROFILE_DIR
+            if not out_dir:
+                return fn(*args, **kwargs)
+            with _profiling_lock:
+                nested, _profiling = _profiling, True
+            if nested:
+                return fn(*args, **kwargs)
+            profiler = SamplingProfiler().start()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.stop()
+                _profiling = False
+                os.makedirs(out_dir, exist_ok=True)
+                stamp = time.strftime("%Y%m%dT%H%M%S")
+                profiler.write(os.path.join(out_dir, f"{name}-{stamp}.folded"))
+
+        return wrapper
+
+    return decorate
+
+
+if __name__ == "__main__":
+    # Overhead of an instrumented call site, disabled vs enabled.
+    N = 200_000
+
+    def loop():
+        start = time.perf_counter()
+        for _ in range(N):
+            with span("bench", "noop", "T") as s:
+                s.record(status=200, bytes=10)
+        return (time.perf_counter() - start) / N
+
+    disable()
+    off = loop()
+    enable()
+    on = loop()
+    print(f"disabled: {off * 1e9:.0f} ns/call, enabled: {on * 1e9:.0f} ns/call")
+    print(prometheus_text().splitlines()[2])
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+from websockets.asyncio.client import connect
+
+from pacapicks import config
+
+DEFAULT_STREAM_URL = "wss://stream.data.alpaca.markets/v2/iex"
+
+# Column order of the last-price table.
+LAST, BID, ASK, PREV_CLOSE, UPDATED_AT = range(5)
+
+
+class PriceFeed:
+    """
+    In-process last-price table fed by Alpaca's market-data websocket.
+
+    Prices live in one (symbols x 5) float64 array — last, bid, ask,
+    prev_close, updated_at — with a dict mapping symbol to row, so a read is a
+    dict lookup plus a row index. The socket runs on a background thread with
+    its own event loop and reconnects with backoff. Anything can seed rows via
+    `update` (e.g. prev_close from REST), since the stream doesn't carry it.
+    """
+
+    def __init__(self, url=None, key=None, secret=None, max_age=60.0):
+        self.url = url or config.ALPACA_DATA_STREAM_URL or DEFAULT_STREAM_URL
+        self.key = key if key is not None else config.ALPACA_API_KEY
+        self.secret = secret if secret is not None else config.ALPACA_API_SECRET
+        self.max_age = max_age
+
+        self._index = {}
+        self._table = np.full((64, 5), np.nan)
+        self._lock = threading.Lock()
+        self._symbols = set()
+        self._symbols_lock = threading.Lock()  # subscribe() runs on caller threads
+        self._loop = None
+        self._thread = None
+        self._ws = None
+        self._stopping = False
+        self.connected = threading.Event()
+
+    # ---------- Table ----------
+
+    def _row(self, symbol):
+        # Caller holds self._lock.
+        row = self._index.get(symbol)
+        if row is None:
+            row = len(self._index)
+            if row == len(self._table):
+                grown = np.full((2 * len(self._table), 5), np.nan)
+                grown[:row] = self._table
+                self._table = grown
+            self._index[symbol] = row
+        return row
+
+    def update(self, symbol, last=None, bid=None, ask=None, prev_close=None):
+        with self._lock:
+            index = self._row(symbol)  # may grow (replace) the table
+            row = self._table[index]
+            if last is not None:
+                row[LAST] = last
+            if bid is not None:
+                row[BID] = bid
+            if ask is not None:
+                row[ASK] = ask
+            if prev_close is not None:
+                row[PREV_CLOSE] = prev_close
+            row[UPDATED_AT] = time.time()
+
+    def get(self, symbol) -> Optional[dict]:
+        """Latest prices for `symbol` with their age in seconds, or None."""
+        row = self._index.get(symbol)
+        if row is None:
+            return None
+        last, bid, ask, prev_close, updated_at = self._table[row].tolist()
+        return {
+            "last": None if last != last else last,
+            "bid": None if bid != bid else bid,
+            "ask": None if ask != ask else ask,
+            "prev_close": None if prev_close != prev_close else prev_close,
+            "age": time.time() - updated_at,
+        }
+
+    def fresh(self, symbol, max_age=None) -> Optional[dict]:
+        """Like `get`, but None unless last and prev_close are set and recent."""
+        quote = self.get(symbol)
+        if (
+            quote is None
+            or quote["last"] is None
+            or quote["prev_close"] is None
+            or quote["age"] > (self.max_age if max_age is None else max_age)
+        ):
+            return None
+        return quote
+
+    # ---------- Stream ----------
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        self._stopping = False
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_until_complete,
+            args=(self._run(),),
+            name="price-feed",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopping = True
+        if self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        self._thread.join(timeout=5)
+        self._thread = None
+        self.connected.clear()
+
+    def subscribe(self, symbols):
+        with self._symbols_lock:
+            new = set(symbols) - self._symbols
+            if not new:
+                return
+            self._symbols |= new
+            ws = self._ws
+        # If the socket isn't up yet, _run subscribes everything once it is.
+        if ws is not None and self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._send_subscribe(new), self._loop)
+
+    async def _send_subscribe(self, symbols):
+        symbols = sorted(symbols)
+        await self._ws.send(
+            json.dumps(
+                {
+                    "action": "subscribe",
+                    "trades": symbols,
+                    "quotes": symbols,
+                    "dailyBars": symbols,
+                }
+            )
+        )
+
+    def _handle(self, msg):
+        kind, symbol = msg.get("T"), msg.get("S")
+        if kind == "t":
+            self.update(symbol, last=msg.get("p"))
+        elif kind == "q":
+            self.update(symbol, bid=msg.get("bp"), ask=msg.get("ap"))
+        elif kind in ("d", "b"):
+            self.update(symbol, last=msg.get("c"))
+        elif kind == "error":
+            raise ConnectionError(f"{msg.get('code')}: {msg.get('msg')}")
+
+    async def _run(self):
+        backoff = 0.5
+        while not self._stopping:
+            try:
+                async with connect(self.url) as ws:
+                    await ws.recv()  # [{"T":"success","msg":"connected"}]
+                    await ws.send(
+                        json.dumps(
+                            {"action": "auth", "key": self.key, "secret": self.secret}
+                        )
+                    )
+                    for msg in json.loads(await ws.recv()):
+                        self._handle(msg)
+                    self._ws = ws
+                    with self._symbols_lock:
+                        symbols = set(self._symbols)
+                    if symbols:
+                        await self._send_subscribe(symbols)
+                    self.connected.set()
+                    backoff = 0.5
+                    async for raw in ws:
+                        for msg in json.loads(raw):
+                            self._handle(msg)
+            except Exception:
+                if self._stopping:
+                    break
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                self._ws = None
+                self.connected.clear()
+
+
+if __name__ == "__main__":
+    # Demo against a local stub stream: measure read latency of the table.
+    import random
+    from websockets.asyncio.server import serve
+
+    SYMBOLS = [f"T{i:03d}" for i in range(500)]
+
+    async def stub_stream(ws):
+        await ws.send(json.dumps([{"T": "success", "msg": "connected"}]))
+        await ws.recv()
+        await ws.send(json.dumps([{"T": "success", "msg": "authenticated"}]))
+        subscribed = json.loads(await ws.recv())["trades"]
+        while True:
+            batch = [
+                {"T": "t", "S": s, "p": round(random.uniform(5, 50), 2)}
+                for s in random.sample(subscribed, 50)
+            ]
+            await ws.send(json.dumps(batch))
+            await asyncio.sleep(0.01)
+
+    async def run_stub(ready, stop):
+        async with serve(stub_stream, "127.0.0.1", 0) as server:
+            ready["port"] = server.sockets[0].getsockname()[1]
+            ready["event"].set()
+            await stop.wait()
+
+    loop = asyncio.new_event_loop()
+    stop = asyncio.Event()
+    ready = {"event": threading.Event()}
+    threading.Thread(
+        target=loop.run_until_complete, args=(run_stub(ready, stop),), daemon=True
+    ).start()
+    ready["event"].wait()
+
+    feed = PriceFeed(url=f"ws://127.0.0.1:{ready['port']}", key="k", secret="s")
+    for s in SYMBOLS:
+        feed.update(s, prev_close=20.0)
+    feed.subscribe(SYMBOLS)
+    feed.start()
+    feed.connected.wait(5)
+    time.sleep(0.5)
+
+    n = 200_000
+    start = time.perf_counter()
+    for i in range(n):
+        feed.get(SYMBOLS[i % len(SYMBOLS)])
+    per_read = (time.perf_counter() - start) / n
+    print(f"{feed.get('T000')}")
+    print(f"{per_read * 1e6:.2f} us per read")
+    feed.stop()
@@ -0,0 +1,53 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter usable from threads and from asyncio tasks.
+
+    `rate` tokens are added per second up to `capacity`; each request takes one.
+    Callers reserve a token up front and then sleep for however long the bucket
+    says, so concurrent waiters are spaced out instead of stampeding.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute, burst=None):
+        return cls(requests_per_minute / 60.0, burst)
+
+    def _reserve(self, tokens=1.0):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def drain(self, seconds):
+        """Empty the bucket and hold it empty for `seconds` (e.g. after a 429)."""
+        with self._lock:
+            self._tokens = -seconds * self.rate
+            self._updated = time.monotonic()
+
+    def wait(self, tokens=1.0):
+        delay = self._reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def wait_async(self, tokens=1.0):
+        delay = self._reserve(tokens)
+        if delay:
+            import asyncio  # only async callers pay for the import
+
+            await asyncio.sleep(delay)
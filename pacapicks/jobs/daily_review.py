@@ -1,15 +1,35 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pacapicks import broker, market_data
+from pacapicks.io import metrics
+from pacapicks.io.accounts import default_registry
+from pacapicks.io.history import record_daily_review
 
+# Account/positions requests in flight at once, across all accounts; each
+# account has its own client and rate-limit bucket.
+MAX_ACCOUNT_WORKERS = 64
 
-def run_daily_review():
-    positions = broker.get_positions()
+
+@metrics.profiled("daily_review")
+def run_daily_review(positions=None, quotes=None):
+    """
+    Summarise every open position at its latest price.
+    Args:
+        positions (list[dict]): Alpaca positions, if already fetched.
+        quotes (dict): market_data.snapshots() output covering those positions.
+    Returns:
+        list[dict]: {"facts": {...}, "reco": str} per position.
+    """
+    if positions is None:
+        positions = broker.get_positions()
     portfolio_summary = []
+    if quotes is None:
+        quotes = market_data.snapshots([pos["symbol"] for pos in positions])
 
     for pos in positions:
         symbol = pos["symbol"]
         qty = float(pos["qty"])
-        last_price = market_data.snapshot(symbol)["last"]
+        last_price = quotes[symbol]["last"]
 
         facts = {
             "symbol": symbol,
@@ -27,6 +47,77 @@ def run_daily_review():
     return portfolio_summary
 
 
+def _fetch(registry, name, what):
+    try:
+        client = registry.client(name)  # raises for an unknown name
+        if what == "account":
+            return client.get_account()
+        return client.get_positions()
+    except Exception as e:
+        return e
+
+
+@metrics.profiled("daily_review_all")
+def run_daily_review_all(
+    accounts=None, registry=None, fundamentals=False, max_workers=MAX_ACCOUNT_WORKERS
+):
+    """
+    Review every registered account at once.
+
+    Every account's details and positions are fetched concurrently; then the
+    union of held symbols is quoted (and optionally has its fundamentals
+    resolved) once, however many accounts hold each name.
+    Args:
+        accounts (list[str]): Registry names to review (default: all).
+        registry (AccountRegistry): Defaults to default_registry().
+        fundamentals (bool): Also resolve fundamentals for the held symbols.
+        max_workers (int): Requests in flight at once.
+    Returns:
+        dict: {"accounts": {name: {"account", "review"} or {"error"}},
+        "symbols": [...], "fundamentals": {symbol: dict}}.
+    """
+    registry = registry or default_registry()
+    names = list(accounts or registry.names())
+    tasks = [(name, what) for name in names for what in ("account", "positions")]
+    workers = max(1, min(max_workers, len(tasks)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda task: _fetch(registry, *task), tasks)
+        fetched = {name: {} for name in names}
+        for (name, what), result in zip(tasks, results):
+            if isinstance(result, Exception):
+                fetched[name]["error"] = f"{type(result).__name__}: {result}"
+            else:
+                fetched[name][what] = result
+
+    symbols = list(
+        dict.fromkeys(
+            pos["symbol"]
+            for result in fetched.values()
+            for pos in result.get("positions", ())
+        )
+    )
+    quotes = market_data.snapshots(symbols)
+
+    out = {"accounts": {}, "symbols": symbols, "fundamentals": {}}
+    for name, result in fetched.items():
+        if "error" in result:
+            out["accounts"][name] = result
+            continue
+        out["accounts"][name] = {
+            "account": result["account"],
+            "review": run_daily_review(result["positions"], quotes),
+        }
+    if fundamentals and symbols:
+        from pacapicks.jobs.fundamentals import resolve_fundamentals_many
+
+        out["fundamentals"] = {
+            symbol: f.model_dump(mode="json")
+            for symbol, f in resolve_fundamentals_many(symbols).items()
+        }
+    return out
+
+
 if __name__ == "__main__":
     review = run_daily_review()
+    record_daily_review(review)
     print(json.dumps(review, indent=2))
@@ -1,31 +1,77 @@
 # ---------- Imports ----------
 
+import os
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Dict, NamedTuple, Optional
+
 import yfinance as yf
 from pacapicks.ai.assessment_schema import Fundamentals
+from pacapicks.io import metrics
+from pacapicks.io.cache import default_cache
+
+# Fields derived from quarterly_financials (a separate, slower yfinance request).
+QUARTERLY_FIELDS = ("revenue_yoy_pct_q",)
+
 
+def load_fundamentals_from_yfinance(ticker: str, cache=None) -> Fundamentals:
+    """
+    Load fundamentals for `ticker` from yfinance.
+    Args:
+        ticker (str): The stock symbol.
+        cache (FundamentalsCache | None | False): Cache to read through. None uses
+            the default on-disk cache; False bypasses caching entirely.
+    Returns:
+        Fundamentals: Parsed fundamentals, with any problems noted in `warnings`.
+    """
+    cache = default_cache() if cache is None else cache
+    cached = cache.get("yfinance", ticker) if cache else None
+    if cached is not None and not cached.stale:
+        return cached.fundamentals
 
-def load_fundamentals_from_yfinance(ticker: str) -> Fundamentals:
     yf_ticker = yf.Ticker(ticker)
     warnings = []
 
     try:
-        info = yf_ticker.info
+        with metrics.span("yfinance", "info", ticker):
+            info = yf_ticker.info
     except Exception as e:
         return Fundamentals(warnings=[f"Failed to fetch yfinance info: {e}"])
 
     try:
-        q_financials = yf_ticker.quarterly_financials.T.sort_index()
-        revenue_yoy_pct_q = None
-        if "Total Revenue" in q_financials.columns:
-            if len(q_financials) >= 5:
-                most_recent = q_financials["Total Revenue"].iloc[-1]
-                year_ago = q_financials["Total Revenue"].iloc[-5]
-                if year_ago != 0:
-                    revenue_yoy_pct_q = 100 * (most_recent - year_ago) / year_ago
-            else:
-                warnings.append("Not enough quarterly revenue data for YoY calc")
+        refreshed = None
+        if cached is not None and not cached.stale.intersection(QUARTERLY_FIELDS):
+            # Statements are still fresh; only the info-derived fields expired.
+            fiscal_period = cached.fiscal_period
+            revenue_yoy_pct_q = cached.fundamentals.revenue_yoy_pct_q
+            refreshed = set(cache.fields) - set(QUARTERLY_FIELDS)
         else:
-            warnings.append("'Total Revenue' not found in quarterly financials")
+            with metrics.span("yfinance", "quarterly_financials", ticker):
+                q_financials = yf_ticker.quarterly_financials.T.sort_index()
+            fiscal_period = (
+                str(q_financials.index[-1].date()) if len(q_financials) else None
+            )
+            revenue_yoy_pct_q = None
+            if "Total Revenue" in q_financials.columns:
+                if len(q_financials) >= 5:
+                    most_recent = q_financials["Total Revenue"].iloc[-1]
+                    year_ago = q_financials["Total Revenue"].iloc[-5]
+                    if year_ago != 0:
+                        revenue_yoy_pct_q = 100 * (most_recent - year_ago) / year_ago
+                else:
+                    warnings.append("Not enough quarterly revenue data for YoY calc")
+            else:
+                warnings.append("'Total Revenue' not found in quarterly financials")
 
         revenue_ttm_musd = info.get("totalRevenue")
         if revenue_ttm_musd:
@@ -59,7 +105,7 @@ def load_fundamentals_from_yfinance(ticker: str) -> Fundamentals:
         if market_cap_musd:
             market_cap_musd /= 1e6
 
-        return Fundamentals(
+        fundamentals = Fundamentals(
             revenue_yoy_pct_q=revenue_yoy_pct_q,
             revenue_yoy_pct_ttm=None,
             operating_margin_pct=operating_margin_pct,
@@ -72,6 +118,414 @@ def load_fundamentals_from_yfinance(ticker: str) -> Fundamentals:
             revenue_ttm_musd=revenue_ttm_musd,
             warnings=warnings,
         )
+        if cache:
+            cache.put(
+                "yfinance",
+                ticker,
+                fundamentals,
+                fiscal_period=fiscal_period,
+                fields=refreshed,
+            )
+        return fundamentals
 
     except Exception as e:
         return Fundamentals(warnings=[f"Error processing yfinance data: {e}"])
+
+
+# ---------- Hedged multi-provider resolution ----------
+
+# Relative disagreement (%) between providers worth a warning.
+CONFLICT_TOLERANCE_PCT = 10.0
+# Hedge deadline until enough latencies are observed to use their p90.
+DEFAULT_HEDGE_AFTER = 2.0
+HEDGE_QUANTILE = 0.9
+LATENCY_WINDOW = 256
+RESOLVE_TIMEOUT = 30.0
+MAX_WORKERS = 8
+
+VALUE_FIELDS = tuple(f for f in Fundamentals.model_fields if f != "warnings")
+
+
+def _fmp(ticker, cache=None):
+    from pacapicks.io.endpoints import fetch_fundamentals_fmp_free
+
+    return fetch_fundamentals_fmp_free(ticker, cache=cache)
+
+
+PROVIDERS = {"yfinance": load_fundamentals_from_yfinance, "fmp": _fmp}
+
+
+def is_empty(fundamentals) -> bool:
+    """True for None or a Fundamentals with no values (only warnings)."""
+    return fundamentals is None or all(
+        getattr(fundamentals, f) is None for f in VALUE_FIELDS
+    )
+
+
+def _missing(fundamentals):
+    return [f for f in VALUE_FIELDS if getattr(fundamentals, f) is None]
+
+
+class _Latencies:
+    """Rolling per-provider call latencies, for the adaptive hedge deadline."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def observe(self, provider, seconds):
+        with self._lock:
+            samples = self._samples.setdefault(provider, deque(maxlen=self.window))
+            samples.append(seconds)
+
+    def quantile(self, provider, q, default):
+        with self._lock:
+            samples = sorted(self._samples.get(provider, ()))
+        if len(samples) < 20:
+            return default
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+LATENCIES = _Latencies()
+_executor = None
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=4 * MAX_WORKERS, thread_name_prefix="fundamentals"
+        )
+    return _executor
+
+
+def merge_fundamentals(results) -> Fundamentals:
+    """
+    Merge provider results field by field.
+    Args:
+        results (list[tuple[str, Fundamentals | None]]): (provider, result) in
+            order of preference; earlier providers win where both have a value.
+    Returns:
+        Fundamentals: Gaps filled from later providers; disagreements beyond
+        CONFLICT_TOLERANCE_PCT and each provider's own warnings in `warnings`.
+    """
+    values, sources, warnings = {}, {}, []
+    for provider, result in results:
+        if result is None:
+            warnings.append(f"[{provider}] no data")
+            continue
+        warnings.extend(f"[{provider}] {w}" for w in result.warnings)
+        for field in VALUE_FIELDS:
+            value = getattr(result, field)
+            if value is None:
+                continue
+            if field not in values:
+                values[field], sources[field] = value, provider
+                continue
+            kept = values[field]
+            scale = max(abs(kept), abs(value))
+            if scale and 100 * abs(kept - value) / scale > CONFLICT_TOLERANCE_PCT:
+                warnings.append(
+                    f"Conflict on {field}: {sources[field]}={kept:.4g} vs "
+                    f"{provider}={value:.4g}; using {sources[field]}"
+                )
+    return Fundamentals(**values, warnings=warnings)
+
+
+def resolve_fundamentals(
+    ticker: str,
+    primary="yfinance",
+    secondary="fmp",
+    hedge_after=None,
+    timeout=RESOLVE_TIMEOUT,
+    cache=None,
+    providers=None,
+) -> Fundamentals:
+    """
+    Resolve fundamentals from two providers with a hedged request.
+
+    The primary is called first. The secondary is fired if the primary
+    hasn't answered by `hedge_after`, or if it answered with gaps or failed.
+    The first complete answer wins; otherwise whatever arrives before
+    `timeout` is merged field by field. A losing request that hasn't started
+    yet is cancelled; one already in flight is left to finish and warm the
+    cache, but is no longer waited for.
+    Args:
+        ticker (str): The stock symbol.
+        primary (str): Preferred provider (wins field conflicts).
+        secondary (str): Hedge provider.
+        hedge_after (float | None): Seconds before hedging; 0 fires both at
+            once; None uses the primary's observed p90 latency.
+        timeout (float): Overall deadline in seconds.
+        cache (FundamentalsCache | None | False): Passed to each provider.
+        providers (dict): name -> loader(ticker, cache=...) overrides.
+    Returns:
+        Fundamentals: Merged result; conflicts and failures noted in `warnings`.
+    """
+    loaders = {**PROVIDERS, **(providers or {})}
+    pool = _pool()
+    deadline = time.monotonic() + timeout
+    if hedge_after is None:
+        hedge_after = LATENCIES.quantile(primary, HEDGE_QUANTILE, DEFAULT_HEDGE_AFTER)
+
+    def call(provider):
+        start = time.monotonic()
+        try:
+            return loaders[provider](ticker, cache=cache)
+        finally:
+            LATENCIES.observe(provider, time.monotonic() - start)
+
+    futures = {pool.submit(call, primary): primary}
+    if hedge_after <= 0:
+        futures[pool.submit(call, secondary)] = secondary
+
+    results = {}
+    pending = set(futures)
+    hedged = len(futures) > 1
+    filling = False
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        wait_for = remaining if hedged else min(remaining, hedge_after)
+        done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                results[futures[future]] = future.result()
+            except Exception:
+                results[futures[future]] = None
+        usable = [r for r in results.values() if not is_empty(r)]
+        if any(not _missing(r) for r in usable):
+            break
+        if not hedged:
+            # Primary is slow, failed or came back with gaps: hedge now.
+            hedged = True
+            future = pool.submit(call, secondary)
+            futures[future] = secondary
+            pending.add(future)
+        if usable and not filling:
+            # We have an answer with gaps; give the other provider only its
+            # usual (p90) time to fill them rather than the full timeout.
+            filling = True
+            other = secondary if primary in results else primary
+            fill = LATENCIES.quantile(other, HEDGE_QUANTILE, DEFAULT_HEDGE_AFTER)
+            deadline = min(deadline, time.monotonic() + fill)
+
+    for future in pending:
+        future.cancel()
+
+    ordered = [(p, results[p]) for p in (primary, secondary) if p in results]
+    if pending:
+        complete = [r for _, r in ordered if not is_empty(r) and not _missing(r)]
+        if complete:
+            return complete[0]  # won the race; the loser has nothing to add
+    elif len(ordered) == 1 and ordered[0][1] is not None:
+        return ordered[0][1]
+    merged = merge_fundamentals(ordered)
+    # Still pending here means the deadline expired with gaps left.
+    timed_out = [futures[f] for f in pending]
+    if timed_out:
+        merged.warnings.append(f"Gave up waiting for {', '.join(timed_out)}")
+    return merged
+
+
+def resolve_fundamentals_many(tickers, max_workers=MAX_WORKERS, **kwargs):
+    """
+    resolve_fundamentals over many tickers, `max_workers` at a time.
+    Returns:
+        dict: ticker -> Fundamentals.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    workers = max(1, min(max_workers, len(tickers)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(lambda t: resolve_fundamentals(t, **kwargs), tickers)
+        return dict(zip(tickers, results))
+
+
+# ---------- Process-pool extraction ----------
+
+# Per-ticker deadline inside a worker (seconds); enforced with SIGALRM.
+TICKER_TIMEOUT = 60.0
+TASKS_PER_WORKER = 4  # chunks per worker, so stragglers don't idle the pool
+
+
+class FundamentalsRow(NamedTuple):
+    """
+    Compact, cheap-to-pickle result of one ticker's extraction: the
+    Fundamentals values as a plain tuple in VALUE_FIELDS order.
+    """
+
+    values: tuple
+    warnings: tuple = ()
+    error: Optional[str] = None
+
+    def fundamentals(self) -> Fundamentals:
+        return Fundamentals(
+            **dict(zip(VALUE_FIELDS, self.values)), warnings=list(self.warnings)
+        )
+
+    @classmethod
+    def from_model(cls, fundamentals: Fundamentals):
+        return cls(
+            tuple(getattr(fundamentals, f) for f in VALUE_FIELDS),
+            tuple(fundamentals.warnings),
+        )
+
+    @classmethod
+    def failed(cls, error):
+        return cls((None,) * len(VALUE_FIELDS), (), error)
+
+
+class _TickerTimeout(BaseException):
+    # Not an Exception, so the loaders' own `except Exception` can't swallow it.
+    pass
+
+
+def _alarm(signum, frame):
+    raise _TickerTimeout()
+
+
+def _load_chunk(tickers, cache, ticker_timeout):
+    """Worker task: load a chunk, isolating each ticker's failure or timeout."""
+    use_alarm = ticker_timeout and hasattr(signal, "setitimer")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _alarm)
+    out = []
+    for ticker in tickers:
+        try:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, ticker_timeout)
+            row = FundamentalsRow.from_model(
+                load_fundamentals_from_yfinance(ticker, cache=cache)
+            )
+        except _TickerTimeout:
+            row = FundamentalsRow.failed(f"timed out after {ticker_timeout}s")
+        except Exception as e:
+            row = FundamentalsRow.failed(f"{type(e).__name__}: {e}")
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        out.append((ticker, row))
+    return out
+
+
+def load_fundamentals_many(
+    tickers,
+    workers=None,
+    chunk_size=None,
+    cache=None,
+    ticker_timeout=TICKER_TIMEOUT,
+    timeout=None,
+    mp_context=None,
+) -> Dict[str, FundamentalsRow]:
+    """
+    Load yfinance fundamentals for a large universe on a process pool, so
+    DataFrame parsing runs on every core instead of behind one GIL.
+    Args:
+        tickers (list[str]): Symbols to load.
+        workers (int): Worker processes (default: os.cpu_count()).
+        chunk_size (int): Tickers per task (default: spread the universe over
+            TASKS_PER_WORKER tasks per worker).
+        cache (FundamentalsCache | None | False): As for
+            load_fundamentals_from_yfinance; each worker opens its own connection.
+        ticker_timeout (float): Per-ticker deadline inside the worker.
+        timeout (float): Overall deadline; tickers still pending get an error row.
+        mp_context: multiprocessing context (e.g. get_context("spawn")).
+    Returns:
+        dict: ticker -> FundamentalsRow (call .fundamentals() for the model).
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+    cache = default_cache() if cache is None else cache
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tickers)))
+    chunk_size = chunk_size or max(1, -(-len(tickers) // (workers * TASKS_PER_WORKER)))
+    chunks = [tickers[i : i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+
+    results = {}
+    timed_out = False
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+    try:
+        futures = {
+            pool.submit(_load_chunk, chunk, cache, ticker_timeout): chunk
+            for chunk in chunks
+        }
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                try:
+                    results.update(future.result())
+                except Exception as e:  # worker crashed (e.g. BrokenProcessPool)
+                    error = f"worker failed: {type(e).__name__}: {e}"
+                    for ticker in futures[future]:
+                        results[ticker] = FundamentalsRow.failed(error)
+        except FuturesTimeout:
+            timed_out = True
+    finally:
+        if timed_out:
+            # Workers stuck past the deadline would otherwise keep running (and
+            # keep the interpreter alive at exit); stop them outright.
+            for process in list((pool._processes or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    missing = FundamentalsRow.failed(f"not finished within {timeout}s")
+    return {t: results.get(t, missing) for t in tickers}
+
+
+if __name__ == "__main__":
+    # Tail latency: yfinance alone vs hedged with FMP, both with a heavy tail.
+    import random
+    import statistics
+
+    N = 400
+    FIELDS = {
+        "revenue_yoy_pct_q": 9.2,
+        "operating_margin_pct": 12.0,
+        "pe_ttm": 18.5,
+        "ps_ttm": 2.1,
+        "cash_reserves_musd": 500.0,
+        "total_debt_musd": 200.0,
+        "market_cap_musd": 1.2e4,
+    }
+
+    def flaky(p_slow, slow, fail_rate, gap_rate, empty):
+        def load(ticker, cache=None):
+            fast = random.uniform(0.02, 0.06)
+            time.sleep(slow if random.random() < p_slow else fast)
+            if random.random() < fail_rate:
+                return empty
+            fields = dict(FIELDS)
+            if random.random() < gap_rate:
+                fields["revenue_yoy_pct_q"] = None
+            return Fundamentals(**fields)
+
+        return load
+
+    fake = {
+        "yfinance": flaky(0.05, 1.5, 0.04, 0.1, Fundamentals(warnings=["failed"])),
+        "fmp": flaky(0.02, 1.0, 0.02, 0.3, None),
+    }
+
+    def run(label, resolve):
+        latencies, empty, gaps = [], 0, 0
+        for i in range(N):
+            start = time.perf_counter()
+            result = resolve(f"T{i:04d}")
+            latencies.append(time.perf_counter() - start)
+            empty += is_empty(result)
+            gaps += not is_empty(result) and bool(_missing(result))
+        q = statistics.quantiles(latencies, n=100)
+        print(
+            f"{label:22s} p50 {q[49] * 1e3:5.0f}ms  p99 {q[98] * 1e3:5.0f}ms  "
+            f"empty {empty}/{N}  with gaps {gaps}/{N}"
+        )
+
+    run("yfinance only", lambda t: fake["yfinance"](t))
+    for _ in range(50):  # warm the latency window
+        resolve_fundamentals("WARM", providers=fake)
+    run("hedged (adaptive p90)", lambda t: resolve_fundamentals(t, providers=fake))
+    run(
+        "both at once",
+        lambda t: resolve_fundamentals(t, providers=fake, hedge_after=0),
+    )
@@ -0,0 +1,526 @@
+"""
+Incremental refresh of the daily pipeline.
+
+Stages form a dependency graph:
+
+    positions ── quotes ──┬── technicals ────┐
+        │                 │                  ├── assessment
+        ├─────────────────┼── fundamentals ──┘
+        └─────────────────┴── review
+
+Each per-ticker stage keeps a RefreshRecord (when it ran, a fingerprint, the
+price at the time and its output) and re-runs a ticker only when:
+
+- it has never run, or its record is older than MAX_AGE[stage];
+- technicals / review: the price moved PRICE_MOVE_PCT or more since then;
+- fundamentals / assessment: Catalysts.next_earnings_date has passed since
+  then, so a new quarterly filing is due;
+- fundamentals: the statement fields in the fundamentals cache no longer
+  match the record's fingerprint (another job already fetched a new filing);
+- assessment: the fundamentals or technicals it was built on changed.
+
+Positions and quotes are fetched every run (one batched call each); the rest
+is skipped for names that didn't move, so a steady-state day touches only the
+handful that did.
+
+    python -m pacapicks.jobs.scheduler          # offline demo against fakes
+    pacapicks schedule --watch AAPL MSFT        # cron loop (APScheduler)
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from graphlib import TopologicalSorter
+from typing import Dict
+
+import numpy as np
+
+from pacapicks import broker, market_data
+from pacapicks.ai.assessment_schema import Fundamentals, Technicals
+from pacapicks.jobs.fundamentals import is_empty, load_fundamentals_from_yfinance
+from pacapicks.io.cache import (
+    FIELD_TTLS,
+    STATEMENT_TTL,
+    RefreshRecord,
+    default_cache,
+    default_refresh_log,
+)
+
+DAY = 24 * 3600
+PRICE_MOVE_PCT = 3.0
+MAX_AGE = {
+    "fundamentals": 7 * DAY,
+    "technicals": 5 * DAY,
+    "assessment": 7 * DAY,
+    "review": DAY,
+}
+BENCHMARK = "SPY"
+HISTORY_PERIOD = "1y"
+MAX_WORKERS = 8
+DEFAULT_CRON = "35 9 * * mon-fri"  # just after the US open
+DEFAULT_TIMEZONE = "America/New_York"
+
+STAGES = {
+    "positions": (),
+    "quotes": ("positions",),
+    "fundamentals": ("positions",),
+    "technicals": ("quotes",),
+    "assessment": ("fundamentals", "technicals"),
+    "review": ("positions", "quotes"),
+}
+
+# A new filing changes these; quote-derived fields (P/E, market cap) move with
+# every tick and are covered by the price-move trigger instead.
+STATEMENT_FIELDS = tuple(f for f, ttl in FIELD_TTLS.items() if ttl == STATEMENT_TTL)
+
+
+def fingerprint(obj) -> str:
+    canonical = json.dumps(obj, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def _statements_fingerprint(fundamentals) -> str:
+    return fingerprint({f: getattr(fundamentals, f) for f in STATEMENT_FIELDS})
+
+
+class IncrementalRun:
+    """
+    One pass over the stage graph for the held positions plus a watchlist.
+    Args:
+        watchlist (list[str]): Extra symbols to keep refreshed.
+        log (RefreshLog): Per-(stage, ticker) state (default: on-disk log).
+        now (float): Epoch seconds to treat as the current time.
+        price_move_pct (float): Move since the last run that forces a refresh.
+        fundamentals_loader: (ticker, cache=...) -> Fundamentals | None.
+        fundamentals_cache (FundamentalsCache | False): Passed to the loader and
+            checked for changed statements (default: the on-disk cache).
+        openai_client: AsyncOpenAI-compatible client for assessments.
+        response_cache (ResponseCache | None | False): As for assess_batch.
+        max_usd (float): Spend cap for the assessment stage.
+        assessment_options (dict): Extra assess_batch arguments (model, rate caps).
+        record (bool): Append refreshed data to the history store.
+        store (HistoryStore): Where to record (default: the on-disk store).
+    """
+
+    def __init__(
+        self,
+        watchlist=(),
+        log=None,
+        now=None,
+        price_move_pct=PRICE_MOVE_PCT,
+        fundamentals_loader=None,
+        fundamentals_cache=None,
+        openai_client=None,
+        response_cache=None,
+        max_usd=5.0,
+        assessment_options=None,
+        record=True,
+        store=None,
+    ):
+        self.watchlist = list(watchlist)
+        self.log = log or default_refresh_log()
+        self.now = time.time() if now is None else now
+        self.today = date.fromtimestamp(self.now)
+        self.price_move_pct = price_move_pct
+        self.fundamentals_loader = fundamentals_loader
+        self.fundamentals_cache = (
+            default_cache() if fundamentals_cache is None else fundamentals_cache
+        )
+        self.openai_client = openai_client
+        self.response_cache = response_cache
+        self.max_usd = max_usd
+        self.assessment_options = assessment_options or {}
+        self.record = record
+        self.store = store
+
+        self.positions = []
+        self.universe = []
+        self.quotes = {}
+        self.records = {}
+        self.report = {}
+
+    # ---------- Driver ----------
+
+    def run(self, stages=None) -> dict:
+        """
+        Run `stages` (default: all) plus whatever they depend on.
+        Returns:
+            dict: Per-stage counts of tickers run / skipped / failed, the
+            reasons they ran, and seconds spent.
+        """
+        wanted = set(stages or STAGES)
+        frontier = list(wanted)
+        while frontier:
+            for dep in STAGES[frontier.pop()]:
+                if dep not in wanted:
+                    wanted.add(dep)
+                    frontier.append(dep)
+
+        for stage in TopologicalSorter(STAGES).static_order():
+            if stage in wanted:
+                start = time.perf_counter()
+                getattr(self, f"_run_{stage}")()
+                self.report[stage]["seconds"] = time.perf_counter() - start
+        return self.report
+
+    def _note(self, stage, reasons, skipped, failed=None):
+        self.report[stage] = {
+            "ran": sorted(t for t in reasons if t not in (failed or {})),
+            "skipped": skipped,
+            "failed": failed or {},
+            "reasons": dict(Counter(reasons.values())),
+        }
+
+    # ---------- Triggers ----------
+
+    def _last(self, ticker):
+        return (self.quotes.get(ticker) or {}).get("last")
+
+    def _moved(self, ticker, record):
+        last = self._last(ticker)
+        if last is None or not record.ref_price:
+            return False
+        return abs(last / record.ref_price - 1) * 100 >= self.price_move_pct
+
+    def _earnings_passed(self, ticker, record):
+        evaluation = self._previous("assessment").get(ticker)
+        if evaluation is None:
+            return False
+        earnings = (evaluation.payload.get("catalysts") or {}).get("next_earnings_date")
+        if not earnings:
+            return False
+        earnings = date.fromisoformat(earnings)
+        return date.fromtimestamp(record.refreshed_at) < earnings <= self.today
+
+    def _statements_changed(self, ticker, record):
+        if not self.fundamentals_cache:
+            return False
+        cached = self.fundamentals_cache.get("yfinance", ticker)
+        if cached is None:
+            return False
+        return _statements_fingerprint(cached.fundamentals) != record.fingerprint
+
+    def _base_reason(self, stage, record):
+        if record is None:
+            return "new"
+        if self.now - record.refreshed_at >= MAX_AGE[stage]:
+            return "stale"
+        return None
+
+    def _previous(self, stage) -> Dict[str, RefreshRecord]:
+        if stage not in self.records:
+            self.records[stage] = self.log.stage(stage)
+        return self.records[stage]
+
+    def _save(self, stage, fresh):
+        self.log.put_many(stage, fresh)
+        self.records[stage] = {**self._previous(stage), **fresh}
+
+    # ---------- Stages ----------
+
+    def _run_positions(self):
+        self.positions = broker.get_positions()
+        held = [p["symbol"] for p in self.positions]
+        self.universe = list(dict.fromkeys(held + self.watchlist))
+        self._note("positions", {"*": "always"}, 0)
+
+    def _run_quotes(self):
+        self.quotes = market_data.snapshots(self.universe)
+        self._note("quotes", {"*": "always"}, 0)
+
+    def _run_fundamentals(self):
+        previous = self._previous("fundamentals")
+        dirty = {}
+        for ticker in self.universe:
+            record = previous.get(ticker)
+            reason = self._base_reason("fundamentals", record)
+            if reason is None and self._earnings_passed(ticker, record):
+                reason = "earnings"
+            if reason is None and self._statements_changed(ticker, record):
+                reason = "statements"
+            if reason:
+                dirty[ticker] = reason
+
+        loader = self.fundamentals_loader or load_fundamentals_from_yfinance
+
+        def load(ticker):
+            cache = self.fundamentals_cache
+            try:
+                if dirty[ticker] == "earnings" and cache:
+                    # The cached statements are the old quarter's; refetch and
+                    # re-cache so _statements_changed sees the new filing.
+                    cache.discard("yfinance", ticker)
+                return loader(ticker, cache=cache)
+            except Exception as e:
+                return e
+
+        fresh, failed = {}, {}
+        if dirty:
+            workers = max(1, min(MAX_WORKERS, len(dirty)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for ticker, result in zip(dirty, pool.map(load, dirty)):
+                    if isinstance(result, Exception) or is_empty(result):
+                        failed[ticker] = str(result) if result else "no data"
+                        continue
+                    fresh[ticker] = RefreshRecord(
+                        _statements_fingerprint(result),
+                        self.now,
+                        self._last(ticker),
+                        result.model_dump(mode="json"),
+                    )
+        self._save("fundamentals", fresh)
+        if self.record and fresh:
+            from pacapicks.io.history import record_fundamentals
+
+            record_fundamentals(
+                {t: Fundamentals.model_validate(r.payload) for t, r in fresh.items()},
+                as_of=self.today,
+                store=self.store,
+            )
+        self._note("fundamentals", dirty, len(self.universe) - len(dirty), failed)
+
+    def _run_technicals(self):
+        previous = self._previous("technicals")
+        dirty = {}
+        for ticker in self.universe:
+            record = previous.get(ticker)
+            reason = self._base_reason("technicals", record) or (
+                "price_move" if self._moved(ticker, record) else None
+            )
+            if reason:
+                dirty[ticker] = reason
+
+        fresh, failed = {}, {}
+        if dirty:
+            from pacapicks.logic.technicals import compute_technicals
+
+            bars = market_data.history(list(dirty) + [BENCHMARK], HISTORY_PERIOD)
+            row = {s: i for i, s in enumerate(bars["symbols"])}
+            benchmark = bars["close"][row[BENCHMARK]]
+            if np.isnan(benchmark).all():
+                benchmark = None
+            loaded = [t for t in dirty if not np.isnan(bars["close"][row[t]]).all()]
+            failed = {t: "no price history" for t in dirty if t not in loaded}
+            rows = [row[t] for t in loaded]
+            technicals = compute_technicals(
+                loaded,
+                bars["close"][rows],
+                bars["high"][rows],
+                bars["low"][rows],
+                bars["volume"][rows],
+                benchmark,
+            )
+            for ticker, tech in technicals.items():
+                payload = tech.model_dump(mode="json")
+                fresh[ticker] = RefreshRecord(
+                    fingerprint(payload),
+                    self.now,
+                    self._last(ticker) or float(bars["close"][row[ticker], -1]),
+                    payload,
+                )
+        self._save("technicals", fresh)
+        self._note("technicals", dirty, len(self.universe) - len(dirty), failed)
+
+    def _run_assessment(self):
+        from pacapicks.ai.batch_assessment import assess_batch
+
+        fundamentals = self._previous("fundamentals")
+        technicals = self._previous("technicals")
+        previous = self._previous("assessment")
+
+        inputs, dirty = {}, {}
+        for ticker in self.universe:
+            upstream = [
+                r.fingerprint if r else None
+                for r in (fundamentals.get(ticker), technicals.get(ticker))
+            ]
+            if upstream == [None, None]:
+                continue  # nothing to assess on yet
+            inputs[ticker] = fingerprint(upstream)
+            record = previous.get(ticker)
+            reason = self._base_reason("assessment", record)
+            if reason is None and record.fingerprint != inputs[ticker]:
+                reason = "inputs"
+            if reason is None and self._earnings_passed(ticker, record):
+                reason = "earnings"
+            if reason:
+                dirty[ticker] = reason
+
+        async def assess():
+            out = {}
+            async for ticker, result in assess_batch(
+                list(dirty),
+                fundamentals={
+                    t: Fundamentals.model_validate(fundamentals[t].payload)
+                    for t in dirty
+                    if t in fundamentals
+                },
+                technicals={
+                    t: Technicals.model_validate(technicals[t].payload)
+                    for t in dirty
+                    if t in technicals
+                },
+                max_usd=self.max_usd,
+                client=self.openai_client,
+                cache=self.response_cache,
+                as_of=self.today,
+                **self.assessment_options,
+            ):
+                out[ticker] = result
+            return out
+
+        fresh, failed, evaluations = {}, {}, []
+        if dirty:
+            for ticker, result in asyncio.run(assess()).items():
+                if isinstance(result, Exception):
+                    failed[ticker] = f"{type(result).__name__}: {result}"
+                    continue
+                evaluations.append(result)
+                fresh[ticker] = RefreshRecord(
+                    inputs[ticker],
+                    self.now,
+                    self._last(ticker),
+                    result.model_dump(mode="json"),
+                )
+        self._save("assessment", fresh)
+        if self.record and evaluations:
+            from pacapicks.io.history import record_evaluations
+
+            record_evaluations(evaluations, store=self.store)
+        self._note("assessment", dirty, len(self.universe) - len(dirty), failed)
+
+    def _run_review(self):
+        from pacapicks.jobs.daily_review import run_daily_review
+
+        record = self._previous("review").get("*")
+        held = [p["symbol"] for p in self.positions]
+        positions_fp = fingerprint(
+            sorted((p["symbol"], p["qty"]) for p in self.positions)
+        )
+
+        reason = self._base_reason("review", record)
+        if reason is None and record.fingerprint != positions_fp:
+            reason = "positions"
+        if reason is None:
+            prices = record.payload.get("prices", {})
+            for symbol in held:
+                last, ref = self._last(symbol), prices.get(symbol)
+                if last and ref and abs(last / ref - 1) * 100 >= self.price_move_pct:
+                    reason = "price_move"
+                    break
+
+        if reason:
+            review = run_daily_review(self.positions, {s: self.quotes[s] for s in held})
+            if self.record:
+                from pacapicks.io.history import record_daily_review
+
+                record_daily_review(review, as_of=self.today, store=self.store)
+            prices = {s: self._last(s) for s in held}
+            self._save(
+                "review",
+                {"*": RefreshRecord(positions_fp, self.now, None, {"prices": prices})},
+            )
+        self._note("review", {"*": reason} if reason else {}, 0 if reason else 1)
+
+
+def run_incremental(watchlist=(), stages=None, **kwargs) -> dict:
+    """Run the stage graph once; see IncrementalRun for options."""
+    return IncrementalRun(watchlist, **kwargs).run(stages)
+
+
+def serve(watchlist=(), cron=DEFAULT_CRON, timezone=DEFAULT_TIMEZONE, **kwargs):
+    """
+    Block, running run_incremental on a crontab schedule (APScheduler).
+    Missed runs are coalesced into one; a run never overlaps the previous.
+    """
+    from apscheduler.schedulers.blocking import BlockingScheduler
+    from apscheduler.triggers.cron import CronTrigger
+
+    def job():
+        report = run_incremental(watchlist, **kwargs)
+        print(json.dumps(summarize(report)))
+
+    scheduler = BlockingScheduler(timezone=timezone)
+    scheduler.add_job(
+        job,
+        CronTrigger.from_crontab(cron, timezone=timezone),
+        id="incremental",
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=3600,
+    )
+    scheduler.start()
+
+
+def summarize(report) -> dict:
+    """Compact view of a run report: stage -> ran/skipped/failed counts."""
+    return {
+        stage: {
+            "ran": len(r["ran"]),
+            "skipped": r["skipped"],
+            "failed": len(r["failed"]),
+            "reasons": r["reasons"],
+            "seconds": round(r.get("seconds", 0.0), 3),
+        }
+        for stage, r in report.items()
+    }
+
+
+if __name__ == "__main__":
+    # Offline demo: three simulated days against local fakes.
+    import os
+    import tempfile
+
+    from pacapicks import config
+    from pacapicks.bench.fakes import (
+        FakeOpenAI,
+        FakeYFinance,
+        StubServer,
+        alpaca_routes,
+        fake_evaluation,
+        patched_yfinance,
+        symbols,
+    )
+    from pacapicks.io import alpaca
+    from pacapicks.io.alpaca import AlpacaClient
+    from pacapicks.io.cache import RefreshLog
+
+    N_POSITIONS, N_WATCH = 20, 80
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["PACAPICKS_CACHE_DIR"] = os.path.join(tmp, "cache")
+        os.environ["PACAPICKS_DATA_DIR"] = os.path.join(tmp, "data")
+        config.reload()
+
+        fake_yf = FakeYFinance(latency=0.005)
+        fake_ai = FakeOpenAI(latency=0.05, output=fake_evaluation)
+        watchlist = symbols(N_POSITIONS + N_WATCH)[N_POSITIONS:]
+        log = RefreshLog(os.path.join(tmp, "refresh.sqlite"))
+
+        with StubServer(alpaca_routes(N_POSITIONS)) as stub, patched_yfinance(fake_yf):
+            alpaca.use_client(AlpacaClient(base_url=stub.url, headers={}))
+            start = time.time()
+            for day, moved in ((0, []), (1, []), (2, ["T0003", "T0042", "T0077"])):
+                for symbol in moved:
+                    fake_yf.move(symbol, 5.0)
+                before = (fake_yf.requests, fake_ai.requests)
+                report = run_incremental(
+                    watchlist,
+                    log=log,
+                    now=start + day * DAY,
+                    openai_client=fake_ai.as_async(),
+                    response_cache=False,
+                    assessment_options={"tokens_per_minute": 10_000_000},
+                )
+                print(f"day {day}: moved {moved or 'nothing'}")
+                for stage, summary in summarize(report).items():
+                    print(f"  {stage:12s} {summary}")
+                print(
+                    f"  yfinance requests {fake_yf.requests - before[0]}, "
+                    f"openai requests {fake_ai.requests - before[1]}"
+                )
+            alpaca.use_client(None)
@@ -0,0 +1,338 @@
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+
+from pacapicks.io.history import TICKER_DTYPE
+
+DEFAULT_HOLD_DAYS = 20  # Pick has no horizon; PersonalFit defaults to 30
+DEFAULT_STOP_PCT = 8.0
+MAX_HOLD_DAYS = 252
+
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+
+# Exit reasons.
+NOT_FILLED, STOP, TARGET, TIME = 0, 1, 2, 3
+EXIT_REASONS = {NOT_FILLED: "not_filled", STOP: "stop", TARGET: "target", TIME: "time"}
+
+
+class Recommendations(NamedTuple):
+    """Buy recommendations as aligned arrays; NaN where a level isn't set."""
+
+    ticker: np.ndarray
+    date: np.ndarray  # datetime64[D]; the trade can start the next session
+    entry: np.ndarray  # limit price; NaN = market at the next open
+    stop: np.ndarray
+    target: np.ndarray
+    stop_pct: np.ndarray  # used when no stop price
+    target_pct: np.ndarray  # used when no target price
+    hold_days: np.ndarray
+    conviction: np.ndarray
+
+    def __len__(self):
+        return len(self.ticker)
+
+
+class Trades(NamedTuple):
+    """Simulated outcome per recommendation (NaN/-1 where never filled)."""
+
+    entry_day: np.ndarray
+    entry_price: np.ndarray
+    exit_day: np.ndarray
+    exit_price: np.ndarray
+    exit_reason: np.ndarray
+    returns: np.ndarray
+
+
+def from_evaluations(rows: Dict[str, np.ndarray]) -> Recommendations:
+    """
+    Buy decisions from a HistoryStore "evaluations" query (columns only, no
+    JSON blobs needed).
+    """
+    buy = np.asarray(rows["recommendation"]) == "buy"
+    return Recommendations(
+        ticker=np.asarray(rows["ticker"], dtype=TICKER_DTYPE)[buy],
+        date=np.asarray(rows["date"], dtype="datetime64[D]")[buy],
+        entry=np.asarray(rows["entry_price"], dtype=np.float64)[buy],
+        stop=np.asarray(rows["stop_price"], dtype=np.float64)[buy],
+        target=np.asarray(rows["target_price"], dtype=np.float64)[buy],
+        stop_pct=np.asarray(rows["stop_loss_pct"], dtype=np.float64)[buy],
+        target_pct=np.asarray(rows["profit_target_pct"], dtype=np.float64)[buy],
+        hold_days=np.asarray(rows["time_horizon_days"], dtype=np.int64)[buy],
+        conviction=np.asarray(rows["conviction_1to5"], dtype=np.int64)[buy],
+    )
+
+
+def from_picks(picks, hold_days=DEFAULT_HOLD_DAYS, stop_pct=DEFAULT_STOP_PCT):
+    """
+    Market-entry recommendations from Picks (or their JSON dicts, e.g.
+    research_output.json). Picks carry no levels, so a percentage stop and a
+    fixed holding period are applied.
+    """
+    picks = [p if isinstance(p, dict) else p.model_dump(mode="json") for p in picks]
+    n = len(picks)
+    return Recommendations(
+        ticker=np.array([p["ticker"] for p in picks], dtype=TICKER_DTYPE),
+        date=np.array([p["as_of_date"] for p in picks], dtype="datetime64[D]"),
+        entry=np.full(n, np.nan),
+        stop=np.full(n, np.nan),
+        target=np.full(n, np.nan),
+        stop_pct=np.full(n, stop_pct, dtype=np.float64),
+        target_pct=np.full(n, np.nan),
+        hold_days=np.full(n, hold_days, dtype=np.int64),
+        conviction=np.array([p["conviction_score"] for p in picks], dtype=np.int64),
+    )
+
+
+def load_recommendations(store=None, picks_path=None, start=None, end=None):
+    """
+    Recommendations from local files only: the history store's evaluations
+    dataset and, if given, a saved Picks JSON file (research_output.json).
+    """
+    from pacapicks.io.history import default_store
+
+    parts = []
+    rows = (store or default_store()).query("evaluations", start, end)
+    if rows:
+        parts.append(from_evaluations(rows))
+    if picks_path:
+        with open(picks_path) as f:
+            parts.append(from_picks(json.load(f)))
+    if not parts:
+        return from_picks([])
+    return Recommendations(*(np.concatenate(cols) for cols in zip(*parts)))
+
+
+# ---------- Bars ----------
+
+
+def save_bars(path, bars):
+    """Save market_data.history() output as an .npz file."""
+    np.savez(
+        path,
+        symbols=np.asarray(bars["symbols"], dtype=TICKER_DTYPE),
+        dates=np.asarray(bars["dates"], dtype="datetime64[D]"),
+        **{f: np.asarray(bars[f], dtype=np.float64) for f in BAR_FIELDS},
+    )
+
+
+def load_bars(path):
+    """Bars saved by save_bars, in market_data.history() layout."""
+    with np.load(path) as data:
+        bars = {name: data[name] for name in ("dates", *BAR_FIELDS)}
+        bars["symbols"] = data["symbols"].tolist()
+    return bars
+
+
+# ---------- Simulation ----------
+
+
+def _first(mask):
+    """Index of the first True per row, or -1."""
+    hit = mask.any(axis=1)
+    return np.where(hit, mask.argmax(axis=1), -1)
+
+
+def simulate(recs: Recommendations, bars, stop_pct=None, hold_days=None) -> Trades:
+    """
+    Replay every recommendation against daily bars at once.
+
+    Trades start the session after the recommendation date. A limit entry
+    fills on the first bar trading through it (at the open if it gaps below);
+    otherwise entry is at that first open. After the fill, the first bar
+    whose low reaches the stop exits there (or at a lower open), the first
+    bar whose high reaches the target exits there (or at a higher open), and
+    the stop wins when both hit in one bar. Anything still open exits at the
+    close of the last day of the holding period.
+    Args:
+        recs (Recommendations): What to replay.
+        bars (dict): market_data.history() / load_bars() output.
+        stop_pct (float): Override every stop with this % below the fill.
+        hold_days (int): Override every holding period.
+    Returns:
+        Trades: one row per recommendation.
+    """
+    n = len(recs)
+    row_of = {s: i for i, s in enumerate(bars["symbols"])}
+    sym = np.array([row_of.get(t, -1) for t in recs.ticker.tolist()], dtype=np.int64)
+    n_days = len(bars["dates"])
+    start = np.searchsorted(bars["dates"], recs.date, side="right")
+
+    hold = np.asarray(recs.hold_days if hold_days is None else np.full(n, hold_days))
+    hold = np.clip(hold, 1, MAX_HOLD_DAYS)
+    width = int(hold.max()) if n else 1
+    offsets = np.arange(width)
+    days = start[:, None] + offsets
+    in_window = (offsets < hold[:, None]) & (days < n_days) & (sym[:, None] >= 0)
+    days = np.minimum(days, n_days - 1)
+    rows = np.maximum(sym, 0)[:, None]
+    o, h, l, c = (bars[f][rows, days] for f in ("open", "high", "low", "close"))
+    in_window &= ~np.isnan(o)
+
+    # Entry.
+    limit = recs.entry[:, None]
+    market = np.isnan(recs.entry)
+    touched = np.where(market[:, None], offsets == 0, l <= limit) & in_window
+    entry_off = _first(touched)
+    filled = entry_off >= 0
+    at = np.maximum(entry_off, 0)
+    idx = np.arange(n)
+    entry_price = np.where(market, o[idx, at], np.minimum(o[idx, at], recs.entry))
+    entry_price = np.where(filled, entry_price, np.nan)
+
+    # Exit levels: prices where given, else percentages of the fill.
+    if stop_pct is None:
+        stop = np.where(
+            np.isnan(recs.stop), entry_price * (1 - recs.stop_pct / 100), recs.stop
+        )
+    else:
+        stop = entry_price * (1 - stop_pct / 100)
+    target = np.where(
+        np.isnan(recs.target), entry_price * (1 + recs.target_pct / 100), recs.target
+    )
+
+    live = in_window & (offsets >= entry_off[:, None]) & filled[:, None]
+    with np.errstate(invalid="ignore"):
+        stop_hit = _first(live & (l <= stop[:, None]))
+        target_hit = _first(live & (h >= target[:, None]))
+    last = np.where(live.any(axis=1), width - 1 - live[:, ::-1].argmax(axis=1), 0)
+
+    stop_first = (stop_hit >= 0) & ((target_hit < 0) | (stop_hit <= target_hit))
+    target_first = (target_hit >= 0) & ~stop_first
+    exit_off = np.select([stop_first, target_first], [stop_hit, target_hit], last)
+    exit_open = o[idx, exit_off]
+    exit_price = np.select(
+        [stop_first, target_first],
+        [np.minimum(exit_open, stop), np.maximum(exit_open, target)],
+        c[idx, exit_off],
+    )
+    reason = np.select([stop_first, target_first], [STOP, TARGET], TIME)
+    reason = np.where(filled, reason, NOT_FILLED).astype(np.int8)
+
+    exit_price = np.where(filled, exit_price, np.nan)
+    return Trades(
+        entry_day=np.where(filled, start + entry_off, -1),
+        entry_price=entry_price,
+        exit_day=np.where(filled, start + exit_off, -1),
+        exit_price=exit_price,
+        exit_reason=reason,
+        returns=exit_price / entry_price - 1,
+    )
+
+
+def summarize(trades: Trades, recs: Optional[Recommendations] = None) -> dict:
+    """Fill rate, hit rates and returns, overall and per conviction score."""
+
+    def stats(mask):
+        filled = mask & (trades.exit_reason != NOT_FILLED)
+        returns = trades.returns[filled]
+        out = {
+            "n": int(mask.sum()),
+            "filled": int(filled.sum()),
+            "mean_return_pct": (
+                round(float(returns.mean()) * 100, 3) if len(returns) else None
+            ),
+            "win_rate": round(float((returns > 0).mean()), 3) if len(returns) else None,
+        }
+        for code, name in EXIT_REASONS.items():
+            if code != NOT_FILLED:
+                out[name] = int((filled & (trades.exit_reason == code)).sum())
+        return out
+
+    everything = np.ones(len(trades.returns), dtype=bool)
+    summary = {"all": stats(everything)}
+    if recs is not None:
+        for score in np.unique(recs.conviction).tolist():
+            summary[f"conviction_{score}"] = stats(recs.conviction == score)
+    return summary
+
+
+# ---------- Parameter sweeps ----------
+
+_worker_state = {}
+
+
+def _init_worker(recs, bars):
+    _worker_state["recs"], _worker_state["bars"] = recs, bars
+
+
+def _run_params(params):
+    stop_pct, hold_days = params
+    trades = simulate(_worker_state["recs"], _worker_state["bars"], stop_pct, hold_days)
+    return params, summarize(trades)["all"]
+
+
+def sweep(recs, bars, stop_pcts, hold_days, workers=None, mp_context=None):
+    """
+    Backtest every (stop %, holding period) combination on a process pool.
+    Recommendations and bars are sent once per worker, not once per task.
+    Returns:
+        dict: (stop_pct, hold_days) -> summarize()["all"] for that run.
+    """
+    grid = list(itertools.product(stop_pcts, hold_days))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(grid)))
+    if workers == 1:
+        _init_worker(recs, bars)
+        return dict(map(_run_params, grid))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(recs, bars),
+    ) as pool:
+        return dict(pool.map(_run_params, grid))
+
+
+if __name__ == "__main__":
+    # Benchmark: 10,000 recommendations over five years of bars for 500 names.
+    import time
+
+    N_SYMBOLS, N_DAYS, N_RECS = 500, 1260, 10_000
+    rng = np.random.default_rng(0)
+    dates = np.datetime64("2020-01-02") + np.arange(N_DAYS)
+    moves = rng.normal(0.0003, 0.02, (N_SYMBOLS, N_DAYS))
+    close = 20 * np.exp(np.cumsum(moves, axis=1))
+    open_ = close * np.exp(rng.normal(0, 0.005, close.shape))
+    spread = np.abs(rng.normal(0, 0.01, close.shape))
+    bars = {
+        "symbols": [f"T{i:03d}" for i in range(N_SYMBOLS)],
+        "dates": dates,
+        "open": open_,
+        "high": np.maximum(open_, close) * (1 + spread),
+        "low": np.minimum(open_, close) * (1 - spread),
+        "close": close,
+        "volume": np.full(close.shape, 1e6),
+    }
+
+    sym = rng.integers(0, N_SYMBOLS, N_RECS)
+    day = rng.integers(0, N_DAYS - 40, N_RECS)
+    ref = close[sym, day]
+    has_levels = rng.random(N_RECS) < 0.5
+    recs = Recommendations(
+        ticker=np.array(bars["symbols"], dtype=TICKER_DTYPE)[sym],
+        date=dates[day],
+        entry=np.where(has_levels, ref * 0.99, np.nan),
+        stop=np.where(has_levels, ref * 0.92, np.nan),
+        target=np.where(has_levels, ref * 1.15, np.nan),
+        stop_pct=np.full(N_RECS, DEFAULT_STOP_PCT),
+        target_pct=np.full(N_RECS, np.nan),
+        hold_days=rng.integers(5, 31, N_RECS),
+        conviction=rng.integers(1, 6, N_RECS),
+    )
+
+    start = time.perf_counter()
+    trades = simulate(recs, bars)
+    sim_s = time.perf_counter() - start
+    print(f"{N_RECS} recommendations, {N_DAYS} days: {sim_s * 1e3:.0f} ms")
+    print(json.dumps(summarize(trades, recs)["all"]))
+
+    start = time.perf_counter()
+    grid = sweep(recs, bars, stop_pcts=(4, 8, 12, 16), hold_days=(5, 10, 20, 30))
+    print(
+        f"16-point sweep on {os.cpu_count()} cores: {time.perf_counter() - start:.1f} s"
+    )
+    best = max(grid, key=lambda k: grid[k]["mean_return_pct"])
+    print(f"best stop/hold {best}: {grid[best]}")
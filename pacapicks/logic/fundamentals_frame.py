@@ -0,0 +1,321 @@
+import ast
+import operator
+from functools import lru_cache
+from typing import Dict, Iterable, Mapping
+
+import numpy as np
+
+from pacapicks.ai.assessment_schema import Fundamentals
+from pacapicks.io.history import TICKER_DTYPE
+
+# Stored columns, in Fundamentals field order; computed ones are derived.
+FIELDS = tuple(f for f in Fundamentals.model_fields if f != "warnings")
+COMPUTED = {
+    "net_debt_musd": lambda col: col("total_debt_musd") - col("cash_reserves_musd"),
+}
+
+
+class FundamentalsFrame:
+    """
+    Struct-of-arrays view of many tickers' Fundamentals.
+
+    Values live in one (fields x tickers) float64 block, so each column is a
+    contiguous view and the whole frame converts to pandas without a copy.
+    Missing values are NaN, with a per-column `valid` mask kept alongside;
+    computed fields (net debt) are vectorized over the columns.
+
+        frame = FundamentalsFrame.from_models(fundamentals_by_ticker)
+        cheap_growers = frame.filter("pe_ttm < 20 and revenue_yoy_pct_q > 15")
+    """
+
+    __slots__ = ("tickers", "data", "valid", "warnings")
+
+    def __init__(self, tickers, data, valid=None, warnings=None):
+        self.tickers = np.asarray(tickers, dtype=TICKER_DTYPE)
+        self.data = np.asarray(data, dtype=np.float64)
+        if self.data.shape != (len(FIELDS), len(self.tickers)):
+            raise ValueError(
+                f"data must be ({len(FIELDS)}, {len(self.tickers)}), "
+                f"got {self.data.shape}"
+            )
+        self.valid = ~np.isnan(self.data) if valid is None else valid
+        self.warnings = warnings
+
+    # ---------- Construction ----------
+
+    @classmethod
+    def from_models(cls, fundamentals: Mapping[str, Fundamentals]):
+        """Build from {ticker: Fundamentals} (warnings are kept per row)."""
+        tickers = list(fundamentals)
+        data = np.array(
+            [[getattr(fundamentals[t], f) for t in tickers] for f in FIELDS],
+            dtype=np.float64,
+        ).reshape(len(FIELDS), len(tickers))
+        warnings = [list(fundamentals[t].warnings) for t in tickers]
+        return cls(tickers, data, warnings=warnings)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Build from {ticker: FundamentalsRow} as returned by
+        load_fundamentals_many, without materialising any pydantic models.
+        """
+        tickers = list(rows)
+        values = [rows[t].values for t in tickers]
+        data = np.array(values, dtype=np.float64).reshape(len(tickers), len(FIELDS))
+        warnings = [list(rows[t].warnings) for t in tickers]
+        return cls(tickers, np.ascontiguousarray(data.T), warnings=warnings)
+
+    @classmethod
+    def from_columns(cls, tickers, columns: Mapping[str, Iterable]):
+        """
+        Build from column arrays, e.g. a HistoryStore "fundamentals" query.
+        Columns not given are all-missing; unknown columns are ignored.
+        """
+        tickers = np.asarray(tickers, dtype=TICKER_DTYPE)
+        data = np.full((len(FIELDS), len(tickers)), np.nan)
+        for i, field in enumerate(FIELDS):
+            if field in columns:
+                data[i] = np.asarray(columns[field], dtype=np.float64)
+        return cls(tickers, data)
+
+    # ---------- Access ----------
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, name):
+        return name in FIELDS or name in COMPUTED
+
+    def column(self, name) -> np.ndarray:
+        """A stored column (a view, not a copy) or a computed one."""
+        if name in COMPUTED:
+            return COMPUTED[name](self.column)
+        try:
+            return self.data[FIELDS.index(name)]
+        except ValueError:
+            raise KeyError(name) from None
+
+    __getitem__ = column
+
+    def mask(self, name) -> np.ndarray:
+        """True where `name` has a value."""
+        if name in COMPUTED:
+            return ~np.isnan(self.column(name))
+        return self.valid[FIELDS.index(name)]
+
+    def index(self) -> Dict[str, int]:
+        return {t: i for i, t in enumerate(self.tickers.tolist())}
+
+    @property
+    def nbytes(self) -> int:
+        return self.tickers.nbytes + self.data.nbytes + self.valid.nbytes
+
+    # ---------- Selection ----------
+
+    def take(self, rows) -> "FundamentalsFrame":
+        """Subset by integer positions or a boolean mask."""
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        warnings = [self.warnings[i] for i in rows] if self.warnings else None
+        return FundamentalsFrame(
+            self.tickers[rows], self.data[:, rows], self.valid[:, rows], warnings
+        )
+
+    def where(self, expr: str) -> np.ndarray:
+        """
+        Boolean mask for a filter expression over column names, e.g.
+        "pe_ttm < 20 and (revenue_yoy_pct_q > 15 or net_debt_musd < 0)".
+        Supports comparisons (chained too), and/or/not, + - * / and
+        `is None` / `is not None`. A missing value fails any comparison.
+        """
+        return np.broadcast_to(_compile(expr)(self), (len(self),))
+
+    def filter(self, expr: str) -> "FundamentalsFrame":
+        return self.take(self.where(expr))
+
+    # ---------- Export ----------
+
+    def to_models(self) -> Dict[str, Fundamentals]:
+        """Back to {ticker: Fundamentals}; validation runs once per row."""
+        out = {}
+        values = np.where(self.valid, self.data, np.nan).T.tolist()
+        for i, (ticker, row) in enumerate(zip(self.tickers.tolist(), values)):
+            fields = {f: v for f, v in zip(FIELDS, row) if v == v}
+            warnings = self.warnings[i] if self.warnings else []
+            out[ticker] = Fundamentals(**fields, warnings=warnings)
+        return out
+
+    def to_pandas(self, computed=False):
+        """
+        DataFrame indexed by ticker, sharing memory with this frame (missing
+        values are NaN). With computed=True the derived columns are appended,
+        which needs a copy.
+        """
+        import pandas as pd
+
+        df = pd.DataFrame(
+            self.data.T,
+            index=pd.Index(self.tickers, name="ticker"),
+            columns=list(FIELDS),
+            copy=False,
+        )
+        if computed:
+            df = df.assign(**{name: self.column(name) for name in COMPUTED})
+        return df
+
+    def to_arrow(self):
+        """pyarrow Table; value buffers are shared, masks become validity bitmaps."""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("FundamentalsFrame.to_arrow requires pyarrow") from e
+
+        arrays = [pa.array(self.tickers.astype(object))]
+        arrays += [
+            pa.array(self.data[i], mask=~self.valid[i]) for i in range(len(FIELDS))
+        ]
+        return pa.Table.from_arrays(arrays, names=["ticker", *FIELDS])
+
+
+# ---------- Filter expressions ----------
+
+_COMPARE = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+_ARITHMETIC = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+
+def _is_none(node):
+    return isinstance(node, ast.Constant) and node.value is None
+
+
+@lru_cache(maxsize=256)
+def _compile(expr):
+    """Parse `expr` once into a closure evaluating it against a frame."""
+    tree = ast.parse(expr, mode="eval").body
+
+    def build(node):
+        if isinstance(node, ast.BoolOp):
+            parts = [build(v) for v in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return lambda f: combine.reduce([p(f) for p in parts])
+        if isinstance(node, ast.UnaryOp):
+            inner = build(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda f: ~np.asarray(inner(f), dtype=bool)
+            if isinstance(node.op, ast.USub):
+                return lambda f: -inner(f)
+        if isinstance(node, ast.Compare):
+            return build_compare(node)
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+            op = _ARITHMETIC[type(node.op)]
+            left, right = build(node.left), build(node.right)
+            return lambda f: op(left(f), right(f))
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name not in FIELDS and name not in COMPUTED:
+                raise ValueError(f"Unknown column {name!r} in {expr!r}")
+            return lambda f: f.column(name)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            value = float(node.value)
+            return lambda f: value
+        raise ValueError(f"Unsupported syntax in filter {expr!r}: {ast.dump(node)}")
+
+    def build_compare(node):
+        if len(node.ops) == 1 and isinstance(node.ops[0], (ast.Is, ast.IsNot)):
+            if not _is_none(node.comparators[0]):
+                raise ValueError(f"Only 'is None' / 'is not None' in {expr!r}")
+            value = build(node.left)
+            missing = isinstance(node.ops[0], ast.Is)
+            return lambda f: np.isnan(value(f)) == missing
+        operands = [build(node.left)] + [build(c) for c in node.comparators]
+        ops = []
+        for op in node.ops:
+            if type(op) not in _COMPARE:
+                raise ValueError(f"Unsupported comparison in {expr!r}")
+            ops.append(_COMPARE[type(op)])
+
+        def compare(f):
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values = [operand(f) for operand in operands]
+                result = ops[0](values[0], values[1])
+                for op, left, right in zip(ops[1:], values[1:], values[2:]):
+                    result = result & op(left, right)
+            return result
+
+        return compare
+
+    return build(tree)
+
+
+if __name__ == "__main__":
+    # Benchmark: filter 10,000 tickers as a frame vs a loop over models.
+    import time
+    import tracemalloc
+
+    N = 10_000
+    EXPR = "pe_ttm < 20 and revenue_yoy_pct_q > 15"
+    rng = np.random.default_rng(0)
+
+    def maybe(values, p_missing=0.1):
+        return [None if rng.random() < p_missing else float(v) for v in values]
+
+    raw = {
+        "revenue_yoy_pct_q": maybe(rng.normal(10, 20, N)),
+        "operating_margin_pct": maybe(rng.uniform(-50, 50, N)),
+        "pe_ttm": maybe(rng.uniform(1, 80, N)),
+        "ps_ttm": maybe(rng.uniform(0.1, 20, N)),
+        "cash_reserves_musd": maybe(rng.uniform(0, 5000, N)),
+        "total_debt_musd": maybe(rng.uniform(0, 5000, N)),
+        "market_cap_musd": maybe(rng.uniform(50, 50000, N)),
+    }
+    tickers = [f"T{i:05d}" for i in range(N)]
+
+    tracemalloc.start()
+    models = {
+        t: Fundamentals(**{k: v[i] for k, v in raw.items()})
+        for i, t in enumerate(tickers)
+    }
+    models_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    frame = FundamentalsFrame.from_models(models)
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    start = time.perf_counter()
+    slow = [
+        t
+        for t, m in models.items()
+        if m.pe_ttm is not None
+        and m.pe_ttm < 20
+        and m.revenue_yoy_pct_q is not None
+        and m.revenue_yoy_pct_q > 15
+    ]
+    loop_ms = (time.perf_counter() - start) * 1e3
+
+    frame.where(EXPR)  # compile once
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        hits = frame.where(EXPR)
+    frame_ms = (time.perf_counter() - start) * 1e3 / runs
+
+    assert frame.tickers[hits].tolist() == slow
+    print(f"{len(slow)} of {N} match {EXPR!r}")
+    print(
+        f"models loop {loop_ms:.2f} ms; frame {frame_ms:.3f} ms ({build_ms:.0f} ms build)"
+    )
+    print(f"memory: models {models_mb:.1f} MB; frame {frame.nbytes / 1e6:.2f} MB")
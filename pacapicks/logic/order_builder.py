@@ -1,8 +1,172 @@
+from typing import Dict, List, Mapping, NamedTuple
+
+import numpy as np
+
+
 def shares_for_pct(portfolio_value, price, pct):
     target_value = portfolio_value * (pct / 100)
     return max(1, int(target_value // price))
 
 
-def guardrails(order, max_pos_pct, existing_pos_pct):
-    # e.g., block if would exceed max position size or too illiquid
-    return existing_pos_pct + order["target_pct"] <= max_pos_pct
+MAX_PORTFOLIO_VOL_PCT = 25.0  # annualized, see logic.risk
+
+
+def guardrails(
+    order, max_pos_pct, existing_pos_pct, risk=None, max_vol_pct=MAX_PORTFOLIO_VOL_PCT
+):
+    """
+    Whether an order may go ahead.
+    Args:
+        order (dict): Needs "target_pct" (and "symbol" when `risk` is given).
+        max_pos_pct (float): Cap on the position after the order, % of equity.
+        existing_pos_pct (float): Position held now, % of equity.
+        risk (PortfolioRisk): The current book from RiskEngine.portfolio(); if
+            given, orders that would lift portfolio vol past `max_vol_pct` are
+            blocked (orders that lower it always pass; symbols without enough
+            history are judged on position size alone).
+        max_vol_pct (float): Cap on annualized portfolio volatility, %.
+    """
+    if existing_pos_pct + order["target_pct"] > max_pos_pct:
+        return False
+    if risk is not None:
+        after = risk.marginal(order["symbol"], order["target_pct"])
+        if np.isfinite(after) and after > max(max_vol_pct, risk.vol_pct):
+            return False
+    return True
+
+
+# ---------- Whole-portfolio rebalancing ----------
+
+MAX_POS_PCT = 10.0  # of equity, per name
+MAX_ADV_PCT = 5.0  # of 20d average daily dollar volume, per order
+CASH_BUFFER_PCT = 1.0  # of equity, never spent on buys
+MIN_TRADE_USD = 50.0
+
+
+class Rebalance(NamedTuple):
+    orders: List[dict]  # place_orders() batch; it fills the sells before buying
+    delta: np.ndarray  # signed share change per symbol
+    capped: Dict[str, np.ndarray]  # guardrail -> symbols it limited
+
+
+def align(positions, targets: Mapping[str, float]):
+    """
+    Line up Alpaca positions with target weights over the union of symbols;
+    held names missing from `targets` get a 0% target.
+    Returns:
+        tuple: (symbols, target_pct, current_qty)
+    """
+    held = {p["symbol"]: float(p["qty"]) for p in positions}
+    symbols = list(dict.fromkeys([*held, *targets]))
+    target_pct = np.array([targets.get(s, 0.0) for s in symbols], dtype=np.float64)
+    current_qty = np.array([held.get(s, 0.0) for s in symbols], dtype=np.float64)
+    return symbols, target_pct, current_qty
+
+
+def rebalance(
+    symbols,
+    target_pct,
+    current_qty,
+    prices,
+    cash,
+    adv_musd=None,
+    max_pos_pct=MAX_POS_PCT,
+    max_adv_pct=MAX_ADV_PCT,
+    cash_buffer_pct=CASH_BUFFER_PCT,
+    min_trade_usd=MIN_TRADE_USD,
+) -> Rebalance:
+    """
+    Orders moving the whole book to target weights in one vectorized pass.
+    Args:
+        symbols (list[str]): One entry per row of the arrays below.
+        target_pct (array): Target weight per symbol, % of equity.
+        current_qty (array): Shares held now (0 for new names).
+        prices (array): Last price; NaN or <= 0 leaves the symbol untouched.
+        cash (float): Cash available before trading.
+        adv_musd (array): 20d average daily dollar volume ($M); NaN if unknown.
+        max_pos_pct (float): Cap on any one target weight.
+        max_adv_pct (float): Cap on an order's notional as % of ADV.
+        cash_buffer_pct (float): Equity kept back from buys.
+        min_trade_usd (float): Orders smaller than this are dropped.
+    Returns:
+        Rebalance: orders (sells first, then buys, largest first within each),
+        the share deltas, and which symbols each guardrail limited.
+    """
+    target_pct = np.asarray(target_pct, dtype=np.float64)
+    current_qty = np.asarray(current_qty, dtype=np.float64)
+    prices = np.asarray(prices, dtype=np.float64)
+    tradable = np.isfinite(prices) & (prices > 0)
+    price = np.where(tradable, prices, 1.0)
+
+    equity = cash + np.sum(current_qty * price, where=tradable)
+    pct = np.clip(target_pct, 0.0, None)
+    capped = {"position": pct > max_pos_pct}
+    pct = np.minimum(pct, max_pos_pct)
+    target_qty = np.floor(equity * pct / 100 / price)
+    delta = np.where(tradable, target_qty - current_qty, 0.0)
+
+    # Liquidity: no single order above max_adv_pct of a day's dollar volume.
+    if adv_musd is not None:
+        adv = np.asarray(adv_musd, dtype=np.float64) * 1e6
+        limit = np.floor(
+            np.where(np.isnan(adv), np.inf, adv * max_adv_pct / 100) / price
+        )
+        capped["liquidity"] = np.abs(delta) > limit
+        delta = np.clip(delta, -limit, limit)
+
+    # Cash: buys are funded by cash plus sell proceeds, scaled down pro rata.
+    # That relies on the sells filling first, which place_orders() ensures.
+    delta[np.abs(delta) * price < min_trade_usd] = 0.0
+    sells = delta < 0
+    buys = delta > 0
+    budget = cash - equity * cash_buffer_pct / 100 - np.sum(delta * price, where=sells)
+    cost = np.sum(delta * price, where=buys)
+    capped["cash"] = buys & (cost > budget)
+    if cost > budget:
+        scale = max(budget, 0.0) / cost
+        delta = np.where(buys, np.floor(delta * scale), delta)
+
+    delta[np.abs(delta) * price < min_trade_usd] = 0.0
+    notional = np.abs(delta) * price
+    sell_rows = np.flatnonzero(delta < 0)
+    buy_rows = np.flatnonzero(delta > 0)
+    sell_rows = sell_rows[np.argsort(-notional[sell_rows], kind="stable")]
+    buy_rows = buy_rows[np.argsort(-notional[buy_rows], kind="stable")]
+
+    # Sells may be fractional (unwinding fractional holdings); buys are whole shares.
+    orders = [
+        {"symbol": symbols[i], "qty": float(-delta[i]), "side": "sell"}
+        for i in sell_rows.tolist()
+    ]
+    orders += [
+        {"symbol": symbols[i], "qty": int(delta[i]), "side": "buy"}
+        for i in buy_rows.tolist()
+    ]
+    return Rebalance(orders, delta, capped)
+
+
+if __name__ == "__main__":
+    # Benchmark: rebalance a 1,000-name book.
+    import time
+
+    N = 1_000
+    rng = np.random.default_rng(0)
+    symbols = [f"T{i:04d}" for i in range(N)]
+    prices = rng.uniform(2, 300, N)
+    current_qty = np.where(rng.random(N) < 0.5, np.floor(rng.uniform(0, 500, N)), 0)
+    target_pct = rng.dirichlet(np.ones(N)) * 100
+    adv_musd = np.where(rng.random(N) < 0.2, np.nan, rng.uniform(0.05, 50, N))
+
+    rebalance(symbols, target_pct, current_qty, prices, 50_000.0, adv_musd)
+    runs = 100
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = rebalance(symbols, target_pct, current_qty, prices, 50_000.0, adv_musd)
+    ms = (time.perf_counter() - start) * 1e3 / runs
+
+    sides = [o["side"] for o in result.orders]
+    spent = float(np.sum(result.delta * prices))
+    assert spent <= 50_000.0, "buys must be funded by cash plus sells"
+    assert sides == sorted(sides, reverse=True), "sells must precede buys"
+    print(f"{N} names -> {len(result.orders)} orders in {ms:.2f} ms")
+    print({name: int(mask.sum()) for name, mask in result.capped.items()})
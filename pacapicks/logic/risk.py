@@ -0,0 +1,353 @@
+"""
+Rolling portfolio risk over a window of daily returns.
+
+    risk = RiskEngine.from_bars(market_data.history([*held, *candidates, "SPY"]))
+    risk.update(closes)                      # one daily bar, O(n^2), no history scan
+    book = risk.portfolio({"AAPL": 6.0, "MSFT": 4.5})
+    book.vol_pct, book.var_pct(), book.contributions()
+    book.marginal("NVDA", 3.0)               # portfolio vol after +3% NVDA, O(1)
+
+The engine keeps the window's returns in a ring buffer plus running sums of
+returns and of their cross products, so each new bar adds one row and drops
+the oldest with a rank-2 update instead of re-reading the history. Missing
+returns count as 0 (no move), and the next close is measured from the last
+one seen, whether seeded or updated; symbols with fewer than MIN_OBS real
+returns in the window report NaN.
+"""
+
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from pacapicks.logic.technicals import BETA_WINDOW
+
+TRADING_DAYS = 252
+MIN_OBS = 20
+VAR_CONFIDENCE = 0.95
+
+
+def _carried(close):
+    """
+    Each day's close, or the last usable (finite, positive) one before it,
+    per row of a (symbols x days) array; NaN until a row first trades.
+    """
+    usable = np.isfinite(close) & (close > 0)
+    idx = np.where(usable, np.arange(close.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    rows = np.arange(close.shape[0])[:, None]
+    return np.where(usable[rows, idx], close[rows, idx], np.nan)
+
+
+class RiskEngine:
+    """
+    Covariance, beta, volatility and historical VaR for a fixed set of
+    symbols over the last `window` daily returns, updated one bar at a time.
+    """
+
+    def __init__(self, symbols, window=BETA_WINDOW, benchmark: Optional[str] = "SPY"):
+        self.window = window
+        self.benchmark = benchmark
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        n = 0
+        self._returns = np.zeros((window, n))  # ring buffer, NaN stored as 0
+        self._valid = np.zeros((window, n), dtype=bool)
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))  # sum of outer(r, r) over the window
+        self._obs = np.zeros(n, dtype=np.int64)
+        self._last = np.zeros(n)
+        self._pos = 0  # next row of the ring buffer
+        self._count = 0  # rows filled, <= window
+        self._cov = None
+        self.add(symbols)
+
+    # ---------- Symbols ----------
+
+    def add(self, symbols):
+        """Track more symbols; they start with no history in the window."""
+        new = [s for s in dict.fromkeys(symbols) if s not in self._index]
+        if not new:
+            return
+        k = len(new)
+        for s in new:
+            self._index[s] = len(self.symbols)
+            self.symbols.append(s)
+        self._returns = np.pad(self._returns, ((0, 0), (0, k)))
+        self._valid = np.pad(self._valid, ((0, 0), (0, k)))
+        self._sum = np.pad(self._sum, (0, k))
+        self._cross = np.pad(self._cross, ((0, k), (0, k)))
+        self._obs = np.pad(self._obs, (0, k))
+        self._last = np.pad(self._last, (0, k), constant_values=np.nan)
+        self._cov = None
+
+    def __contains__(self, symbol):
+        return symbol in self._index
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def _align(self, values) -> np.ndarray:
+        """Mapping symbol -> value (or an array in self.symbols order) as an array."""
+        if isinstance(values, Mapping):
+            out = np.full(len(self.symbols), np.nan)
+            for s, v in values.items():
+                i = self._index.get(s)
+                if i is not None:
+                    out[i] = v
+            return out
+        return np.asarray(values, dtype=np.float64)
+
+    # ---------- Updates ----------
+
+    @classmethod
+    def from_bars(cls, bars, window=BETA_WINDOW, benchmark="SPY") -> "RiskEngine":
+        """Seed an engine from market_data.history() output in one pass."""
+        engine = cls(bars["symbols"], window=window, benchmark=benchmark)
+        close = np.asarray(bars["close"], dtype=np.float64)
+        engine.seed(close)
+        return engine
+
+    def seed(self, close):
+        """Replace the window with the returns of a (symbols x days) close array."""
+        close = np.asarray(close, dtype=np.float64)
+        # Like update(): a return after a missing close spans the gap.
+        carried = _carried(close)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = (close[:, 1:] / carried[:, :-1] - 1.0).T[-self.window :]
+        valid = np.isfinite(r)
+        m = len(r)
+        self._returns[:] = 0.0
+        self._valid[:] = False
+        self._returns[:m] = np.where(valid, r, 0.0)
+        self._valid[:m] = valid
+        self._count = m
+        self._pos = m % self.window
+        self._last = carried[:, -1] if close.shape[1] else np.full(len(close), np.nan)
+        self._refresh()
+
+    def _refresh(self):
+        """Recompute the running sums from the buffer (bounds float drift)."""
+        rows = (
+            self._returns[: self._count] if self._count < self.window else self._returns
+        )
+        self._sum = rows.sum(axis=0)
+        self._cross = rows.T @ rows
+        self._obs = self._valid.sum(axis=0)
+        self._cov = None
+
+    def update(self, close):
+        """
+        Add one daily bar.
+        Args:
+            close (Mapping | array): Closing price per symbol; NaN or missing
+                symbols didn't trade (their next close spans the gap).
+        """
+        close = self._align(close)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = close / self._last - 1.0
+        valid = np.isfinite(r)
+        new = np.where(valid, r, 0.0)
+        self._last = np.where(np.isfinite(close) & (close > 0), close, self._last)
+
+        pos = self._pos
+        if self._count == self.window:
+            old = self._returns[pos]
+            # cross += outer(new, new) - outer(old, old), as one matmul
+            self._cross += np.stack([new, old]).T @ np.stack([new, -old])
+            self._sum += new - old
+            self._obs += valid.astype(np.int64) - self._valid[pos]
+        else:
+            self._cross += np.outer(new, new)
+            self._sum += new
+            self._obs += valid
+            self._count += 1
+        self._returns[pos] = new
+        self._valid[pos] = valid
+        self._pos = (pos + 1) % self.window
+        self._cov = None
+        if self._pos == 0:
+            self._refresh()
+
+    # ---------- Per-symbol statistics (daily, unless noted) ----------
+
+    def _enough(self):
+        return (self._obs >= MIN_OBS) & (self._count > 1)
+
+    def _variance(self):
+        m = max(self._count, 2)
+        var = (np.diag(self._cross) - self._sum**2 / m) / (m - 1)
+        return np.where(self._enough(), np.maximum(var, 0.0), np.nan)
+
+    def covariance(self) -> np.ndarray:
+        """Daily return covariance (symbols x symbols), cached until the next bar."""
+        if self._cov is None:
+            m = max(self._count, 2)
+            cov = (self._cross - np.outer(self._sum, self._sum) / m) / (m - 1)
+            ok = self._enough()
+            cov[~ok, :] = np.nan
+            cov[:, ~ok] = np.nan
+            self._cov = cov
+        return self._cov
+
+    def _cov_with(self, w):
+        """covariance() @ w without forming the matrix (w has no NaNs)."""
+        m = max(self._count, 2)
+        return (self._cross @ w - self._sum * (self._sum @ w) / m) / (m - 1)
+
+    def volatility_pct(self) -> np.ndarray:
+        """Annualized volatility per symbol, in %."""
+        return np.sqrt(self._variance() * TRADING_DAYS) * 100
+
+    def beta(self) -> np.ndarray:
+        """Beta of each symbol against the benchmark (NaN without one)."""
+        b = self._index.get(self.benchmark)
+        if b is None:
+            return np.full(len(self.symbols), np.nan)
+        m = max(self._count, 2)
+        cov_b = (self._cross[:, b] - self._sum * self._sum[b] / m) / (m - 1)
+        var_b = self._variance()[b]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            beta = cov_b / var_b
+        return np.where(self._enough() & (var_b > 0), beta, np.nan)
+
+    def var_pct(self, confidence=VAR_CONFIDENCE) -> np.ndarray:
+        """One-day historical VaR per symbol, as a positive % loss."""
+        ok = self._enough()
+        out = np.full(len(self.symbols), np.nan)
+        if ok.any():
+            rows = slice(0, self._count)
+            r = np.where(self._valid[rows], self._returns[rows], np.nan)[:, ok]
+            out[ok] = -np.nanquantile(r, 1 - confidence, axis=0) * 100
+        return out
+
+    def stats(self) -> Dict[str, dict]:
+        """{symbol: {"vol_pct", "beta", "var_pct"}} for every tracked symbol."""
+        vol, beta, var = self.volatility_pct(), self.beta(), self.var_pct()
+        return {
+            s: {
+                "vol_pct": float(vol[i]),
+                "beta": float(beta[i]),
+                "var_pct": float(var[i]),
+            }
+            for i, s in enumerate(self.symbols)
+        }
+
+    # ---------- Portfolios ----------
+
+    def portfolio(self, weights) -> "PortfolioRisk":
+        """
+        Risk of a book, ready for per-order marginal queries.
+        Args:
+            weights (Mapping | array): % of equity per symbol (untracked
+                symbols in a mapping are ignored).
+        """
+        return PortfolioRisk(self, self._align(weights))
+
+
+class PortfolioRisk:
+    """
+    One book's risk. Holds covariance @ weights, so marginal() answers
+    "what if this order fills" for any symbol in constant time.
+    """
+
+    def __init__(self, engine: RiskEngine, weights_pct):
+        self.engine = engine
+        w = np.nan_to_num(np.asarray(weights_pct, dtype=np.float64)) / 100
+        known = engine._enough()
+        self.uncovered = [engine.symbols[i] for i in np.flatnonzero((w != 0) & ~known)]
+        self.w = np.where(known, w, 0.0)
+        self._sigma_w = self.engine._cov_with(self.w)
+        self.variance = max(float(self.w @ self._sigma_w), 0.0)  # daily
+
+    @property
+    def vol_pct(self) -> float:
+        """Annualized portfolio volatility, in %."""
+        return float(np.sqrt(self.variance * TRADING_DAYS) * 100)
+
+    @property
+    def beta(self) -> float:
+        beta = self.engine.beta()
+        return float(np.nansum(self.w * beta)) if np.isfinite(beta).any() else np.nan
+
+    def var_pct(self, confidence=VAR_CONFIDENCE) -> float:
+        """One-day historical VaR of the book, as a positive % loss."""
+        e = self.engine
+        if e._count == 0:
+            return np.nan
+        pnl = e._returns[: e._count] @ self.w
+        return float(-np.quantile(pnl, 1 - confidence) * 100)
+
+    def contributions(self) -> Dict[str, float]:
+        """Each holding's share of vol_pct (they sum to vol_pct)."""
+        if self.variance <= 0:
+            return {}
+        share = self.w * self._sigma_w / self.variance * self.vol_pct
+        return {self.engine.symbols[i]: float(share[i]) for i in np.flatnonzero(self.w)}
+
+    def marginal(self, symbol, delta_pct) -> float:
+        """
+        Annualized portfolio vol (%) after moving `symbol`'s weight by
+        `delta_pct` points of equity; NaN if the symbol lacks history.
+        """
+        e = self.engine
+        i = e._index.get(symbol)
+        if i is None or not e._enough()[i]:
+            return np.nan
+        d = delta_pct / 100
+        m = max(e._count, 2)
+        var_i = (e._cross[i, i] - e._sum[i] ** 2 / m) / (m - 1)
+        variance = self.variance + 2 * d * self._sigma_w[i] + d * d * var_i
+        return float(np.sqrt(max(variance, 0.0) * TRADING_DAYS) * 100)
+
+
+if __name__ == "__main__":
+    # Benchmark: daily updates and risk queries over 1,000 symbols.
+    import time
+
+    N, DAYS, WINDOW, UPDATES = 1_000, 300, 252, 50
+    rng = np.random.default_rng(0)
+    market = rng.normal(0.0004, 0.01, DAYS + UPDATES)
+    betas = rng.uniform(0.3, 1.8, N)
+    rets = betas[:, None] * market + rng.normal(0, 0.015, (N, DAYS + UPDATES))
+    rets = np.vstack([rets, market])
+    close = 50 * np.cumprod(1 + rets, axis=1)
+    symbols = [f"T{i:04d}" for i in range(N)] + ["SPY"]
+
+    start = time.perf_counter()
+    engine = RiskEngine.from_bars(
+        {"symbols": symbols, "close": close[:, :DAYS]}, window=WINDOW
+    )
+    seed_ms = (time.perf_counter() - start) * 1e3
+
+    times = []
+    for d in range(DAYS, DAYS + UPDATES):
+        start = time.perf_counter()
+        engine.update(close[:, d])
+        times.append(time.perf_counter() - start)
+    times = np.array(times) * 1e3
+
+    # Same window from scratch.
+    r = close[:, DAYS + UPDATES - WINDOW :] / close[:, DAYS + UPDATES - WINDOW - 1 : -1]
+    assert np.allclose(engine.covariance(), np.cov(r - 1), rtol=1e-8, atol=1e-12)
+
+    weights = dict(zip(symbols[:40], rng.dirichlet(np.ones(40)) * 90))
+    start = time.perf_counter()
+    book = engine.portfolio(weights)
+    book_ms = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    for s in symbols[:N]:
+        book.marginal(s, 2.0)
+    marginal_us = (time.perf_counter() - start) * 1e6 / N
+
+    print(f"seed {N} symbols x {DAYS} days: {seed_ms:.1f} ms")
+    print(
+        f"update: p50 {np.percentile(times, 50):.2f} ms, "
+        f"max {times.max():.2f} ms over {UPDATES} bars"
+    )
+    print(f"portfolio: {book_ms:.2f} ms, marginal: {marginal_us:.1f} us/order")
+    print(
+        f"book vol {book.vol_pct:.1f}%, beta {book.beta:.2f}, "
+        f"VaR95 {book.var_pct():.2f}%, sum(contrib) "
+        f"{sum(book.contributions().values()):.1f}%"
+    )
+    print(f"beta error {np.nanmax(np.abs(engine.beta()[:N] - betas)):.2f}")
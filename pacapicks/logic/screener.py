@@ -0,0 +1,359 @@
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Union
+
+import numpy as np
+
+from pacapicks.ai.assessment_schema import Fundamentals, Technicals
+from pacapicks.logic.fundamentals_frame import FIELDS as FUNDAMENTAL_FIELDS
+
+TECHNICAL_FIELDS = (
+    "avg_daily_dollar_volume_musd",
+    "beta_1y",
+    "recent_move_2w_pct",
+    "short_interest_pct_float",
+)
+COLUMNS = FUNDAMENTAL_FIELDS + ("net_debt_musd",) + TECHNICAL_FIELDS
+
+# Market-cap bands ($M) for the bucketed index.
+CAP_BANDS = (("nano", 0, 50), ("micro", 50, 300), ("small", 300, 2_000))
+CAP_BANDS += (("mid", 2_000, 10_000), ("large", 10_000, float("inf")))
+
+# Mirrors the UNIVERSE section of the stock_opportunities prompt.
+DEFAULT_FILTERS = {
+    "market_cap_musd": (50, 2_000),
+    "avg_daily_dollar_volume_musd": (2, None),
+}
+# Weights on percentile ranks: growth and momentum up, rich valuations down.
+DEFAULT_WEIGHTS = {
+    "revenue_yoy_pct_q": 1.0,
+    "recent_move_2w_pct": 1.0,
+    "operating_margin_pct": 0.5,
+    "ps_ttm": -0.5,
+    "pe_ttm": -0.25,
+    "avg_daily_dollar_volume_musd": 0.25,
+}
+
+
+def cap_band(market_cap_musd) -> Optional[str]:
+    if market_cap_musd is None or market_cap_musd != market_cap_musd:
+        return None
+    for name, lo, hi in CAP_BANDS:
+        if lo <= market_cap_musd < hi:
+            return name
+    return None
+
+
+class SortedIndex:
+    """
+    Rows ordered by one column's value, missing values left out. Updates
+    splice rows out and back in with searchsorted instead of re-sorting.
+    """
+
+    def __init__(self):
+        self.values = np.empty(0)
+        self.rows = np.empty(0, dtype=np.int64)
+        self._ranks = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def rebuild(self, column):
+        present = np.flatnonzero(~np.isnan(column))
+        order = np.argsort(column[present], kind="stable")
+        self.rows = present[order]
+        self.values = column[self.rows]
+        self._ranks = None
+
+    def update(self, rows, new_values):
+        rows = np.asarray(rows, dtype=np.int64)
+        new_values = np.asarray(new_values, dtype=np.float64)
+        keep = ~np.isin(self.rows, rows)
+        values, kept_rows = self.values[keep], self.rows[keep]
+
+        present = ~np.isnan(new_values)
+        rows, new_values = rows[present], new_values[present]
+        order = np.argsort(new_values, kind="stable")
+        rows, new_values = rows[order], new_values[order]
+        at = np.searchsorted(values, new_values, side="right")
+        self.values = np.insert(values, at, new_values)
+        self.rows = np.insert(kept_rows, at, rows)
+        self._ranks = None
+
+    def range(self, lo=None, hi=None) -> np.ndarray:
+        """Rows with lo <= value <= hi (either bound may be None)."""
+        i = 0 if lo is None else np.searchsorted(self.values, lo, side="left")
+        j = (
+            len(self.values)
+            if hi is None
+            else np.searchsorted(self.values, hi, "right")
+        )
+        return self.rows[i:j]
+
+    def top(self, n, largest=True) -> np.ndarray:
+        return self.rows[::-1][:n] if largest else self.rows[:n]
+
+    def ranks(self, n_rows) -> np.ndarray:
+        """Percentile rank (0..1) of each row by this column; NaN if missing."""
+        if self._ranks is None or len(self._ranks) != n_rows:
+            ranks = np.full(n_rows, np.nan)
+            ranks[self.rows] = np.arange(len(self.rows)) / max(len(self.rows) - 1, 1)
+            self._ranks = ranks
+        return self._ranks
+
+
+class BucketIndex:
+    """Rows grouped by a categorical key (trend, market-cap band)."""
+
+    def __init__(self):
+        self.buckets: Dict[str, set] = {}
+        self._key = {}
+
+    def update(self, row, key):
+        old = self._key.get(row)
+        if old == key:
+            return
+        if old is not None:
+            self.buckets[old].discard(row)
+        if key is not None:
+            self.buckets.setdefault(key, set()).add(row)
+        self._key[row] = key
+
+    def rows(self, *keys) -> np.ndarray:
+        found = set().union(*(self.buckets.get(k, ()) for k in keys))
+        return np.fromiter(found, dtype=np.int64, count=len(found))
+
+    def counts(self) -> Dict[str, int]:
+        return {k: len(v) for k, v in self.buckets.items() if v}
+
+
+class Candidate(NamedTuple):
+    ticker: str
+    score: float
+    metrics: dict  # non-missing columns plus trend and cap band
+
+
+class Screener:
+    """
+    Local pre-LLM screen over fundamentals and technicals.
+
+    Values are kept column-wise (columns x tickers) with a SortedIndex per
+    column and BucketIndexes on price trend and market-cap band, all updated
+    in place as data arrives. A screen intersects index ranges for the
+    filters, scores the survivors from percentile ranks and returns the
+    top K, so only a short list ever reaches the LLM.
+    """
+
+    def __init__(self, universe: Optional[Iterable[str]] = None, capacity=1024):
+        self.universe = set(universe) if universe is not None else None
+        self.tickers: List[str] = []
+        self._row: Dict[str, int] = {}
+        self._data = np.full((len(COLUMNS), capacity), np.nan)
+        self._trend = np.full(capacity, None, dtype=object)
+        self.sorted = {c: SortedIndex() for c in COLUMNS}
+        self.trend = BucketIndex()
+        self.cap_band = BucketIndex()
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def column(self, name) -> np.ndarray:
+        return self._data[COLUMNS.index(name), : len(self.tickers)]
+
+    def _rows_for(self, tickers):
+        rows = []
+        for ticker in tickers:
+            row = self._row.get(ticker)
+            if row is None:
+                row = len(self.tickers)
+                if row == self._data.shape[1]:
+                    grow = self._data.shape[1]
+                    self._data = np.hstack(
+                        [self._data, np.full((len(COLUMNS), grow), np.nan)]
+                    )
+                    self._trend = np.concatenate(
+                        [self._trend, np.full(grow, None, dtype=object)]
+                    )
+                self._row[ticker] = row
+                self.tickers.append(ticker)
+            rows.append(row)
+        return np.asarray(rows, dtype=np.int64)
+
+    # ---------- Updates ----------
+
+    def update(
+        self,
+        fundamentals: Optional[Dict[str, Fundamentals]] = None,
+        technicals: Optional[Dict[str, Technicals]] = None,
+    ):
+        """Insert or refresh tickers; only the touched rows move in the indexes."""
+        fundamentals = self._in_universe(fundamentals or {})
+        technicals = self._in_universe(technicals or {})
+
+        if fundamentals:
+            tickers = list(fundamentals)
+            rows = self._rows_for(tickers)
+            for name in FUNDAMENTAL_FIELDS + ("net_debt_musd",):
+                values = [getattr(fundamentals[t], name) for t in tickers]
+                self._set(name, rows, values)
+            caps = self._data[COLUMNS.index("market_cap_musd"), rows]
+            for row, cap in zip(rows.tolist(), caps.tolist()):
+                self.cap_band.update(row, cap_band(cap))
+
+        if technicals:
+            tickers = list(technicals)
+            rows = self._rows_for(tickers)
+            for name in TECHNICAL_FIELDS:
+                values = [getattr(technicals[t], name) for t in tickers]
+                self._set(name, rows, values)
+            for row, ticker in zip(rows.tolist(), tickers):
+                trend = technicals[ticker].price_trend.value
+                self._trend[row] = trend
+                self.trend.update(row, trend)
+
+    def _in_universe(self, data):
+        if self.universe is None:
+            return data
+        return {t: v for t, v in data.items() if t in self.universe}
+
+    def _set(self, name, rows, values):
+        values = np.array(values, dtype=np.float64)
+        self._data[COLUMNS.index(name), rows] = values
+        index = self.sorted[name]
+        if len(rows) > len(self.tickers) // 4:
+            index.rebuild(self.column(name))  # big batch: one sort is cheaper
+        else:
+            index.update(rows, values)
+
+    # ---------- Screening ----------
+
+    def candidates(self, filters=None, trend=None, cap_bands=None) -> np.ndarray:
+        """
+        Rows passing every filter, from index lookups only.
+        Args:
+            filters (dict): column -> (lo, hi) inclusive; None for open ends.
+            trend (str | list[str]): Allowed price trends.
+            cap_bands (str | list[str]): Allowed market-cap bands.
+        """
+        n = len(self.tickers)
+        keep = np.ones(n, dtype=bool)
+        for name, (lo, hi) in (filters or {}).items():
+            hit = np.zeros(n, dtype=bool)
+            hit[self.sorted[name].range(lo, hi)] = True
+            keep &= hit
+        for index, keys in ((self.trend, trend), (self.cap_band, cap_bands)):
+            if keys:
+                hit = np.zeros(n, dtype=bool)
+                hit[index.rows(*([keys] if isinstance(keys, str) else keys))] = True
+                keep &= hit
+        return np.flatnonzero(keep)
+
+    def scores(self, weights: Union[Dict[str, float], Callable] = None) -> np.ndarray:
+        """
+        Score every row. `weights` maps columns to weights on their percentile
+        rank (a missing value counts as the median); a callable instead gets
+        `column` and returns one score per row.
+        """
+        weights = DEFAULT_WEIGHTS if weights is None else weights
+        if callable(weights):
+            return np.asarray(weights(self.column), dtype=np.float64)
+        n = len(self.tickers)
+        score = np.zeros(n)
+        for name, weight in weights.items():
+            ranks = self.sorted[name].ranks(n)
+            score += weight * np.where(np.isnan(ranks), 0.0, ranks - 0.5)
+        return score
+
+    def screen(
+        self, k=20, filters=DEFAULT_FILTERS, trend=None, cap_bands=None, weights=None
+    ) -> List[Candidate]:
+        """Top `k` candidates by score among rows passing the filters."""
+        rows = self.candidates(filters, trend, cap_bands)
+        if not len(rows):
+            return []
+        scores = self.scores(weights)[rows]
+        if len(rows) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [self._candidate(r, s) for r, s in zip(rows[order], scores[order])]
+
+    def _candidate(self, row, score):
+        values = self._data[:, row]
+        metrics = {
+            name: round(float(v), 4) for name, v in zip(COLUMNS, values) if v == v
+        }
+        metrics["price_trend"] = self._trend[row]
+        metrics["cap_band"] = cap_band(metrics.get("market_cap_musd"))
+        return Candidate(self.tickers[row], round(float(score), 4), metrics)
+
+    @classmethod
+    def from_refresh_log(cls, log=None, universe=None) -> "Screener":
+        """Seed from the incremental scheduler's last fundamentals/technicals."""
+        from pacapicks.io.cache import default_refresh_log
+
+        log = log or default_refresh_log()
+        screener = cls(universe)
+        screener.update(
+            {
+                t: Fundamentals.model_validate(r.payload)
+                for t, r in log.stage("fundamentals").items()
+            },
+            {
+                t: Technicals.model_validate(r.payload)
+                for t, r in log.stage("technicals").items()
+            },
+        )
+        return screener
+
+
+if __name__ == "__main__":
+    # Benchmark: build, screen and incrementally update a 10,000-name universe.
+    import time
+
+    N = 10_000
+    rng = np.random.default_rng(0)
+    tickers = [f"T{i:05d}" for i in range(N)]
+    fundamentals = {
+        t: Fundamentals(
+            revenue_yoy_pct_q=float(max(rng.normal(10, 25), -90)),
+            operating_margin_pct=float(rng.uniform(-50, 40)),
+            pe_ttm=float(rng.uniform(2, 80)),
+            ps_ttm=float(rng.uniform(0.2, 20)),
+            market_cap_musd=float(np.exp(rng.uniform(np.log(20), np.log(50_000)))),
+        )
+        for t in tickers
+    }
+    trends = ["uptrend", "downtrend", "sideways"]
+    technicals = {
+        t: Technicals(
+            price_trend=trends[i % 3],
+            avg_daily_dollar_volume_musd=float(rng.uniform(0.1, 50)),
+            recent_move_2w_pct=float(rng.normal(0, 8)),
+        )
+        for i, t in enumerate(tickers)
+    }
+
+    start = time.perf_counter()
+    screener = Screener()
+    screener.update(fundamentals, technicals)
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    screener.screen()
+    start = time.perf_counter()
+    top = screener.screen(k=20, trend="uptrend")
+    screen_ms = (time.perf_counter() - start) * 1e3
+
+    moved = tickers[:50]
+    start = time.perf_counter()
+    screener.update(
+        technicals={
+            t: technicals[t].model_copy(update={"recent_move_2w_pct": 25.0})
+            for t in moved
+        }
+    )
+    update_ms = (time.perf_counter() - start) * 1e3
+
+    print(f"build {build_ms:.0f} ms; screen top-20 {screen_ms:.2f} ms")
+    print(f"incremental update of 50 names {update_ms:.2f} ms")
+    print(f"{len(screener.candidates(DEFAULT_FILTERS))} of {N} pass the filters")
+    for c in top[:3]:
+        print(c.ticker, c.score, c.metrics["cap_band"], c.metrics["price_trend"])
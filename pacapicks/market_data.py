@@ -1,10 +1,226 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
 import yfinance as yf
 
+from pacapicks.io import metrics
+
+# yf.download fans a batch out over a single history request per chunk; keep
+# chunks small enough that one bad symbol doesn't take a huge batch with it.
+BATCH_SIZE = 200
+MAX_WORKERS = 8
+
+_feed = None
+
+
+def use_feed(feed):
+    """
+    Serve snapshot()/snapshots() from a running PriceFeed. Cold or stale
+    symbols still go to yfinance, and are then seeded into and subscribed on
+    the feed so the next read is local. Pass None to go back to REST only.
+    """
+    global _feed
+    _feed = feed
+
+
+@contextmanager
+def configured_feed(symbols=()):
+    """
+    Run a PriceFeed for the duration of the block when ALPACA_DATA_STREAM_URL
+    is set, serving snapshot()/snapshots() from it (see use_feed); otherwise
+    do nothing. Yields the feed, or None.
+    """
+    from pacapicks import config
+
+    if not config.ALPACA_DATA_STREAM_URL:
+        yield None
+        return
+
+    from pacapicks.io.price_feed import PriceFeed
+
+    feed = PriceFeed()
+    feed.subscribe(symbols)
+    feed.start()
+    use_feed(feed)
+    try:
+        yield feed
+    finally:
+        use_feed(None)
+        feed.stop()
+
+
+def _from_feed(ticker):
+    quote = _feed.fresh(ticker) if _feed is not None else None
+    if quote is None:
+        return None
+    return {"last": quote["last"], "prev_close": quote["prev_close"]}
+
+
+def _seed_feed(quotes):
+    if _feed is None:
+        return
+    for symbol, quote in quotes.items():
+        if quote["last"] is not None:
+            _feed.update(symbol, last=quote["last"], prev_close=quote["prev_close"])
+    _feed.subscribe(quotes)
+
+
+def _rest_snapshot(ticker):
+    with metrics.span("yfinance", "fast_info", ticker):
+        info = yf.Ticker(ticker).fast_info
+        return {"last": info.last_price, "prev_close": info.previous_close}
+
 
 def snapshot(ticker):
-    t = yf.Ticker(ticker)
-    info = t.fast_info
-    return {"last": info.last_price, "prev_close": info.previous_close}
+    quote = _from_feed(ticker)
+    if quote is None:
+        quote = _rest_snapshot(ticker)
+        _seed_feed({ticker: quote})
+    return quote
+
+
+def _safe_snapshot(ticker):
+    try:
+        return _rest_snapshot(ticker)
+    except Exception:
+        return {"last": None, "prev_close": None}
+
+
+def _batch_closes(symbols):
+    with metrics.span("yfinance", "download") as span:
+        data = yf.download(
+            symbols,
+            period="5d",
+            interval="1d",
+            auto_adjust=False,
+            progress=False,
+            threads=False,
+        )
+        span.record(frame_bytes=0 if data is None else int(data.memory_usage().sum()))
+    if data is None or data.empty:
+        return {}
+
+    closes = data["Close"]
+    if closes.ndim == 1:
+        closes = closes.to_frame(name=symbols[0])
+
+    out = {}
+    for symbol in closes.columns:
+        series = closes[symbol].dropna()
+        if series.empty:
+            continue
+        out[symbol] = {
+            "last": float(series.iloc[-1]),
+            "prev_close": float(series.iloc[-2]) if len(series) > 1 else None,
+        }
+    return out
+
+
+def snapshots(symbols, batch_size=BATCH_SIZE, max_workers=MAX_WORKERS):
+    """
+    Fetch last/prev-close prices for many symbols at once.
+    Args:
+        symbols (list[str]): Symbols to quote.
+        batch_size (int): Symbols per yf.download request.
+        max_workers (int): Thread pool bound for symbols the batch call missed.
+        Symbols with a fresh row in the PriceFeed (see use_feed) skip the network.
+    Returns:
+        dict: symbol -> {"last": float | None, "prev_close": float | None}.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+
+    quotes = {}
+    for symbol in symbols:
+        quote = _from_feed(symbol)
+        if quote is not None:
+            quotes[symbol] = quote
+    cold = [s for s in symbols if s not in quotes]
+
+    fetched = {}
+    for i in range(0, len(cold), batch_size):
+        chunk = cold[i : i + batch_size]
+        try:
+            fetched.update(_batch_closes(chunk))
+        except Exception:
+            pass
+
+    missing = [s for s in cold if s not in fetched]
+    if missing:
+        workers = max(1, min(max_workers, len(missing)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for symbol, quote in zip(missing, pool.map(_safe_snapshot, missing)):
+                fetched[symbol] = quote
+
+    _seed_feed(fetched)
+    quotes.update(fetched)
+    return {s: quotes[s] for s in symbols}
+
+
+def history(symbols, period="1y", batch_size=BATCH_SIZE):
+    """
+    Daily OHLCV for many symbols as aligned (symbols x days) arrays.
+    Args:
+        symbols (list[str]): Symbols to load.
+        period (str): yfinance period, e.g. "6mo" or "1y".
+        batch_size (int): Symbols per yf.download request.
+    Returns:
+        dict: {"symbols", "dates", "open", "high", "low", "close", "volume"};
+        days a symbol didn't trade (or failed to load) are NaN.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    frames = []
+    for i in range(0, len(symbols), batch_size):
+        chunk = symbols[i : i + batch_size]
+        try:
+            with metrics.span("yfinance", "download"):
+                data = yf.download(
+                    chunk,
+                    period=period,
+                    interval="1d",
+                    auto_adjust=False,
+                    progress=False,
+                    threads=False,
+                )
+        except Exception:
+            continue
+        if data is None or data.empty:
+            continue
+        if not isinstance(data.columns, pd.MultiIndex):
+            data.columns = pd.MultiIndex.from_product([data.columns, chunk])
+        frames.append(data)
+
+    fields = ("Open", "High", "Low", "Close", "Volume")
+    if not frames:
+        empty = np.full((len(symbols), 0), np.nan)
+        out = {f.lower(): empty for f in fields}
+        return {"symbols": symbols, "dates": np.array([], "datetime64[D]"), **out}
+
+    data = pd.concat(frames, axis=1).sort_index()
+    out = {"symbols": symbols, "dates": data.index.values.astype("datetime64[D]")}
+    for field in fields:
+        block = data[field].reindex(columns=symbols)
+        out[field.lower()] = block.to_numpy(dtype=float).T
+    return out
+
+
+def cached_history(symbols, start=None, end=None, cache=None):
+    """
+    history() served from the local bar cache: only days not cached yet are
+    downloaded, and the arrays are read-only views into memory-mapped panels.
+    Args:
+        symbols (list[str]): Symbols to load.
+        start, end (date | str | None): Inclusive day range (default: last year).
+        cache (BarCache): Defaults to the shared daily cache under DATA_DIR.
+    Returns:
+        dict: Same layout as history().
+    """
+    from pacapicks.io.bars import default_bar_cache
+
+    return (cache or default_bar_cache()).load(symbols, start, end)
 
 
 if __name__ == "__main__":
@@ -15,3 +231,4 @@ if __name__ == "__main__":
     print(snapshot("AMZN"))
     print(snapshot("TSLA"))
     print(snapshot("NFLX"))
+    print(snapshots(["AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "NFLX"]))
@@ -6,6 +6,7 @@ setup(
     packages=find_packages(),
     install_requires=[],  # You can add dependencies here or use requirements.txt
     include_package_data=True,
+    entry_points={"console_scripts": ["pacapicks = pacapicks.cli:main"]},
     description="Alpaca trading and analysis tools",
     author="bradleyMwest",
     python_requires=">=3.12",
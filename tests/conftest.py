@@ -0,0 +1,13 @@
+import pytest
+
+from pacapicks import config
+
+
+@pytest.fixture(autouse=True)
+def isolated_dirs(tmp_path, monkeypatch):
+    """Point every on-disk cache and store at a per-test directory."""
+    monkeypatch.setenv("PACAPICKS_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("PACAPICKS_DATA_DIR", str(tmp_path / "data"))
+    config.reload()
+    yield tmp_path
+    config.reload()
@@ -0,0 +1,48 @@
+import threading
+
+from pacapicks.bench.fakes import StubServer, alpaca_routes
+from pacapicks.io.alpaca import AlpacaClient
+
+
+def _logged(routes, log):
+    lock = threading.Lock()
+
+    def wrap(method, handler):
+        def logged(path, query, body):
+            with lock:
+                log.append((method, path, (body or {}).get("side")))
+            return handler(path, query, body)
+
+        return logged
+
+    return [(m, prefix, wrap(m, handler)) for m, prefix, handler in routes]
+
+
+def test_place_orders_fills_sells_before_submitting_buys():
+    log = []
+    batch = [
+        {"symbol": "AAA", "qty": 5, "side": "sell"},
+        {"symbol": "BBB", "qty": 3, "side": "buy"},
+        {"symbol": "CCC", "qty": 2, "side": "sell"},
+        {"symbol": "DDD", "qty": 1, "side": "buy"},
+    ]
+    with StubServer(_logged(alpaca_routes(), log)) as stub:
+        client = AlpacaClient(base_url=stub.url, headers={})
+        results = client.place_orders(batch, fill_timeout=5)
+
+    assert [r["symbol"] for r in results] == ["AAA", "BBB", "CCC", "DDD"]
+    first_buy = next(i for i, e in enumerate(log) if e[2] == "buy")
+    before = log[:first_buy]
+    assert sorted(e[2] for e in before if e[0] == "POST") == ["sell", "sell"]
+    assert sum(e[0] == "GET" and e[1].startswith("/v2/orders/") for e in before) == 2
+    assert all(e[2] != "sell" for e in log[first_buy:])
+
+
+def test_place_orders_without_sells_skips_the_wait():
+    log = []
+    batch = [{"symbol": s, "qty": 1, "side": "buy"} for s in ("AAA", "BBB")]
+    with StubServer(_logged(alpaca_routes(), log)) as stub:
+        client = AlpacaClient(base_url=stub.url, headers={})
+        results = client.place_orders(batch)
+    assert [r["status"] for r in results] == ["accepted", "accepted"]
+    assert [e[0] for e in log] == ["POST", "POST"]
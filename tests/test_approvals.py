@@ -0,0 +1,187 @@
+import threading
+import time
+
+import pytest
+
+from pacapicks.approvals import (
+    APPROVED,
+    EXPIRED,
+    FAILED,
+    PENDING,
+    SUBMITTED,
+    ApprovalStore,
+    OrderBatcher,
+    create_app,
+    propose_orders,
+)
+from pacapicks.bench.fakes import StubServer, alpaca_routes
+from pacapicks.io.alpaca import AlpacaClient
+
+ORDER = {"symbol": "AAA", "qty": 1, "side": "buy"}
+
+
+class Alpaca:
+    """alpaca_routes with scripted POST /v2/orders failures and a post log."""
+
+    def __init__(self):
+        self.posts = []
+        self.script = []  # per POST: None, "500" (not placed) or "500-after"
+        routes = alpaca_routes(0)
+        self._place = next(h for m, p, h in routes if (m, p) == ("POST", "/v2/orders"))
+        self.routes = [
+            (m, p, self._post if (m, p) == ("POST", "/v2/orders") else h)
+            for m, p, h in routes
+        ]
+
+    def _post(self, path, query, body):
+        self.posts.append(body["client_order_id"])
+        step = self.script.pop(0) if self.script else None
+        if step == "500":
+            return 500, {"message": "internal error"}
+        status, order = self._place(path, query, body)
+        if step == "500-after":  # placed, but the response was lost
+            return 500, {"message": "internal error"}
+        return status, order
+
+    def placed(self, client_order_id):
+        return self.posts.count(client_order_id)
+
+
+@pytest.fixture
+def alpaca():
+    fake = Alpaca()
+    with StubServer(fake.routes) as stub:
+        fake.client = AlpacaClient(
+            base_url=stub.url, headers={}, requests_per_minute=1e6
+        )
+        yield fake
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ApprovalStore(str(tmp_path / "approvals.sqlite"), secret="test")
+
+
+def _app(store, alpaca, **kwargs):
+    batcher = OrderBatcher(store, clients=lambda _: alpaca.client)
+    return create_app(store, batcher, **kwargs).test_client()
+
+
+def _approve_path(link):
+    return link["approve_url"][link["approve_url"].index("/approve/") :]
+
+
+def test_double_click_submits_once(store, alpaca):
+    app = _app(store, alpaca)
+    (link,) = propose_orders([ORDER], store=store)
+    responses = []
+    clicks = [
+        threading.Thread(target=lambda: responses.append(app.post(_approve_path(link))))
+        for _ in range(4)
+    ]
+    for t in clicks:
+        t.start()
+    for t in clicks:
+        t.join()
+
+    assert store.get(link["id"]).status == SUBMITTED
+    assert len(alpaca.posts) == 1
+    assert all(r.get_json()["status"] in (APPROVED, SUBMITTED) for r in responses)
+
+
+def test_expired_order_is_not_approved(store, alpaca):
+    store.ttl = -1
+    (p,) = store.propose([ORDER])
+
+    assert store.transition(p.id, PENDING, APPROVED) is None
+    assert store.get(p.id).status == EXPIRED
+    assert alpaca.posts == []
+
+
+def test_expired_link_is_refused(store, alpaca):
+    store.ttl = -1
+    (link,) = propose_orders([ORDER], store=store)
+    r = _app(store, alpaca).post(_approve_path(link))
+    assert r.status_code == 403 and alpaca.posts == []
+
+
+def test_5xx_before_placing_is_retried(store, alpaca):
+    alpaca.script = ["500"]
+    (link,) = propose_orders([ORDER], store=store)
+    r = _app(store, alpaca).post(_approve_path(link))
+    assert r.status_code == 200 and r.get_json()["status"] == SUBMITTED
+    assert len(alpaca.posts) == 2  # one failed, one placed
+
+
+def test_5xx_after_placing_is_found_not_resent(store, alpaca):
+    alpaca.script = ["500-after"]
+    (link,) = propose_orders([ORDER], store=store)
+    r = _app(store, alpaca).post(_approve_path(link))
+    assert r.status_code == 200 and r.get_json()["status"] == SUBMITTED
+    assert len(alpaca.posts) == 1
+
+
+def test_422_for_a_duplicate_resolves_to_the_existing_order(store, alpaca):
+    (link,) = propose_orders([ORDER], store=store)
+    client_order_id = store.get(link["id"]).client_order_id
+    placed = alpaca.client.place_order(**ORDER, client_order_id=client_order_id)
+
+    r = _app(store, alpaca).post(_approve_path(link))
+    assert r.status_code == 200
+    assert r.get_json()["result"]["id"] == placed["id"]
+    assert alpaca.placed(client_order_id) == 2  # the second POST got a 422
+
+
+def test_422_on_its_merits_fails_the_order(store, alpaca):
+    (link,) = propose_orders([{**ORDER, "qty": -1}], store=store)
+    alpaca._place = lambda *a: (422, {"message": "qty must be positive"})
+    r = _app(store, alpaca).post(_approve_path(link))
+    assert r.status_code == 502 and r.get_json()["status"] == FAILED
+    assert len(alpaca.posts) == 1
+
+
+def test_approved_orders_are_resubmitted_on_restart(store, alpaca, tmp_path):
+    first, second = store.propose([ORDER, {**ORDER, "symbol": "BBB"}])
+    for p in (first, second):
+        store.transition(p.id, PENDING, APPROVED)
+    # `first` reached Alpaca before the process died; `second` never did.
+    alpaca.client.place_order(**ORDER, client_order_id=first.client_order_id)
+
+    restarted = ApprovalStore(str(tmp_path / "approvals.sqlite"), secret="test")
+    batcher = OrderBatcher(restarted, clients=lambda _: alpaca.client)
+    create_app(restarted, batcher)
+    for p in (first, second):
+        assert _wait_for(lambda: restarted.get(p.id).status == SUBMITTED)
+    assert alpaca.placed(second.client_order_id) == 1
+    assert restarted.approved() == []
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_opening_the_link_only_shows_a_confirmation(store, alpaca):
+    app = _app(store, alpaca)
+    (link,) = propose_orders([ORDER], store=store)
+    for _ in range(3):  # e.g. a mail scanner prefetching the link
+        r = app.get(_approve_path(link))
+        assert r.status_code == 200 and b'method="post"' in r.data
+    r = app.get(link["reject_url"][link["reject_url"].index("/reject/") :])
+    assert r.status_code == 200
+    assert store.get(link["id"]).status == PENDING
+    assert alpaca.posts == []
+
+
+def test_pending_orders_need_the_secret(store, alpaca):
+    app = _app(store, alpaca)
+    propose_orders([ORDER], store=store)
+    assert app.get("/orders/pending").status_code == 403
+    bad = {"Authorization": "Bearer nope"}
+    assert app.get("/orders/pending", headers=bad).status_code == 403
+    ok = app.get("/orders/pending", headers={"Authorization": "Bearer test"})
+    assert ok.status_code == 200 and ok.get_json()[0]["order"] == ORDER
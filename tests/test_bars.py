@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from pacapicks.bench.fakes import FakeYFinance, patched_yfinance
+from pacapicks.io.bars import BarCache
+
+
+class DeadTickers(FakeYFinance):
+    """yf.download answering `dead` symbols with all-NaN columns, like yfinance."""
+
+    def __init__(self, dead=()):
+        super().__init__()
+        self.dead = set(dead)
+        self.downloaded = []
+
+    def download(self, tickers, **kwargs):
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        self.downloaded.append(sorted(tickers))
+        data = super().download(tickers, **kwargs)
+        for column in data.columns:
+            if column[1] in self.dead:
+                data[column] = np.nan
+        return data
+
+
+END = date.today() - timedelta(days=7)
+START = END - timedelta(days=60)
+
+
+def test_symbol_without_bars_stays_a_gap(tmp_path):
+    fake = DeadTickers(dead={"DEAD"})
+    cache = BarCache(str(tmp_path / "bars"))
+    with patched_yfinance(fake):
+        first = cache.load(["LIVE", "DEAD"], START, END)
+        assert np.isfinite(first["close"][0]).all()
+        assert np.isnan(first["close"][1]).all()
+
+        cache.load(["LIVE", "DEAD"], START, END)
+        assert fake.downloaded[-1] == ["DEAD"]  # retried; LIVE is covered
+
+        fake.dead.clear()
+        healed = cache.load(["LIVE", "DEAD"], START, END)
+        assert np.isfinite(healed["close"][1]).all()
+        requests = fake.requests
+        cache.load(["LIVE", "DEAD"], START, END)
+        assert fake.requests == requests
+
+
+def test_weekend_only_range_is_covered_without_a_request(tmp_path):
+    fake = DeadTickers()
+    cache = BarCache(str(tmp_path / "bars"))
+    saturday = END - timedelta(days=(END.weekday() - 5) % 7)
+    with patched_yfinance(fake):
+        assert cache.refresh(["LIVE"], saturday, saturday + timedelta(days=1)) == 0
+        assert cache.refresh(["LIVE"], saturday, saturday + timedelta(days=1)) == 0
+    assert fake.requests == 0
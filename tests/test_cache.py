@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from pacapicks.ai.assessment_schema import Fundamentals
+from pacapicks.io import cache as cache_module
+from pacapicks.io.cache import FundamentalsCache
+
+VALUES = Fundamentals(pe_ttm=12.0, market_cap_musd=900.0, revenue_yoy_pct_q=5.0)
+
+
+def test_fields_without_a_ttl_use_the_default(tmp_path, monkeypatch):
+    cache = FundamentalsCache(str(tmp_path / "f.sqlite"))
+    cache.put("yfinance", "AAA", VALUES, fiscal_period="2025-03-31")
+    assert not cache.get("yfinance", "AAA").stale
+
+    cache.field_ttls = {"pe_ttm": 3600}
+    monkeypatch.setattr(cache_module, "DEFAULT_TTL", -1)
+    stale = cache.get("yfinance", "AAA").stale
+    assert "pe_ttm" not in stale and "market_cap_musd" in stale
+    assert stale == set(cache.fields) - {"pe_ttm"}
+
+
+def test_lookup_counters_add_up_under_concurrency(tmp_path):
+    cache = FundamentalsCache(str(tmp_path / "f.sqlite"))
+    cache.put("yfinance", "AAA", VALUES)
+    tickers = ["AAA", "ZZZ"] * 200
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda t: cache.get("yfinance", t), tickers))
+
+    stats = cache.stats()
+    assert stats["hits"] + stats["partial_hits"] == 200
+    assert stats["misses"] == 200
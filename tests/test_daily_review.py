@@ -0,0 +1,17 @@
+from pacapicks.bench.fakes import (
+    FakeYFinance,
+    StubServer,
+    alpaca_routes,
+    patched_yfinance,
+)
+from pacapicks.io.accounts import Account, AccountRegistry
+from pacapicks.jobs.daily_review import run_daily_review_all
+
+
+def test_unknown_account_is_reported_not_raised():
+    with StubServer(alpaca_routes(3)) as stub, patched_yfinance(FakeYFinance()):
+        registry = AccountRegistry([Account("paper", "k", "s", stub.url)])
+        out = run_daily_review_all(["paper", "missing"], registry=registry)
+
+    assert len(out["accounts"]["paper"]["review"]) == 3
+    assert out["accounts"]["missing"]["error"].startswith("KeyError")
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+from pacapicks.ai.assessment_schema import Fundamentals
+from pacapicks.bench.fakes import StubServer, fmp_routes, symbols
+from pacapicks.io.cache import FundamentalsCache
+from pacapicks.io.endpoints import fetch_fundamentals_fmp_bulk
+
+
+def _collect(url, tickers, cache=False, **kwargs):
+    async def run():
+        return {
+            t: r
+            async for t, r in fetch_fundamentals_fmp_bulk(
+                tickers, requests_per_minute=60_000, cache=cache, base_url=url, **kwargs
+            )
+        }
+
+    return asyncio.run(run())
+
+
+def test_bulk_fetches_every_ticker_from_stub():
+    tickers = symbols(20)
+    with StubServer(fmp_routes(), latency=0.01) as stub:
+        results = _collect(stub.url, tickers, concurrency=8)
+    assert set(results) == set(tickers)
+    assert all(isinstance(r, Fundamentals) for r in results.values())
+    assert results[tickers[0]].market_cap_musd == 12_000
+    assert stub.requests == 3 * len(tickers)
+
+
+def test_bulk_serves_repeat_run_from_cache(tmp_path):
+    cache = FundamentalsCache(str(tmp_path / "f.sqlite"))
+    tickers = symbols(5)
+    with StubServer(fmp_routes()) as stub:
+        _collect(stub.url, tickers, cache=cache)
+        first = stub.requests
+        again = _collect(stub.url, tickers, cache=cache)
+    assert first == 15 and stub.requests == first
+    assert all(isinstance(r, Fundamentals) for r in again.values())
+
+
+def test_bulk_reports_failures_per_ticker():
+    with StubServer(fmp_routes(), error_rate=1.0) as stub:
+        results = _collect(stub.url, symbols(4))
+    assert len(results) == 4
+    assert all(isinstance(r, Exception) for r in results.values())
+
+
+class _SlowCache:
+    """A cache whose lookups block, like SQLite on a busy disk."""
+
+    def get(self, provider, ticker):
+        time.sleep(0.1)
+        return None
+
+    def put(self, *args, **kwargs):
+        time.sleep(0.1)
+
+
+def test_bulk_keeps_cache_io_off_the_event_loop():
+    async def run(url):
+        gaps, stop = [], asyncio.Event()
+
+        async def heartbeat():
+            last = time.perf_counter()
+            while not stop.is_set():
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        beat = asyncio.ensure_future(heartbeat())
+        results = [
+            r
+            async for _, r in fetch_fundamentals_fmp_bulk(
+                symbols(6),
+                concurrency=6,
+                requests_per_minute=60_000,
+                cache=_SlowCache(),
+                base_url=url,
+            )
+        ]
+        stop.set()
+        await beat
+        return results, max(gaps)
+
+    with StubServer(fmp_routes()) as stub:
+        results, worst_gap = asyncio.run(run(stub.url))
+    assert all(isinstance(r, Fundamentals) for r in results)
+    assert worst_gap < 0.09  # each blocking cache call takes 0.1 s
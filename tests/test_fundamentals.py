@@ -0,0 +1,132 @@
+import multiprocessing
+import time
+
+import pytest
+
+from pacapicks.ai.assessment_schema import Fundamentals
+from pacapicks.bench.fakes import FakeYFinance, patched_yfinance, symbols
+from pacapicks.jobs.fundamentals import (
+    VALUE_FIELDS,
+    load_fundamentals_many,
+    resolve_fundamentals,
+)
+
+FORK = multiprocessing.get_context("fork")  # workers inherit the patched yfinance
+
+
+def test_loads_every_ticker_on_the_pool():
+    with patched_yfinance(FakeYFinance()):
+        rows = load_fundamentals_many(
+            symbols(12), workers=2, cache=False, mp_context=FORK
+        )
+    assert list(rows) == symbols(12)
+    assert all(r.error is None and r.fundamentals().pe_ttm for r in rows.values())
+
+
+def test_slow_ticker_gets_a_timeout_row():
+    with patched_yfinance(FakeYFinance(latency=2.0)):
+        start = time.perf_counter()
+        rows = load_fundamentals_many(
+            symbols(2), workers=1, cache=False, ticker_timeout=0.2, mp_context=FORK
+        )
+    assert time.perf_counter() - start < 2.0
+    assert all("timed out" in r.error for r in rows.values())
+
+
+def test_overall_timeout_stops_the_workers():
+    with patched_yfinance(FakeYFinance(latency=20.0)):
+        start = time.perf_counter()
+        rows = load_fundamentals_many(
+            symbols(4),
+            workers=2,
+            cache=False,
+            ticker_timeout=None,
+            timeout=0.5,
+            mp_context=FORK,
+        )
+    assert time.perf_counter() - start < 5.0
+    assert all("not finished" in r.error for r in rows.values())
+    assert multiprocessing.active_children() == []
+
+
+def _fundamentals(missing=(), **values):
+    full = {f: 1.0 for f in VALUE_FIELDS if f not in missing}
+    return Fundamentals(**{**full, **values}, warnings=["own note"])
+
+
+class Provider:
+    """A stub loader answering `result` (or raising it) after `latency` s."""
+
+    def __init__(self, result, latency=0.0):
+        self.result, self.latency, self.calls = result, latency, 0
+
+    def __call__(self, ticker, cache=None):
+        self.calls += 1
+        time.sleep(self.latency)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def _resolve(primary, secondary, hedge_after=1.0, timeout=5.0):
+    providers = {"primary": primary, "secondary": secondary}
+    return resolve_fundamentals(
+        "T",
+        primary="primary",
+        secondary="secondary",
+        hedge_after=hedge_after,
+        timeout=timeout,
+        cache=False,
+        providers=providers,
+    )
+
+
+def test_complete_primary_wins_without_hedging():
+    primary, secondary = Provider(_fundamentals()), Provider(_fundamentals())
+    assert _resolve(primary, secondary) is primary.result
+    assert secondary.calls == 0
+
+
+def test_slow_primary_is_hedged_and_not_waited_for():
+    primary = Provider(_fundamentals(), latency=1.0)
+    secondary = Provider(_fundamentals(pe_ttm=2.0))
+    start = time.perf_counter()
+    result = _resolve(primary, secondary, hedge_after=0.05)
+    assert time.perf_counter() - start < 0.8
+    assert result is secondary.result and result.warnings == ["own note"]
+
+
+def test_gaps_are_filled_from_the_secondary():
+    primary = Provider(_fundamentals(missing=["pe_ttm"], ps_ttm=3.0))
+    secondary = Provider(_fundamentals(pe_ttm=20.0, ps_ttm=3.1))
+    result = _resolve(primary, secondary)
+    assert result.pe_ttm == 20.0 and result.ps_ttm == 3.0
+    assert not any(w.startswith("Conflict") for w in result.warnings)
+
+
+def test_disagreement_beyond_the_tolerance_is_a_warning():
+    primary = Provider(_fundamentals(missing=["pe_ttm"], market_cap_musd=100.0))
+    secondary = Provider(_fundamentals(market_cap_musd=200.0))
+    result = _resolve(primary, secondary)
+    assert result.market_cap_musd == 100.0
+    assert any(w.startswith("Conflict on market_cap_musd") for w in result.warnings)
+
+
+def test_gave_up_only_when_the_deadline_leaves_gaps():
+    primary = Provider(_fundamentals(missing=["pe_ttm"]))
+    secondary = Provider(_fundamentals(), latency=1.0)
+    result = _resolve(primary, secondary, timeout=0.2)
+    assert result.pe_ttm is None
+    assert "Gave up waiting for secondary" in result.warnings
+
+
+@pytest.mark.parametrize("failing", ["primary", "secondary"])
+def test_provider_exception_is_no_data(failing):
+    partial = Provider(_fundamentals(missing=["pe_ttm"]))
+    broken = Provider(RuntimeError("boom"))
+    if failing == "primary":
+        result = _resolve(broken, partial, hedge_after=0.05)
+    else:
+        result = _resolve(partial, broken)
+    assert f"[{failing}] no data" in result.warnings
+    assert result.ps_ttm == 1.0 and result.pe_ttm is None
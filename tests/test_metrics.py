@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from pacapicks import config, market_data
+from pacapicks.bench.fakes import FakeYFinance, patched_yfinance, symbols
+from pacapicks.io import metrics
+
+
+def test_nested_profiled_jobs_write_one_profile(tmp_path, monkeypatch):
+    monkeypatch.setenv("PACAPICKS_PROFILE_DIR", str(tmp_path / "prof"))
+    config.reload()
+
+    @metrics.profiled("inner")
+    def inner(x):
+        return x * 2
+
+    @metrics.profiled("outer")
+    def outer():
+        with ThreadPoolExecutor(4) as pool:
+            return list(pool.map(inner, range(8)))
+
+    assert outer() == [x * 2 for x in range(8)]
+    files = os.listdir(tmp_path / "prof")
+    assert len(files) == 1 and files[0].startswith("outer-")
+
+    inner(1)  # no longer nested: profiled on its own
+    assert len(os.listdir(tmp_path / "prof")) == 2
+
+
+def test_yfinance_downloads_record_frame_bytes_not_wire_bytes():
+    metrics.REGISTRY.reset()
+    metrics.enable()
+    try:
+        with patched_yfinance(FakeYFinance()):
+            market_data.snapshots(symbols(5))
+    finally:
+        metrics.disable()
+    series = metrics.REGISTRY.series[("yfinance", "download")]
+    assert series.frame_bytes > 0 and series.bytes == 0
+    assert "pacapicks_io_frame_bytes_total" in metrics.prometheus_text()
+
+
+def _run(code, **env):
+    env = {**os.environ, **env}
+    subprocess.run([sys.executable, "-c", code], env=env, check=True, timeout=60)
+
+
+def test_importing_an_instrumented_client_leaves_config_unresolved():
+    _run(
+        "import sys, pacapicks.io.alpaca\n"
+        "from pacapicks import config\n"
+        "assert config._settings is None, 'config resolved at import'\n"
+        "assert 'dotenv' not in sys.modules\n"
+    )
+
+
+def test_metrics_out_is_read_on_the_first_span(tmp_path):
+    out = tmp_path / "metrics.json"
+    _run(
+        "from pacapicks.io import metrics\n"
+        "with metrics.span('bench', 'noop') as s:\n"
+        "    s.record(status=200)\n",
+        PACAPICKS_METRICS_OUT=str(out),
+    )
+    assert "bench" in out.read_text()
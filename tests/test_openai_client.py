@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+from pacapicks.ai import openai_client
+from pacapicks.ai.batch_assessment import AssessmentBudget, assess_batch
+from pacapicks.ai.openai_client import (
+    cached_response,
+    compile_prompt,
+    load_prompt,
+    test_research_prompt as run_research_prompt,
+)
+from pacapicks.ai.portfolio_schema import Picks
+from pacapicks.bench.fakes import FakeOpenAI, fake_evaluation
+from pacapicks.io.cache import ResponseCache
+
+REQUEST = {"model": "gpt-4o", "input": [{"role": "user", "content": "hi"}]}
+
+
+def test_cached_response_miss_then_hit(tmp_path):
+    fake = FakeOpenAI()
+    cache = ResponseCache(str(tmp_path / "r.sqlite"), ttl=3600)
+
+    first, from_cache = cached_response(fake, cache, **REQUEST)
+    assert not from_cache and fake.requests == 1
+    second, from_cache = cached_response(fake, cache, **REQUEST)
+    assert from_cache and fake.requests == 1
+    assert second.output_text == first.output_text
+
+    cached_response(fake, cache, **{**REQUEST, "model": "gpt-4o-mini"})
+    assert fake.requests == 2  # any change to the request is a miss
+
+
+def test_cached_response_respects_ttl_and_bypass(tmp_path):
+    fake = FakeOpenAI()
+    expired = ResponseCache(str(tmp_path / "r.sqlite"), ttl=-1)
+    cached_response(fake, expired, **REQUEST)
+    _, from_cache = cached_response(fake, expired, **REQUEST)
+    assert not from_cache and fake.requests == 2
+
+    cached_response(fake, False, **REQUEST)
+    cached_response(fake, False, **REQUEST)
+    assert fake.requests == 4
+
+
+def test_research_prompt_parses_output_text_and_rerun_is_free(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the job writes research_output.json here
+    fake = FakeOpenAI(n_picks=3)
+    cache = ResponseCache(str(tmp_path / "r.sqlite"), ttl=3600)
+
+    picks = run_research_prompt(fake, cache)
+    assert isinstance(picks, Picks)
+    assert [p.ticker for p in picks.root] == ["T0000", "T0001", "T0002"]
+    with open(tmp_path / "research_output.json") as f:
+        assert [p["ticker"] for p in json.load(f)] == ["T0000", "T0001", "T0002"]
+
+    again = run_research_prompt(fake, cache)
+    assert fake.requests == 1
+    assert again == picks
+
+
+def test_prompts_are_parsed_and_compiled_once(monkeypatch):
+    openai_client._load_prompts.cache_clear()
+    compile_prompt.cache_clear()
+    opened = []
+    real_open = open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", counting_open)
+    load_prompt("stock_opportunities")
+    load_prompt("stock_evaluation")
+    first = compile_prompt("stock_opportunities", Picks)
+    assert compile_prompt("stock_opportunities", Picks) is first
+    assert opened.count(openai_client.PROMPT_PATH) == 1
+
+    # Compact schema, braces escaped so only the prompt's placeholders fill.
+    schema = first.split("EXPECTED OUTPUT SCHEMA (JSON):\n", 1)[1]
+    assert "\n" not in schema and ": " not in schema
+    filled = first.format(current_date="2025-01-02")
+    assert json.loads(filled.split("EXPECTED OUTPUT SCHEMA (JSON):\n", 1)[1])
+
+
+def test_assessment_rerun_same_day_makes_no_calls(tmp_path):
+    fake = FakeOpenAI(output=fake_evaluation)
+    cache = ResponseCache(str(tmp_path / "r.sqlite"), ttl=3600)
+
+    async def run():
+        budget = AssessmentBudget(5.0)
+        results = [
+            r
+            async for _, r in assess_batch(
+                ["AAA", "BBB"], client=fake.as_async(), cache=cache, budget=budget
+            )
+        ]
+        return results, budget
+
+    first, _ = asyncio.run(run())
+    again, budget = asyncio.run(run())
+    assert fake.requests == 2
+    assert budget.spent_usd == 0.0
+    assert sorted(r.ticker for r in again) == sorted(r.ticker for r in first)
+
+
+def test_dated_models_price_like_their_base_model():
+    from pacapicks.ai.batch_assessment import _worst_case_usd
+    from pacapicks.ai.openai_client import PRICING, model_pricing
+
+    assert model_pricing("gpt-4o-mini-2024-07-18") == PRICING["gpt-4o-mini"]
+    assert model_pricing("unknown-model") == PRICING["gpt-4o"]
+    assert _worst_case_usd("gpt-4o-mini-2024-07-18", 1000, 1000) == _worst_case_usd(
+        "gpt-4o-mini", 1000, 1000
+    )
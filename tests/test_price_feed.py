@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from pacapicks import config, market_data
+from pacapicks.bench.fakes import FakePriceStream, FakeYFinance, patched_yfinance
+from pacapicks.io.price_feed import PriceFeed
+
+
+def _until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def stream():
+    with FakePriceStream() as server:
+        yield server
+
+
+@pytest.fixture
+def feed(stream):
+    feed = PriceFeed(url=stream.url, key="k", secret="s")
+    yield feed
+    feed.stop()
+
+
+def test_trades_and_quotes_update_the_table(stream, feed):
+    feed.subscribe(["AAA"])
+    feed.start()
+    assert feed.connected.wait(5)
+    assert _until(lambda: "AAA" in stream.subscribed)
+
+    stream.push(
+        [
+            {"T": "t", "S": "AAA", "p": 10.5},
+            {"T": "q", "S": "AAA", "bp": 10.4, "ap": 10.6},
+        ]
+    )
+    assert _until(lambda: (feed.get("AAA") or {}).get("ask") == 10.6)
+    quote = feed.get("AAA")
+    assert (quote["last"], quote["bid"], quote["prev_close"]) == (10.5, 10.4, None)
+
+
+def test_subscribe_after_connect_reaches_the_stream(stream, feed):
+    feed.start()
+    assert feed.connected.wait(5)
+    feed.subscribe(["AAA", "BBB"])
+    assert _until(lambda: stream.subscribed == {"AAA", "BBB"})
+
+
+def test_concurrent_subscribes_are_all_sent(stream, feed):
+    feed.start()
+    names = [f"S{i:03d}" for i in range(200)]
+
+    def worker(k):
+        for name in names[k::8]:
+            feed.subscribe([name])
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert _until(lambda: stream.subscribed == set(names))
+
+
+def test_reconnect_resubscribes(stream, feed):
+    feed.subscribe(["AAA"])
+    feed.start()
+    assert _until(lambda: stream.connections == 1 and "AAA" in stream.subscribed)
+
+    stream.subscriptions.clear()
+    stream.drop()
+    assert _until(lambda: stream.connections == 2 and stream.subscriptions, 10)
+    assert stream.subscriptions == [["AAA"]]
+
+
+def test_snapshot_is_served_from_the_feed(stream, feed):
+    fake = FakeYFinance()
+    feed.update("AAA", prev_close=9.0)
+    feed.subscribe(["AAA"])
+    feed.start()
+    assert feed.connected.wait(5)
+    stream.push([{"T": "t", "S": "AAA", "p": 10.0}])
+    assert _until(lambda: feed.fresh("AAA") is not None)
+
+    market_data.use_feed(feed)
+    try:
+        with patched_yfinance(fake):
+            assert market_data.snapshot("AAA") == {"last": 10.0, "prev_close": 9.0}
+            assert fake.requests == 0
+
+            cold = market_data.snapshot("BBB")  # not in the feed: REST
+            assert fake.requests == 1 and cold["last"] is not None
+    finally:
+        market_data.use_feed(None)
+    # The REST answer seeds the feed and subscribes the symbol.
+    assert _until(lambda: "BBB" in stream.subscribed)
+    assert feed.fresh("BBB") is not None
+
+
+def test_configured_feed_needs_a_stream_url(stream, monkeypatch):
+    with market_data.configured_feed() as feed:
+        assert feed is None
+        assert market_data._feed is None
+
+    monkeypatch.setenv("ALPACA_DATA_STREAM_URL", stream.url)
+    config.reload()
+    with market_data.configured_feed(["AAA"]) as feed:
+        assert market_data._feed is feed
+        assert feed.connected.wait(5)
+        assert _until(lambda: "AAA" in stream.subscribed)
+    assert market_data._feed is None
+    assert not feed.connected.is_set()
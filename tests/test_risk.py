@@ -0,0 +1,72 @@
+import numpy as np
+
+from pacapicks.logic.order_builder import guardrails
+from pacapicks.logic.risk import RiskEngine
+
+SYMBOLS = ["AAA", "BBB", "CCC", "SPY"]
+WINDOW = 30
+
+
+def _closes(days, seed=0):
+    rng = np.random.default_rng(seed)
+    vol = np.array([0.03, 0.01, 0.02, 0.01])[:, None]
+    returns = rng.normal(0.0005, 1.0, (len(SYMBOLS), days)) * vol
+    return 50 * np.cumprod(1 + returns, axis=1)
+
+
+def _engine(close):
+    engine = RiskEngine(SYMBOLS, window=WINDOW)
+    engine.seed(close)
+    return engine
+
+
+def test_updates_across_the_ring_buffer_wrap_match_np_cov():
+    close = _closes(100)
+    engine = _engine(close[:, :40])
+    for day in range(40, 100):  # wraps the 30-row buffer twice
+        engine.update(dict(zip(SYMBOLS, close[:, day])))
+
+    r = close[:, -WINDOW:] / close[:, -WINDOW - 1 : -1] - 1
+    assert np.allclose(engine.covariance(), np.cov(r), rtol=1e-8, atol=1e-14)
+
+
+def test_seed_spans_gaps_like_update():
+    close = _closes(60)
+    close[0, [10, 11, 45]] = np.nan
+    close[2, 50] = np.nan
+
+    seeded = _engine(close)
+    replayed = RiskEngine(SYMBOLS, window=WINDOW)
+    for day in range(close.shape[1]):
+        replayed.update(close[:, day])
+
+    assert np.allclose(seeded.covariance(), replayed.covariance(), rtol=1e-10)
+    assert (seeded._obs == replayed._obs).all()
+    assert np.allclose(seeded._last, replayed._last)
+
+
+def test_marginal_is_the_vol_of_the_book_after_the_order():
+    engine = _engine(_closes(60))
+    weights = np.array([5.0, 8.0, 0.0, 20.0])
+    book = engine.portfolio(weights)
+    for i, symbol in enumerate(SYMBOLS):
+        for delta in (-5.0, 3.0):
+            after = weights.copy()
+            after[i] += delta
+            expected = engine.portfolio(after).vol_pct
+            assert np.isclose(book.marginal(symbol, delta), expected, rtol=1e-9)
+
+
+def test_vol_cap_blocks_raising_orders_and_passes_lowering_ones():
+    engine = _engine(_closes(60))
+    book = engine.portfolio({"AAA": 8.0, "BBB": 8.0})
+    cap = book.vol_pct + 0.01
+
+    buy = {"symbol": "AAA", "target_pct": 5.0}
+    assert book.marginal("AAA", 5.0) > cap
+    assert not guardrails(buy, 100.0, 8.0, risk=book, max_vol_pct=cap)
+    assert guardrails(buy, 100.0, 8.0)  # no risk: judged on size alone
+
+    trim = {"symbol": "AAA", "target_pct": -5.0}
+    assert book.marginal("AAA", -5.0) < book.vol_pct
+    assert guardrails(trim, 100.0, 8.0, risk=book, max_vol_pct=1.0)
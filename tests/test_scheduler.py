@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from pacapicks.bench.fakes import (
+    FakeYFinance,
+    StubServer,
+    alpaca_routes,
+    patched_yfinance,
+)
+from pacapicks.io import alpaca
+from pacapicks.io.alpaca import AlpacaClient
+from pacapicks.io.cache import default_cache
+from pacapicks.jobs import scheduler
+
+N_POSITIONS = 4
+
+
+@pytest.fixture
+def fake_yf():
+    fake = FakeYFinance()
+    with StubServer(alpaca_routes(N_POSITIONS)) as stub, patched_yfinance(fake):
+        alpaca.use_client(AlpacaClient(base_url=stub.url, headers={}))
+        try:
+            yield fake
+        finally:
+            alpaca.use_client(None)
+
+
+def _run(now):
+    report = scheduler.run_incremental(stages=["fundamentals"], now=now, record=False)
+    return report["fundamentals"]
+
+
+def test_changed_statements_mark_fundamentals_dirty(fake_yf):
+    start = time.time()
+    first = _run(start)
+    assert first["reasons"] == {"new": N_POSITIONS} and not first["failed"]
+    assert _run(start + 3600)["ran"] == []
+
+    # Another job caches a new filing for one ticker.
+    ticker = first["ran"][0]
+    cache = default_cache()
+    cached = cache.get("yfinance", ticker)
+    updated = cached.fundamentals.model_copy(
+        update={"total_debt_musd": (cached.fundamentals.total_debt_musd or 0) + 50}
+    )
+    cache.put("yfinance", ticker, updated, fiscal_period=cached.fiscal_period)
+
+    third = _run(start + 7200)
+    assert third["ran"] == [ticker] and third["reasons"] == {"statements": 1}
+    assert _run(start + 10800)["ran"] == []
@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+
+from pacapicks.ai.streaming import JsonArrayStream, PickStream, research_enriched
+from pacapicks.bench.fakes import FakeOpenAI, _fake_picks
+from pacapicks.io.cache import ResponseCache
+
+TRICKY = [
+    {"a": "close ] and } inside", "b": [1, {"c": "x"}]},
+    {"quote": 'she said \\"[{\\"', "slash": "\\\\", "unicode": "\\u005d"},
+    [1, 2, [3]],
+    {"empty": {}, "list": []},
+]
+REQUEST = {"model": "gpt-4o", "input": [{"role": "user", "content": "picks"}]}
+
+
+def _split(text, size):
+    parser = JsonArrayStream()
+    out = [
+        raw
+        for i in range(0, len(text), size)
+        for raw in parser.feed(text[i : i + size])
+    ]
+    return out, parser
+
+
+def test_elements_survive_every_chunk_boundary():
+    text = "```json\n" + json.dumps(TRICKY, indent=1) + "\n```\ntrailing [text]"
+    for size in range(1, 24):
+        out, parser = _split(text, size)
+        assert [json.loads(raw) for raw in out] == TRICKY, size
+        assert parser.done
+
+
+def test_bracket_in_prose_is_not_the_array():
+    picks = _fake_picks(3)
+    text = "Here are [3] picks:\n[ \n" + json.dumps(picks)[1:] + "\nSee [1]."
+    for size in (1, 2, 7, len(text)):
+        out, parser = _split(text, size)
+        assert [json.loads(raw) for raw in out] == picks, size
+        assert parser.done
+
+
+def _stream(fake, cache=False):
+    return PickStream(fake, cache, **REQUEST)
+
+
+def test_invalid_elements_go_to_errors():
+    picks = _fake_picks(3)
+    picks[1]["conviction_score"] = 99
+    fake = FakeOpenAI(output=lambda request: json.dumps(picks), chunk_chars=5)
+    stream = _stream(fake)
+    tickers = [p.ticker for p in stream]
+    assert tickers == [picks[0]["ticker"], picks[2]["ticker"]]
+    assert len(stream.errors) == 1 and stream.complete
+
+
+def test_identical_request_replays_from_the_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    fake = FakeOpenAI(n_picks=4, chunk_chars=7)
+
+    first = _stream(fake, cache)
+    fresh = [p.ticker for p in first]
+    second = _stream(fake, cache)
+    replayed = [p.ticker for p in second]
+
+    assert fake.requests == 1 and replayed == fresh and len(fresh) == 4
+    assert second.from_cache and second.cost == 0.0 and first.cost > 0.0
+
+
+def test_enrichment_starts_while_the_model_is_still_writing():
+    fake = FakeOpenAI(latency=0.5, n_picks=4, chunk_chars=32)
+    fake._rng.uniform = lambda a, b: 1.0
+    stream = _stream(fake)
+    started, lock = [], threading.Lock()
+
+    def lookup(ticker, cache=None):
+        with lock:
+            started.append(time.perf_counter())
+        time.sleep(0.05)
+        return {"last": 1.0, "prev_close": 1.0}
+
+    start = time.perf_counter()
+    enriched = research_enriched(stream, fundamentals=lookup, quote=lookup)
+
+    assert [e.pick.ticker for e in enriched] == [p["ticker"] for p in _fake_picks(4)]
+    assert all(e.quote == {"last": 1.0, "prev_close": 1.0} for e in enriched)
+    assert min(started) - start < 0.4  # first lookup well before the 0.5s stream ends
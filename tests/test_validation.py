@@ -0,0 +1,69 @@
+import json
+from datetime import date
+
+import numpy as np
+
+from pacapicks.ai.assessment_schema import StockEvaluation
+from pacapicks.ai.portfolio_schema import Pick, Picks
+from pacapicks.ai.validation import LazyModels, dump_stamped, load_stamped
+from pacapicks.bench.fakes import _fake_picks, fake_evaluation
+from pacapicks.io.history import HistoryStore, load_evaluations, record_evaluations
+
+
+def _evaluation(ticker):
+    prompt = f"Evaluate {ticker} as of 2025-06-02 ..."
+    text = fake_evaluation({"input": [{"content": prompt}]})
+    return StockEvaluation.model_validate_json(text)
+
+
+def test_root_models_round_trip_through_load_stamped():
+    picks = Picks([Pick.model_validate(p) for p in _fake_picks(3)])
+    for lazy in (True, False):
+        loaded = load_stamped(Picks, dump_stamped(Picks, [picks]), lazy=lazy)
+        assert loaded.items[0] == picks and not loaded.errors
+
+
+def test_recorded_evaluations_load_without_revalidating(tmp_path):
+    store = HistoryStore(str(tmp_path / "history"))
+    evaluations = [_evaluation(f"T{i:03d}") for i in range(5)]
+    record_evaluations(evaluations, store=store)
+
+    loaded = load_evaluations(store=store)
+    assert isinstance(loaded.items, LazyModels)
+    assert [e.model_dump() for e in loaded.items] == [
+        e.model_dump() for e in evaluations
+    ]
+
+
+def test_unstamped_rows_are_still_validated(tmp_path):
+    store = HistoryStore(str(tmp_path / "history"))
+    record_evaluations([_evaluation("NEW")], store=store)
+    legacy = _evaluation("OLD").model_dump_json()
+    store.append(
+        "evaluations",
+        _columns_like_record("OLD"),
+        blobs={"json": [legacy, json.dumps({"ticker": "BAD", "as_of": "x"})]},
+    )
+
+    loaded = load_evaluations(store=store)
+    assert not isinstance(loaded.items, LazyModels)
+    assert [e.ticker for e in loaded.valid] == ["NEW", "OLD"]
+    assert list(loaded.errors) == [2]
+
+
+def _columns_like_record(ticker):
+    n = 2
+    return {
+        "date": [date(2025, 6, 2)] * n,
+        "ticker": [ticker] * n,
+        "recommendation": np.asarray(["hold"] * n, dtype="<U8"),
+        "conviction_1to5": np.ones(n, dtype=np.int8),
+        "entry_price": [np.nan] * n,
+        "target_price": [np.nan] * n,
+        "stop_price": [np.nan] * n,
+        "stop_loss_pct": [np.nan] * n,
+        "profit_target_pct": [np.nan] * n,
+        "time_horizon_days": np.zeros(n, dtype=np.int32),
+        "price_trend": np.asarray(["sideways"] * n, dtype="<U10"),
+        "beta_1y": [np.nan] * n,
+    }